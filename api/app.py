@@ -2,15 +2,30 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException, APIRouter
+from fastapi import FastAPI, HTTPException, APIRouter, Query, Request
 from src.main import FlightAgent
-from fastapi.responses import JSONResponse
+from src.json_schema import FlightQueryData
+from src.price_calendar import price_calendar_async
+from src.fare_index import fare_index
+from src.warmer import cache_warmer, WARMER_ENABLED
+from src import fetcher
+from src.scheduler import fetch_scheduler, SchedulerOverloaded
+from src.parse_pool import parse_pool
+from src.cache import flight_cache, query_cache
+from src.query_parser import fast_path_stats
+from src.core import date_fetches
+from src.ratelimit import upstream_limiter
+from src.retry import retry_stats
+from src.jobs import JobManager, JobStoreFull, FAILED, CANCELLED
+from src.metrics import CallbackMetric, registry
+from src.logger import dropped_records, log_context
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import json
 import uvicorn
 from dotenv import load_dotenv
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
@@ -20,9 +35,8 @@ BASE_URL = os.getenv("FLIGHTS_API_HOST", "0.0.0.0")
 PORT = int(os.getenv("FLIGHTS_API_PORT", "3001"))
 HOST = os.getenv("HOST", "0.0.0.0")
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
-
-# Thread pool executor for CPU-bound operations
-executor = ThreadPoolExecutor(max_workers=4)
+# How often a blocking ?wait=true request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 1.0
 
 # FastAPI app configuration
 app = FastAPI(
@@ -37,6 +51,60 @@ app = FastAPI(
 # API Router
 api_router = APIRouter(prefix="/api/v1")
 flight_agent = FlightAgent()
+job_manager = JobManager(flight_agent.stream_search_flights)
+# Set on startup; done once the agents are built
+warm_up_task = None
+
+def _cache_stats(key):
+    caches = {"flight": flight_cache, "query": query_cache, "fare": fare_index}
+    return {name: cache.stats()[key] for name, cache in caches.items() if cache is not None}
+
+def _queue_depths():
+    stats = fetch_scheduler.stats()
+    return {"interactive": stats["interactive_queue_depth"], "batch": stats["batch_queue_depth"]}
+
+# Counters and gauges kept by the components themselves, read when /metrics is scraped
+for metric in (
+    CallbackMetric("flight_cache_hits_total", "Cache hits", "counter", lambda: _cache_stats("hits"), "cache"),
+    CallbackMetric("flight_cache_misses_total", "Cache misses", "counter", lambda: _cache_stats("misses"), "cache"),
+    CallbackMetric("flight_cache_evictions_total", "Cache evictions", "counter", lambda: _cache_stats("evictions"), "cache"),
+    CallbackMetric("flight_cache_entries", "Cached entries", "gauge", lambda: _cache_stats("entries"), "cache"),
+    CallbackMetric("flight_query_fast_path_hits_total", "Queries parsed without the extractor LLM", "counter",
+                   lambda: fast_path_stats.snapshot()["fast_path_hits"]),
+    CallbackMetric("flight_query_llm_fallbacks_total", "Queries sent to the extractor LLM", "counter",
+                   lambda: fast_path_stats.snapshot()["llm_fallbacks"]),
+    CallbackMetric("flight_fetch_coalesced_total", "Date fetches served by an identical in-flight fetch", "counter",
+                   lambda: date_fetches.stats()["coalesced"]),
+    CallbackMetric("flight_fetch_coalesced_in_flight", "Distinct date fetches in flight", "gauge",
+                   lambda: date_fetches.stats()["in_flight"]),
+    CallbackMetric("flight_fetch_retries_total", "Fetch retries, timeouts and hedged requests", "counter",
+                   lambda: retry_stats.snapshot(), "kind"),
+    CallbackMetric("flight_upstream_errors_total", "Upstream fetches that failed", "counter",
+                   lambda: upstream_limiter.stats()["errors"]),
+    CallbackMetric("flight_upstream_concurrency_limit", "Adaptive upstream concurrency limit", "gauge",
+                   lambda: upstream_limiter.stats()["limit"]),
+    CallbackMetric("flight_upstream_in_flight", "Upstream fetches in flight", "gauge",
+                   lambda: upstream_limiter.stats()["in_flight"]),
+    CallbackMetric("flight_scheduler_queue_depth", "Fetches waiting for a scheduler worker", "gauge",
+                   _queue_depths, "priority"),
+    CallbackMetric("flight_scheduler_running", "Fetches running on scheduler workers", "gauge",
+                   lambda: fetch_scheduler.stats()["running"]),
+    CallbackMetric("flight_scheduler_completed_total", "Fetches completed by the scheduler", "counter",
+                   lambda: fetch_scheduler.stats()["completed"]),
+    CallbackMetric("flight_scheduler_rejected_total", "Searches rejected because the scheduler was full", "counter",
+                   lambda: fetch_scheduler.stats()["rejected"]),
+    CallbackMetric("flight_log_records_dropped_total", "Log records dropped because the log queue was full",
+                   "counter", dropped_records),
+    CallbackMetric("flight_search_jobs", "Search jobs held in the job store", "gauge",
+                   lambda: len(job_manager.store)),
+    CallbackMetric("flight_cache_warmer_fetches_total", "Date fetches made by the cache warmer", "counter",
+                   lambda: cache_warmer.stats()["fetches"]),
+    CallbackMetric("flight_cache_warmer_errors_total", "Cache warmer fetches that failed", "counter",
+                   lambda: cache_warmer.stats()["errors"]),
+    CallbackMetric("flight_cache_warmer_tracked_routes", "Route and month pairs ranked by popularity", "gauge",
+                   lambda: cache_warmer.stats()["tracked_routes"]),
+):
+    registry.register(metric)
 
 class QueryModel(BaseModel):
     user_query: str
@@ -59,26 +127,101 @@ async def health_check():
         "timestamp": "2025-01-27T00:00:00Z"
     }
 
-async def run_flight_search_in_executor(user_query: str):
+@api_router.get("/ready")
+async def readiness_check():
+    """
+    503 until the agents and the flight fetcher are loaded (see startup_event);
+    /health only reports that the process is up
+    """
+    if warm_up_task is not None and warm_up_task.done() and warm_up_task.exception() is None:
+        return {"status": "ready"}
+    detail = {"status": "starting"}
+    if warm_up_task is not None and warm_up_task.done():
+        detail = {"status": "failed", "error": repr(warm_up_task.exception())}
+    return JSONResponse(content=detail, status_code=503)
+
+@api_router.get("/stats")
+async def get_stats():
+    """
+    Cache and query fast-path counters for this process
+    """
+    return {
+        "flight_cache": flight_cache.stats() if flight_cache is not None else None,
+        "query_cache": query_cache.stats() if query_cache is not None else None,
+        "query_parser": fast_path_stats.snapshot(),
+        "coalesced_fetches": date_fetches.stats(),
+        "upstream_limiter": upstream_limiter.stats(),
+        "fetch_retries": retry_stats.snapshot(),
+        "fetch_scheduler": fetch_scheduler.stats(),
+        "parse_pool": parse_pool.stats() if parse_pool is not None else None,
+        "fare_index": fare_index.stats(),
+        "cache_warmer": cache_warmer.stats(),
+        "log_records_dropped": dropped_records(),
+    }
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """
+    Stage latency histograms and the /stats counters in the Prometheus text format
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/priceCalendar")
+async def get_price_calendar(from_airport: str, to_airport: str, months: List[str] = Query([]),
+                             adults: int = 1, children: int = 0, seat: str = "economy", max_stops: int = 1):
     """
-    Run the flight search in a thread pool executor to avoid blocking the event loop
+    Cheapest and median fare per date for a route over one or more months
+    (`months=2025-06&months=2025-07`). Served from the fare index that every
+    search updates; only dates that are missing or stale are fetched.
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(
-        executor, 
-        flight_agent.search_flights, 
-        user_query
-    )
+    if not months:
+        raise HTTPException(status_code=400, detail="Give at least one month, e.g. months=2025-06")
+    user_filters = FlightQueryData(from_airport=from_airport.upper(), to_airport=to_airport.upper(), date_list=[],
+                                   adults=adults, children=children, seat=seat,
+                                   max_stops=max_stops).model_dump(mode='json')
+    try:
+        return await price_calendar_async(user_filters, months)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SchedulerOverloaded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
 
 @api_router.post("/searchFlights/{search_id}")
-async def initiate_flight_search(search_id: int, query: QueryModel):
+async def initiate_flight_search(search_id: int, query: QueryModel, request: Request, wait: bool = False):
+    """
+    Queue a search and return immediately with its status (202). Poll
+    GET /searchFlights/{search_id} for partial and final results.
+    With ?wait=true the request blocks until the search finishes, and the
+    search is cancelled if the client disconnects first.
+    """
+    created = job_manager.get(search_id) is None
     try:
-        # Run the CPU-intensive flight search in a thread pool
-        best_flight_result = await run_flight_search_in_executor(query.user_query)
+        if created:
+            fetch_scheduler.admit(1)
+        job = job_manager.submit(search_id, query.user_query)
+    except (JobStoreFull, SchedulerOverloaded) as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    if not wait:
+        return JSONResponse(content=job.to_dict(), status_code=202)
+
+    try:
+        # Upstream fetches run on the shared fetch scheduler, LLM calls are awaited
+        while not job.done.is_set():
+            try:
+                await asyncio.wait_for(job.done.wait(), DISCONNECT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    # Nobody will read the result; free the fetch capacity
+                    if created:
+                        job_manager.cancel(search_id)
+                    return JSONResponse(content=job.to_dict(), status_code=499)
+        if job.status in (FAILED, CANCELLED):
+            raise RuntimeError(job.error)
         
         response_json = {
             'search_id': search_id,
-            'result': best_flight_result
+            'result': job.result
         }
         return JSONResponse(content=response_json, status_code=200)
         
@@ -88,12 +231,83 @@ async def initiate_flight_search(search_id: int, query: QueryModel):
             detail=f"Flight search failed: {str(e)}"
         )
 
+@api_router.get("/searchFlights/{search_id}")
+async def get_flight_search(search_id: int):
+    """
+    Status, partial results and final result of a queued search
+    """
+    job = job_manager.get(search_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Search {search_id} not found or expired")
+    return JSONResponse(content=job.to_dict(), status_code=200)
+
+@api_router.delete("/searchFlights/{search_id}")
+async def cancel_flight_search(search_id: int):
+    """
+    Cancel a queued or running search and drop its pending fetches
+    """
+    job = job_manager.cancel(search_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Search {search_id} not found or expired")
+    return JSONResponse(content=job.to_dict(), status_code=200)
+
+@api_router.post("/searchFlights/{search_id}/stream")
+async def stream_flight_search(search_id: int, query: QueryModel, request: Request):
+    """
+    Stream search progress: each date's flights as soon as its fetch completes,
+    then the final ranked result. Sends Server-Sent Events when the client
+    accepts text/event-stream, newline-delimited JSON otherwise. A client
+    disconnect cancels the stream task and with it all outstanding fetches.
+    """
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    try:
+        fetch_scheduler.admit(1)
+    except SchedulerOverloaded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    def encode(event):
+        event = {"search_id": search_id, **event}
+        if use_sse:
+            return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        return json.dumps(event) + "\n"
+
+    async def event_stream():
+        try:
+            with log_context(search_id=search_id):
+                async for event in flight_agent.stream_search_flights(query.user_query):
+                    yield encode(event)
+        except Exception as e:
+            yield encode({"event": "error", "detail": f"Flight search failed: {str(e)}"})
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type)
+
+def warm_up():
+    fetcher.preload()
+    flight_agent.warm_up()
+
+@api_router.on_event("startup")
+async def startup_event():
+    """
+    Start the background search workers and the cache warmer, and load the
+    agents off the event loop, so the server accepts connections (and /health) right away
+    """
+    global warm_up_task
+    job_manager.start()
+    if WARMER_ENABLED:
+        cache_warmer.start()
+    warm_up_task = asyncio.get_running_loop().run_in_executor(None, warm_up)
+
 @api_router.on_event("shutdown")
 async def shutdown_event():
     """
     Clean up resources on shutdown
     """
-    executor.shutdown(wait=True)
+    await job_manager.stop()
+    cache_warmer.stop()
+    fetch_scheduler.shutdown()
+    if parse_pool is not None:
+        parse_pool.shutdown()
 
 # Include the API router
 app.include_router(api_router)
@@ -106,7 +320,7 @@ if __name__ == "__main__":
     print(f"📚 API Documentation: {BASE_URL}:{PORT}/docs")
     print(f"🔍 Health Check: {BASE_URL}:{PORT}/health")
     print(f"🔧 Debug Mode: {DEBUG}")
-    print(f"🧵 Thread Pool Workers: 1")
+    print(f"🧵 Fetch Workers: {fetcher.FLIGHT_FETCH_WORKERS}")
     print("-" * 50)
     
     uvicorn.run(
@@ -0,0 +1,82 @@
+"""
+Offline stand-in for the Claude model used by the query extractor and the
+flight analyzer agents. It answers from the request alone, deterministically,
+after a configurable simulated latency.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+from src.analyzer_payload import expand_analyzer_payload
+from src.query_parser import parse_query
+from src.ranker import rank_flights
+
+
+@dataclass
+class FakeModel(Model):
+    """
+    agno Model answering FlightQueryData and FlightResponse requests
+
+    latency_ms is the fixed cost of every call; ms_per_1k_chars is added per
+    1000 characters of prompt, so payload size shows up in the timings.
+    """
+
+    id: str = "fake-flight-model"
+    name: str = "FakeModel"
+    provider: str = "Fake"
+    supports_json_schema_outputs: bool = True
+    latency_ms: float = 800.0
+    ms_per_1k_chars: float = 2.0
+    # The real date, as the fast-path parser in FlightAgent resolves dates against it too
+    today: date = field(default_factory=date.today)
+    # Used when the rule-based parser cannot read the query
+    default_route: tuple = ("BLR", "AMD")
+
+    def _delay(self, messages):
+        chars = sum(len(message.get_content_string() or "") for message in messages)
+        return (self.latency_ms + self.ms_per_1k_chars * chars / 1000) / 1000
+
+    def _answer(self, messages, response_format):
+        schema = (response_format or {}).get("json_schema", {}).get("name")
+        prompt = messages[-1].get_content_string() if messages else ""
+        if schema == "FlightResponse":
+            return rank_flights(expand_analyzer_payload(prompt)).model_dump_json()
+        query_data, _ = parse_query(prompt, today=self.today)
+        if query_data is None:
+            query_data, _ = parse_query(f"{self.default_route[0]} to {self.default_route[1]} "
+                                        f"in {self.today.strftime('%B %Y')}", today=self.today)
+        return query_data.model_dump_json()
+
+    def invoke(self, messages=None, response_format=None, **kwargs):
+        time.sleep(self._delay(messages))
+        return self._answer(messages, response_format)
+
+    async def ainvoke(self, messages=None, response_format=None, **kwargs):
+        await asyncio.sleep(self._delay(messages))
+        return self._answer(messages, response_format)
+
+    def invoke_stream(self, messages=None, response_format=None, **kwargs):
+        yield self.invoke(messages=messages, response_format=response_format)
+
+    async def ainvoke_stream(self, messages=None, response_format=None, **kwargs):
+        yield await self.ainvoke(messages=messages, response_format=response_format)
+
+    def parse_provider_response(self, response, **kwargs):
+        return ModelResponse(role="assistant", content=response)
+
+    def parse_provider_response_delta(self, response, **kwargs):
+        return ModelResponse(role="assistant", content=response)
+
+
+def install_fake_model(flight_agent, **model_kwargs):
+    """
+    Point the agents of a FlightAgent at FakeModel instances
+    """
+    for agent in (flight_agent.query_extractor_agent, flight_agent.flight_list_analyzer_agent):
+        if agent is not None:
+            agent.model = FakeModel(**model_kwargs)
+    return flight_agent
@@ -0,0 +1,140 @@
+"""
+Record/replay stand-in for the Google Flights fetch.
+
+Replay serves fixture pages from disk through the real fast_flights parser,
+after an injected latency and with an injected error rate. Record mode
+fetches live pages with src.fetcher and saves them as fixtures.
+"""
+import hashlib
+import random
+import threading
+import time
+from pathlib import Path
+
+from src import core, fetcher
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+_AIRLINES = ["IndiGo", "Air India", "Akasa Air", "SpiceJet", "Air India Express", "Vistara"]
+
+
+def filter_key(filter):
+    """
+    Fixture name of a fetch: hash of the encoded Google Flights filter
+    """
+    return hashlib.sha1(filter.as_b64()).hexdigest()[:16]
+
+
+def synthetic_page(rng, flights=40, best=3):
+    """
+    A results page in the markup fast_flights parses, with random fares
+    """
+    items = []
+    for index in range(flights):
+        departure = rng.randrange(0, 24 * 60, 5)
+        duration = rng.randrange(70, 9 * 60, 5)
+        arrival = (departure + duration) % (24 * 60)
+        stops = 0 if duration < 180 else rng.choice([0, 1, 1, 2])
+        items.append(
+            '<li><div class="sSHqwe tPgKwe ogfYpf"><span>{airline}</span></div>'
+            '<span class="mv1WYe"><div>{departure} on Sun, Jun 15</div><div>{arrival} on Sun, Jun 15</div></span>'
+            '<span class="bOzv6">{ahead}</span><div class="Ak5kof"><div>{hours} hr {minutes} min</div></div>'
+            '<div class="BbR8Ec"><div class="ogfYpf">{stops}</div></div>'
+            '<div class="YMlIz FpEdX">₹{price:,}</div></li>'.format(
+                airline=rng.choice(_AIRLINES),
+                departure=_clock(departure), arrival=_clock(arrival),
+                ahead="+1" if arrival < departure else "",
+                hours=duration // 60, minutes=duration % 60,
+                stops="Nonstop" if stops == 0 else f"{stops} stop{'s' if stops > 1 else ''}",
+                price=rng.randrange(2500, 15000, 50),
+            )
+        )
+    return (
+        '<html><body><span class="gOatQ">{level}</span>'
+        '<div jsname="IWWDBc"><ul class="Rk10dc">{best}</ul></div>'
+        '<div jsname="YdtKid"><ul class="Rk10dc">{other}<li></li></ul></div></body></html>'
+    ).format(level=rng.choice(["low", "typical", "high"]), best="".join(items[:best]), other="".join(items[best:]))
+
+
+def _clock(minutes):
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def generate_fixtures(directory=FIXTURES_DIR, count=64, flights=40, seed=7):
+    """
+    Write `count` synthetic fixture pages (same seed, same pages)
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for index in range(count):
+        (directory / f"synthetic-{index:04d}.html").write_text(synthetic_page(rng, flights), encoding="utf-8")
+    return directory
+
+
+class ReplayFlights:
+    """
+    Drop-in for src.core's fetch_page
+
+    Args:
+        directory: Fixture directory; synthetic fixtures are generated when empty
+        latency_ms (float): Median injected latency per fetch
+        latency_sigma (float): Log-normal spread of the latency (0 for constant)
+        error_rate (float): Fraction of fetches failing like an upstream 5xx
+        seed (int): Seed for latency and error injection
+        record (bool): Fetch live pages with src.fetcher and save them instead
+    """
+
+    def __init__(self, directory=FIXTURES_DIR, latency_ms=300.0, latency_sigma=0.5, error_rate=0.0,
+                 seed=7, record=False):
+        self.directory = Path(directory)
+        self.latency = latency_ms / 1000
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.record = record
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pages = {}
+        self.calls = 0
+        self.errors = 0
+        if not record:
+            if not self.directory.exists() or not any(self.directory.glob("*.html")):
+                generate_fixtures(self.directory)
+            self._names = sorted(path.stem for path in self.directory.glob("*.html"))
+            self._known = set(self._names)
+
+    def _page(self, name):
+        page = self._pages.get(name)
+        if page is None:
+            page = self._pages[name] = (self.directory / f"{name}.html").read_text(encoding="utf-8")
+        return page
+
+    def fetch_page(self, filter, currency="inr"):
+        key = filter_key(filter)
+        if self.record:
+            page = fetcher.fetch_page(filter, currency=currency)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / f"{key}.html").write_text(page, encoding="utf-8")
+            return page
+
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * (self._rng.lognormvariate(0, self.latency_sigma) if self.latency_sigma else 1)
+            failed = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        if failed:
+            with self._lock:
+                self.errors += 1
+            raise fetcher.UpstreamError("503 Result: injected upstream error")
+        # Recorded page for this exact filter, otherwise a stable pick among the fixtures
+        if key in self._known:
+            return self._page(key)
+        return self._page(self._names[int(key, 16) % len(self._names)])
+
+    def install(self):
+        """
+        Patch src.core to fetch through this stand-in
+        """
+        core.fetch_page = self.fetch_page
+        return self
@@ -0,0 +1,208 @@
+"""
+Offline benchmarks for the search pipeline.
+
+Google Flights is replaced by benchmarks.replay (fixture pages with injected
+latency and errors) and Claude by benchmarks.fake_llm, so the numbers only
+depend on this code and the flags below.
+
+    python -m benchmarks.run --scenario all --iterations 20 --concurrency 4
+    python -m benchmarks.run --scenario api --output results.json
+    python -m benchmarks.run --scenario parallel --record   # save live pages as fixtures
+"""
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_llm import install_fake_model  # noqa: E402
+from benchmarks.replay import FIXTURES_DIR, ReplayFlights  # noqa: E402
+from src import core, main, query_parser  # noqa: E402
+from src.json_schema import FlightQueryData  # noqa: E402
+from src.ratelimit import upstream_limiter  # noqa: E402
+
+ROUTES = [("BLR", "AMD"), ("DEL", "BOM"), ("BOM", "GOI"), ("MAA", "DEL"), ("HYD", "CCU"), ("BLR", "DEL")]
+CITIES = {"BLR": "Bangalore", "AMD": "Ahmedabad", "DEL": "Delhi", "BOM": "Mumbai", "GOI": "Goa",
+          "MAA": "Chennai", "HYD": "Hyderabad", "CCU": "Kolkata"}
+
+
+def upcoming_months(count, today=None):
+    # Months after the current one, so no date is in the past for the fast-path parser or the search
+    today = today or date.today()
+    months = []
+    for offset in range(1, count + 1):
+        year, month = divmod(today.month - 1 + offset, 12)
+        months.append(date(today.year + year, month + 1, 1).strftime("%B %Y"))
+    return months
+
+
+MONTHS = upcoming_months(3)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_load(fn, inputs, concurrency):
+    """
+    Call fn on every input from `concurrency` threads
+
+    Returns:
+        tuple: (latencies of successful calls in seconds, error count, wall time)
+    """
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            fn(item)
+        except Exception as exc:
+            print(f"  error: {exc!r}", file=sys.stderr)
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, inputs))
+    wall = time.perf_counter() - start
+    latencies = [latency for latency in results if latency is not None]
+    return latencies, len(results) - len(latencies), wall
+
+
+def summarize(scenario, latencies, errors, wall, replay, trace_memory):
+    ops = len(latencies) + errors
+    summary = {
+        "scenario": scenario,
+        "ops": ops,
+        "errors": errors,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "ops_per_sec": round(ops / wall, 3) if wall else None,
+        "upstream_fetches": replay.calls,
+        "upstream_errors": replay.errors,
+        # ru_maxrss is in KiB on Linux and is the peak of the whole process so far
+        "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if trace_memory:
+        summary["heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.reset_peak()
+    replay.calls = replay.errors = 0
+    return summary
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def search_inputs(iterations):
+    # Distinct (route, month) combinations first, so a cold run never hits the cache
+    return [(ROUTES[index % len(ROUTES)], MONTHS[index // len(ROUTES) % len(MONTHS)]) for index in range(iterations)]
+
+
+def bench_parallel(args):
+    def search(item):
+        (origin, destination), month = item
+        filters = FlightQueryData(from_airport=origin, to_airport=destination,
+                                  date_list=core.get_dates_for_month(month)).model_dump(mode='json')
+        return core.search_flights_parallel(filters)
+    return run_load(search, search_inputs(args.iterations), args.concurrency)
+
+
+def _query(item):
+    (origin, destination), month = item
+    return f"Flights from {CITIES[origin]} to {CITIES[destination]} in {month}"
+
+
+def _model_kwargs(args):
+    return {"latency_ms": args.llm_latency_ms, "ms_per_1k_chars": args.llm_ms_per_1k_chars}
+
+
+def bench_agent(args):
+    flight_agent = install_fake_model(main.FlightAgent(ranker=args.ranker), **_model_kwargs(args))
+    return run_load(lambda item: flight_agent.search_flights(_query(item)), search_inputs(args.iterations),
+                    args.concurrency)
+
+
+def bench_api(args):
+    from fastapi.testclient import TestClient
+    sys.path.insert(0, str(ROOT / "api"))
+    import app
+
+    install_fake_model(app.flight_agent, **_model_kwargs(args))
+    inputs = list(enumerate(search_inputs(args.iterations)))
+    with TestClient(app.app) as client:
+        def post(item):
+            search_id, query = item
+            response = client.post(f"/api/v1/searchFlights/{search_id}?wait=true", json={"user_query": _query(query)})
+            response.raise_for_status()
+        return run_load(post, inputs, args.concurrency)
+
+
+SCENARIOS = {"parallel": bench_parallel, "agent": bench_agent, "api": bench_api}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline flight search benchmarks")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=12, help="searches per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent searches")
+    parser.add_argument("--latency-ms", type=float, default=300, help="median injected upstream latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="fraction of failing upstream fetches")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="fixed latency per LLM call")
+    parser.add_argument("--llm-ms-per-1k-chars", type=float, default=2, help="extra LLM latency per 1k prompt chars")
+    parser.add_argument("--ranker", default=main.FLIGHT_RANKER, choices=["llm", "deterministic"])
+    parser.add_argument("--upstream-rate", type=float, default=None,
+                        help="override UPSTREAM_RATE_PER_SECOND (burst follows it)")
+    parser.add_argument("--warm", action="store_true", help="keep the flight and query caches enabled")
+    parser.add_argument("--no-fast-path", action="store_true", help="send every query to the (fake) LLM extractor")
+    parser.add_argument("--fixtures", default=str(FIXTURES_DIR))
+    parser.add_argument("--record", action="store_true", help="fetch live pages and save them as fixtures")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--trace-memory", action="store_true", help="also report the Python heap peak (slower)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    replay = ReplayFlights(args.fixtures, latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+                           error_rate=args.error_rate, seed=args.seed, record=args.record).install()
+    if not args.warm:
+        core.flight_cache = None
+        main.query_cache = None
+    if args.no_fast_path:
+        query_parser.QUERY_FAST_PATH_ENABLED = False
+    if args.upstream_rate is not None:
+        upstream_limiter.bucket.rate = upstream_limiter.bucket.capacity = args.upstream_rate
+    if args.trace_memory:
+        tracemalloc.start()
+
+    results = []
+    for name in (SCENARIOS if args.scenario == "all" else [args.scenario]):
+        print(f"Running {name}: {args.iterations} searches, concurrency {args.concurrency}", file=sys.stderr)
+        latencies, errors, wall = SCENARIOS[name](args)
+        results.append(summarize(name, latencies, errors, wall, replay, args.trace_memory))
+
+    columns = list(results[0])
+    print(" | ".join(columns))
+    for result in results:
+        print(" | ".join(str(result.get(column)) for column in columns))
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        Path(args.output).write_text(json.dumps({"config": config, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,63 @@
+"""
+Startup benchmark: how long a fresh worker process takes to import the API
+app (after which uvicorn accepts connections and /health answers) and to
+become ready (agents built, fast_flights loaded, /ready answers 200).
+
+    python -m benchmarks.startup --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {api!r})
+import app
+imported = time.perf_counter()
+app.warm_up()
+ready = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1000, "ready_ms": (ready - start) * 1000}}))
+"""
+
+
+def measure_once():
+    """
+    Time one cold start in a fresh interpreter
+
+    Returns:
+        dict: Milliseconds to import the app and to finish warm-up
+    """
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    output = subprocess.run([sys.executable, "-c", _CHILD.format(api=str(ROOT / "api"))], cwd=ROOT, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start time of the API worker")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    samples = [measure_once() for _ in range(args.repeat)]
+    results = {
+        metric: {"min_ms": round(min(values), 1), "median_ms": round(statistics.median(values), 1)}
+        for metric in ("import_ms", "ready_ms")
+        for values in [[sample[metric] for sample in samples]]
+    }
+    print("metric | min_ms | median_ms")
+    for metric, result in results.items():
+        print(f"{metric} | {result['min_ms']} | {result['median_ms']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps({"repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,35 +1,45 @@
-from agno.agent import Agent, RunResponse
-from agno.models.anthropic import Claude
-from agno.agent import Agent, RunResponse  # noqa
 from textwrap import dedent
 import json
 import os
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 from src.logger import get_default_logger
 from src.json_schema import InputResponse, FlightQueryData, FlightResponse
 
 # Setup logger
 logger = get_default_logger(__name__)
 
+# agno and the Anthropic SDK are imported when the first agent is built, not with this module
 
-current_date_str = datetime.now().strftime("%Y-%m-%d")
-logger.info(f"Initializing agno_agent with current date: {current_date_str}")
 
-load_dotenv()
+def _claude():
+    from agno.models.anthropic import Claude
 
-LLM_KEY = os.getenv("ANTHROPIC_API_KEY")
-if LLM_KEY:
-    logger.info("ANTHROPIC_API_KEY loaded successfully")
-else:
-    logger.warning("ANTHROPIC_API_KEY not found in environment variables")
+    if not os.getenv("ANTHROPIC_API_KEY"):
+        logger.warning("ANTHROPIC_API_KEY not found in environment variables")
+    return Claude(id="claude-3-5-sonnet-20240620")
+
+
+def _extractor_instructions(agent=None):
+    # Called by agno for every run, so long-lived workers always use today's date
+    current_date_str = datetime.now().strftime("%Y-%m-%d")
+    return dedent(f"""\
+        IMPORTANT: Always use today's date ({current_date_str}) as your reference point for all date calculations.
+        While filling up the dictionary:
+            - Keep the valid airport tags, if city does not have an airport, keep it None
+            - When the user accepts several airports (e.g. "any London airport", "Mumbai or Pune"), use metro codes or list the others in from_airports / to_airports
+            - Keep the date list in an increasing order.
+            - By default keep seat economy.
+            - Specify all the dates for a mentioned date range
+        """)
 
 
 def information_checker_agent():
+    from agno.agent import Agent
+
     logger.info("Creating information_checker_agent")
     information_checker_agent = Agent(
         agent_id="input-analyzer-agent",
-        model=Claude(id="claude-3-5-sonnet-20240620"),
+        model=_claude(),
         description=dedent("""\
             You're a flight analyze superviser who checks the user input. Check the user's input if that contains, information
             regarding source and destination cities, also check for valid month, date or date range if user has provided. If not,
@@ -52,39 +62,37 @@ def information_checker_agent():
     return information_checker_agent
 
 def user_query_extractor_agent():
+    from agno.agent import Agent
+
     # Agent that uses JSON mode
     logger.info("Creating user_query_extractor_agent")
     user_query_extractor = Agent(
-        model=Claude(id="claude-3-5-sonnet-20240620"),
+        model=_claude(),
         description=dedent("""\
             Hi, you are a flight data related query extractor.
              Your job is based on user's query, you need to fill up certain values in a dictionary.
             - If a user has given a date range such as from and to, then select all the dates between these two dates.
 
         """),
-        instructions=dedent("""\
-        IMPORTANT: Always use today's date ({current_date_str}) as your reference point for all date calculations.
-        While filling up the dictionary:
-            - Keep the valid airport tags, if city does not have an airport, keep it None
-            - Keep the date list in an increasing order.
-            - By default keep seat economy.
-            - Specify all the dates for a mentioned date range
-        """),
+        instructions=_extractor_instructions,
         response_model=FlightQueryData,
         use_json_mode=True,
         add_datetime_to_instructions=True,
     )
-    logger.info("user_query_extractor_agent created successfully with current date reference: {current_date_str}")
+    logger.info("user_query_extractor_agent created successfully")
     return user_query_extractor
 
 def init_flight_analyzer_agent():
+    from agno.agent import Agent
+
     # Agent that uses JSON mode
     logger.info("Creating flight_list_analyzer_agent")
     flight_list_analyzer_agent = Agent(
-        model=Claude(id="claude-3-5-sonnet-20240620"),
+        model=_claude(),
         description=dedent("""\
-            You are a flight data analyzer. Your task is to review a JSON list in `flight_info` 
-            containing multiple flights for multiple dates. Your goal is to identify the 
+            You are a flight data analyzer. Your task is to review the table in `flight_info`
+            (column names in `columns`, one array per flight in `rows`) containing multiple
+            flights for multiple dates. Your goal is to identify the 
             overall top 10 flight options based on a balanced consideration of:
 
             1. **Price** – Lower is better.
@@ -93,7 +101,6 @@ def init_flight_analyzer_agent():
             getting the highest preference unless the price difference is very large.
 
             Selection rules:
-            - Always prioritize flights marked `best=True` if they meet the above criteria.
             - When comparing similar prices, prefer shorter travel time and fewer stops.
             - If two flights are nearly identical, prefer earlier departure times.
             - The list must contain flights across all dates in the data, not just a single date.
@@ -101,9 +108,10 @@ def init_flight_analyzer_agent():
         """),
         instructions=dedent("""\
             Output must be valid JSON following the `FlightResponse` model.
-            For each selected flight, include all original data plus:
-                - `origin_airport` (same as `from_airport`)
-                - `destination_airport` (same as `to_airport`)
+            For each selected flight, include all original data (`name` is the `flight_vendor`,
+            `date` is the `Date`) plus:
+                - `origin_airport` (the flight's `from_airport` column if present, else `from_airport`)
+                - `destination_airport` (the flight's `to_airport` column if present, else `to_airport`)
             Do not include more than 10 flights in the final output.
             Ensure the list is sorted from best to least-best according to:
                 1. Price (lowest first)
@@ -120,6 +128,10 @@ def init_flight_analyzer_agent():
 
 
 if __name__ == "__main__":
+    from agno.agent import RunResponse
+    from dotenv import load_dotenv
+
+    load_dotenv()
     logger.info("Starting main execution of agno_agent")
     
     try:
@@ -134,8 +146,8 @@ if __name__ == "__main__":
         json_mode_response: RunResponse = query_extractor_agent.run("Find me best flight for june from Bangalore to ahmedabad, preffered is indigo and air asia")
         
         logger.info("Query extractor agent response received successfully")
-        logger.info(f"Extracted from_airport: {json_mode_response.content.from_airport}")
-        logger.info(f"Full response content: {json_mode_response.content}")
+        logger.info("Extracted from_airport: %s", json_mode_response.content.from_airport)
+        logger.debug("Full response content: %s", json_mode_response.content)
 
         # flight_list_analyzer_agent = init_flight_analyzer_agent()
         # json_mode_response: RunResponse = flight_list_analyzer_agent.run(data_str)
@@ -144,7 +156,7 @@ if __name__ == "__main__":
         logger.info("Main execution completed successfully")
         
     except Exception as e:
-        logger.error(f"Unexpected error during execution: {e}")
+        logger.error("Unexpected error during execution: %s", e)
         print(f"Unexpected error: {e}")
 
 # structured_output_response: RunResponse = structured_output_agent.run("New York")
@@ -0,0 +1,212 @@
+# Bundled city/airport table used by the rule-based query parser.
+# Keys are lowercase city names and common aliases, values are IATA codes.
+CITY_TO_IATA = {
+    # India
+    "agartala": "IXA",
+    "agra": "AGR",
+    "ahmedabad": "AMD",
+    "amritsar": "ATQ",
+    "aurangabad": "IXU",
+    "bagdogra": "IXB",
+    "bangalore": "BLR",
+    "bengaluru": "BLR",
+    "belgaum": "IXG",
+    "belagavi": "IXG",
+    "bhopal": "BHO",
+    "bhubaneswar": "BBI",
+    "bhuj": "BHJ",
+    "chandigarh": "IXC",
+    "chennai": "MAA",
+    "madras": "MAA",
+    "coimbatore": "CJB",
+    "dehradun": "DED",
+    "delhi": "DEL",
+    "new delhi": "DEL",
+    "dibrugarh": "DIB",
+    "goa": "GOI",
+    "gorakhpur": "GOP",
+    "guwahati": "GAU",
+    "gwalior": "GWL",
+    "hubli": "HBX",
+    "hyderabad": "HYD",
+    "imphal": "IMF",
+    "indore": "IDR",
+    "jaipur": "JAI",
+    "jammu": "IXJ",
+    "jodhpur": "JDH",
+    "kannur": "CNN",
+    "kochi": "COK",
+    "cochin": "COK",
+    "kolkata": "CCU",
+    "calcutta": "CCU",
+    "kozhikode": "CCJ",
+    "calicut": "CCJ",
+    "leh": "IXL",
+    "lucknow": "LKO",
+    "madurai": "IXM",
+    "mangalore": "IXE",
+    "mangaluru": "IXE",
+    "mumbai": "BOM",
+    "bombay": "BOM",
+    "mysore": "MYQ",
+    "mysuru": "MYQ",
+    "nagpur": "NAG",
+    "patna": "PAT",
+    "port blair": "IXZ",
+    "pune": "PNQ",
+    "raipur": "RPR",
+    "rajkot": "HSR",
+    "ranchi": "IXR",
+    "shillong": "SHL",
+    "srinagar": "SXR",
+    "surat": "STV",
+    "thiruvananthapuram": "TRV",
+    "trivandrum": "TRV",
+    "tiruchirappalli": "TRZ",
+    "trichy": "TRZ",
+    "tirupati": "TIR",
+    "udaipur": "UDR",
+    "vadodara": "BDQ",
+    "baroda": "BDQ",
+    "varanasi": "VNS",
+    "vijayawada": "VGA",
+    "visakhapatnam": "VTZ",
+    "vizag": "VTZ",
+    # International
+    "abu dhabi": "AUH",
+    "amsterdam": "AMS",
+    "bangkok": "BKK",
+    "barcelona": "BCN",
+    "beijing": "PEK",
+    "berlin": "BER",
+    "boston": "BOS",
+    "brussels": "BRU",
+    "chicago": "ORD",
+    "colombo": "CMB",
+    "copenhagen": "CPH",
+    "dallas": "DFW",
+    "denpasar": "DPS",
+    "bali": "DPS",
+    "dhaka": "DAC",
+    "doha": "DOH",
+    "dubai": "DXB",
+    "dublin": "DUB",
+    "frankfurt": "FRA",
+    "geneva": "GVA",
+    "hanoi": "HAN",
+    "ho chi minh city": "SGN",
+    "hong kong": "HKG",
+    "istanbul": "IST",
+    "jakarta": "CGK",
+    "jeddah": "JED",
+    "kathmandu": "KTM",
+    "kuala lumpur": "KUL",
+    "kuwait": "KWI",
+    "lisbon": "LIS",
+    "london": "LHR",
+    "los angeles": "LAX",
+    "madrid": "MAD",
+    "male": "MLE",
+    "manchester": "MAN",
+    "melbourne": "MEL",
+    "milan": "MXP",
+    "munich": "MUC",
+    "muscat": "MCT",
+    "new york": "JFK",
+    "osaka": "KIX",
+    "paris": "CDG",
+    "phuket": "HKT",
+    "prague": "PRG",
+    "riyadh": "RUH",
+    "rome": "FCO",
+    "san francisco": "SFO",
+    "seattle": "SEA",
+    "seoul": "ICN",
+    "shanghai": "PVG",
+    "sharjah": "SHJ",
+    "singapore": "SIN",
+    "sydney": "SYD",
+    "tokyo": "HND",
+    "toronto": "YYZ",
+    "vancouver": "YVR",
+    "vienna": "VIE",
+    "washington": "IAD",
+    "zurich": "ZRH",
+}
+
+# Every IATA code known to the table, for queries that use codes directly
+KNOWN_IATA_CODES = frozenset(CITY_TO_IATA.values())
+
+# IATA metropolitan area codes mapped to the airports they cover
+METRO_AIRPORTS = {
+    "BJS": ["PEK", "PKX"],
+    "CHI": ["ORD", "MDW"],
+    "JKT": ["CGK", "HLP"],
+    "LON": ["LHR", "LGW", "STN", "LTN", "LCY", "SEN"],
+    "MIL": ["MXP", "LIN", "BGY"],
+    "NYC": ["JFK", "EWR", "LGA"],
+    "OSA": ["KIX", "ITM"],
+    "PAR": ["CDG", "ORY"],
+    "ROM": ["FCO", "CIA"],
+    "SEL": ["ICN", "GMP"],
+    "TYO": ["HND", "NRT"],
+    "WAS": ["IAD", "DCA", "BWI"],
+}
+
+
+def expand_airports(codes):
+    """
+    Airport codes with metro codes replaced by their airports, upper-cased,
+    in the given order without repeats
+
+    Args:
+        codes (list): IATA airport or metro codes
+
+    Returns:
+        list: IATA airport codes
+    """
+    airports = []
+    for code in codes:
+        code = str(code).strip().upper()
+        if code:
+            airports.extend(METRO_AIRPORTS.get(code, [code]))
+    return list(dict.fromkeys(airports))
+
+
+# Cities of CITY_TO_IATA with a metro code, used when a query accepts any of their airports
+CITY_TO_METRO = {
+    "beijing": "BJS",
+    "chicago": "CHI",
+    "jakarta": "JKT",
+    "london": "LON",
+    "milan": "MIL",
+    "new york": "NYC",
+    "osaka": "OSA",
+    "paris": "PAR",
+    "rome": "ROM",
+    "seoul": "SEL",
+    "tokyo": "TYO",
+    "washington": "WAS",
+}
+
+# Lowercase airline names and aliases mapped to the names Google Flights displays
+AIRLINE_ALIASES = {
+    "indigo": "IndiGo",
+    "air india express": "Air India Express",
+    "air india": "Air India",
+    "akasa air": "Akasa Air",
+    "akasa": "Akasa Air",
+    "spicejet": "SpiceJet",
+    "spice jet": "SpiceJet",
+    "vistara": "Vistara",
+    "airasia": "AirAsia",
+    "air asia": "AirAsia",
+    "alliance air": "Alliance Air",
+    "star air": "Star Air",
+    "emirates": "Emirates",
+    "qatar airways": "Qatar Airways",
+    "etihad": "Etihad",
+    "lufthansa": "Lufthansa",
+    "british airways": "British Airways",
+    "singapore airlines": "Singapore Airlines",
+}
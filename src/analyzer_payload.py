@@ -0,0 +1,152 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from src.flight_table import parse_price, parse_duration
+from src.logger import get_default_logger
+from src.metrics import analyzer_tokens
+from src.ranker import parsed_number, score_flights
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Analyzer payload configuration
+# Estimated prompt tokens for the flights table; 0 sends every candidate left after pruning
+ANALYZER_TOKEN_BUDGET = int(os.getenv("ANALYZER_TOKEN_BUDGET", "4000"))
+# Flights kept per date (or round-trip date pair), best scores first
+ANALYZER_PER_DATE_TOP_K = int(os.getenv("ANALYZER_PER_DATE_TOP_K", "5"))
+# Number of flights the analyzer returns; anything dominated by this many flights cannot make the list
+ANALYZER_TOP_N = 10
+
+# Column order of the flights table sent to the analyzer
+COLUMNS = ["date", "return_date", "name", "departure", "arrival", "arrival_time_ahead", "duration", "stops", "price"]
+# Left out when no flight has one, i.e. for one-way searches
+OPTIONAL_COLUMNS = {"return_date"}
+# Appended when the flights of a multi-airport search differ in route
+ROUTE_COLUMNS = ["from_airport", "to_airport"]
+# Filters the analyzer needs; the date lists can be hundreds of entries long
+USER_INPUT_KEYS = ["from_airport", "to_airport", "from_airports", "to_airports", "adults", "children", "infants_in_seat", "infants_on_lap",
+                   "trip_type", "seat", "specific_flight_provider", "flight_time_type", "max_stops", "price_type"]
+
+# Rough tokens per character of compact JSON, avoids shipping a tokenizer
+CHARS_PER_TOKEN = 4
+# Flights serialized in full to estimate what the plain JSON payload would have cost
+ORIGINAL_SIZE_SAMPLE = 20
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _dominated_counts(price, duration, stops):
+    # How many other flights are at least as good on price, duration and stops and better on one
+    no_worse = ((price[None, :] <= price[:, None]) & (duration[None, :] <= duration[:, None])
+                & (stops[None, :] <= stops[:, None]))
+    better = ((price[None, :] < price[:, None]) | (duration[None, :] < duration[:, None])
+              | (stops[None, :] < stops[:, None]))
+    return (no_worse & better).sum(axis=1)
+
+
+def select_candidates(flights, per_date_top_k=ANALYZER_PER_DATE_TOP_K, top_n=ANALYZER_TOP_N):
+    """
+    Flights that could make the analyzer's top `top_n`: the best `per_date_top_k`
+    by score of each date (and route), minus any flight dominated by `top_n` or more others
+
+    Returns:
+        list: Candidate flights, best score first
+    """
+    flights = [flight for flight in flights if isinstance(flight['stops'], int)]
+    if not flights:
+        return []
+    count = len(flights)
+    price = np.fromiter((parsed_number(flight, 'price_value', 'price', parse_price) for flight in flights),
+                        dtype=float, count=count)
+    duration = np.fromiter((parsed_number(flight, 'duration_minutes', 'duration', parse_duration) for flight in flights),
+                           dtype=float, count=count)
+    stops = np.fromiter((flight['stops'] for flight in flights), dtype=float, count=count)
+    score = score_flights(price, duration, stops)
+
+    kept = []
+    taken = {}
+    for index in np.argsort(score, kind="stable"):
+        leg = (flights[index]['date'], flights[index].get('return_date'),
+               flights[index].get('from_airport'), flights[index].get('to_airport'))
+        if taken.get(leg, 0) < per_date_top_k:
+            taken[leg] = taken.get(leg, 0) + 1
+            kept.append(index)
+    kept = np.array(kept)
+
+    # Missing numbers compare as worst so they never dominate anything
+    price, duration, stops = (np.nan_to_num(values[kept], nan=np.inf) for values in (price, duration, stops))
+    kept = kept[_dominated_counts(price, duration, stops) < top_n]
+    return [flights[index] for index in kept]
+
+
+def build_analyzer_payload(all_flights_results, token_budget=ANALYZER_TOKEN_BUDGET,
+                           per_date_top_k=ANALYZER_PER_DATE_TOP_K, top_n=ANALYZER_TOP_N):
+    """
+    Compact analyzer prompt: the candidate flights as a table (column names
+    once, one array per flight), cut to `token_budget` estimated tokens
+    (never below `top_n` flights), plus the relevant filters
+
+    Args:
+        all_flights_results (dict): Search result with 'flight_info' and 'user_inputs'
+
+    Returns:
+        tuple: (payload JSON string, stats dict with flight counts and token estimates)
+    """
+    flights = all_flights_results["flight_info"]
+    user_inputs = {key: all_flights_results["user_inputs"].get(key) for key in USER_INPUT_KEYS}
+    candidates = select_candidates(flights, per_date_top_k, top_n)
+    columns = [column for column in COLUMNS
+               if column not in OPTIONAL_COLUMNS or any(flight.get(column) is not None for flight in candidates)]
+    if any('from_airport' in flight for flight in candidates):
+        columns += ROUTE_COLUMNS
+
+    prefix = f'{{"user_inputs":{_dumps(user_inputs)},"flight_info":{{"columns":{_dumps(columns)},"rows":['
+    suffix = "]}}"
+    rows = []
+    used = len(prefix) + len(suffix)
+    for flight in candidates:
+        row = _dumps([flight.get(column) for column in columns])
+        if token_budget > 0 and len(rows) >= top_n and (used + len(row) + 1) / CHARS_PER_TOKEN > token_budget:
+            break
+        rows.append(row)
+        used += len(row) + 1
+    payload = prefix + ",".join(rows) + suffix
+
+    # What the analyzer used to receive, every flight and all filters as plain JSON,
+    # estimated from a sample of flights rather than serializing all of them
+    sample = flights[:ORIGINAL_SIZE_SAMPLE]
+    flight_chars = sum(len(json.dumps(flight)) + 2 for flight in sample) / len(sample) if sample else 0
+    original_tokens = math.ceil((flight_chars * len(flights) + len(json.dumps(all_flights_results["user_inputs"])))
+                                / CHARS_PER_TOKEN)
+    tokens = estimate_tokens(payload)
+    stats = {
+        "flights": len(flights),
+        "candidates": len(candidates),
+        "flights_sent": len(rows),
+        "tokens": tokens,
+        "tokens_saved": max(0, original_tokens - tokens),
+    }
+    analyzer_tokens.inc(tokens, "sent")
+    analyzer_tokens.inc(stats["tokens_saved"], "saved")
+    logger.info("Analyzer payload: %d of %d flights, ~%d tokens (~%d saved)",
+                len(rows), len(flights), tokens, stats["tokens_saved"])
+    return payload, stats
+
+
+def expand_analyzer_payload(payload):
+    """
+    Inverse of build_analyzer_payload: the payload with 'flight_info' as a list of dicts
+    """
+    data = json.loads(payload)
+    table = data["flight_info"]
+    data["flight_info"] = [dict(zip(table["columns"], row)) for row in table["rows"]]
+    return data
@@ -0,0 +1,334 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from src import flight_table
+from src.json_schema import FlightQueryData
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Cache configuration
+FLIGHT_CACHE_BACKEND = os.getenv("FLIGHT_CACHE_BACKEND", "memory").lower()
+FLIGHT_CACHE_TTL_SECONDS = float(os.getenv("FLIGHT_CACHE_TTL_SECONDS", "900"))
+FLIGHT_CACHE_MAX_ENTRIES = int(os.getenv("FLIGHT_CACHE_MAX_ENTRIES", "2048"))
+FLIGHT_CACHE_PATH = os.getenv("FLIGHT_CACHE_PATH", os.path.join(".cache", "flights.sqlite3"))
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "4096"))
+
+_QUERY_PUNCTUATION_RE = re.compile(r"[^\w\s-]")
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU store. Values are kept as-is, so callers must treat
+    cached objects as read-only.
+    """
+
+    def __init__(self, max_entries=FLIGHT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def peek_expiry(self, key):
+        # Expiry of an entry without touching the LRU order
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk LRU store that survives restarts. Values must be JSON serializable;
+    FlightTable values are supported through src.flight_table.dumps/loads.
+    """
+
+    def __init__(self, path=FLIGHT_CACHE_PATH, max_entries=FLIGHT_CACHE_MAX_ENTRIES,
+                 dumps=flight_table.dumps, loads=flight_table.loads):
+        self.path = path
+        self.max_entries = max_entries
+        self._dumps = dumps
+        self._loads = loads
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+        self._conn.commit()
+        logger.info("SQLite cache backend opened at %s", path)
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return row[1], self._loads(row[0])
+
+    def peek_expiry(self, key):
+        # Expiry of an entry without loading its value or writing its access time
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key, value, expires_at):
+        payload = self._dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, time.time()),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            evicted = max(0, count - self.max_entries)
+            if evicted:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+                    (evicted,),
+                )
+            self._conn.commit()
+        return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class TTLCache:
+    """
+    Expiring cache on top of a pluggable backend with hit/miss counters.
+
+    Args:
+        backend: Storage backend (MemoryCacheBackend or SQLiteCacheBackend)
+        ttl (float): Default time-to-live of an entry in seconds
+    """
+
+    def __init__(self, backend, ttl=FLIGHT_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        entry = self.backend.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                with self._stats_lock:
+                    self.hits += 1
+                return value
+            self.backend.delete(key)
+            with self._stats_lock:
+                self.expirations += 1
+        with self._stats_lock:
+            self.misses += 1
+        return default
+
+    def expires_in(self, key) -> Optional[float]:
+        """
+        Seconds until the entry expires, None when it is missing or expired.
+        Not counted as a lookup in the stats and read-only: the LRU order is
+        kept and the sqlite backend neither writes nor loads the value.
+        """
+        expires_at = self.backend.peek_expiry(key)
+        if expires_at is None:
+            return None
+        remaining = expires_at - time.time()
+        return remaining if remaining > 0 else None
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        evicted = self.backend.set(key, value, expires_at)
+        if evicted:
+            with self._stats_lock:
+                self.evictions += evicted
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "entries": len(self.backend),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def make_flight_cache_key(date_params, date, return_date=None) -> str:
+    """
+    Build a normalized cache key for a single-date flight fetch
+
+    Args:
+        date_params (dict): User filters as passed to process_date
+        date (str): Travel date in 'yyyy-mm-dd' format
+        return_date (str): Return date of a round-trip fetch, None for one-way
+
+    Returns:
+        str: Stable key for the (route, date, passengers, seat, max_stops) tuple
+    """
+    trip_type = date_params.get('trip_type') or 'one-way'
+    if not isinstance(trip_type, str):
+        trip_type = ''.join(trip_type)
+    return "|".join(str(part) for part in (
+        str(date_params['from_airport']).strip().upper(),
+        str(date_params['to_airport']).strip().upper(),
+        str(date),
+        int(date_params.get('adults') or 0),
+        int(date_params.get('children') or 0),
+        int(date_params.get('infants_in_seat') or 0),
+        int(date_params.get('infants_on_lap') or 0),
+        trip_type.strip().lower(),
+        str(date_params.get('seat') or 'economy').strip().lower(),
+        date_params.get('max_stops'),
+    ) + ((str(return_date),) if return_date is not None else ()))
+
+
+def create_flight_cache(backend=FLIGHT_CACHE_BACKEND, ttl=FLIGHT_CACHE_TTL_SECONDS,
+                        max_entries=FLIGHT_CACHE_MAX_ENTRIES, path=FLIGHT_CACHE_PATH) -> Optional[TTLCache]:
+    """
+    Create the per-date flight result cache
+
+    Args:
+        backend (str): 'memory', 'sqlite' or 'none' (default: FLIGHT_CACHE_BACKEND)
+        ttl (float): Time-to-live of an entry in seconds
+        max_entries (int): Maximum number of entries kept before LRU eviction
+        path (str): Database file for the sqlite backend
+
+    Returns:
+        TTLCache or None: Configured cache, None when caching is disabled
+    """
+    if backend == "none":
+        logger.info("Flight result cache disabled")
+        return None
+    if backend == "sqlite":
+        store = SQLiteCacheBackend(path=path, max_entries=max_entries)
+    else:
+        store = MemoryCacheBackend(max_entries=max_entries)
+    logger.info("Flight result cache: backend=%s, ttl=%ss, max_entries=%d", backend, ttl, max_entries)
+    return TTLCache(store, ttl=ttl)
+
+
+# Process-wide cache for per-date fetches
+flight_cache = create_flight_cache()
+
+
+def normalize_query(user_query) -> str:
+    """
+    Normalize query text for cache lookups: case, punctuation and whitespace are ignored
+    """
+    return " ".join(_QUERY_PUNCTUATION_RE.sub(" ", user_query.lower()).split())
+
+
+class QueryCache:
+    """
+    Memoizes extracted FlightQueryData per normalized query text and reference
+    date. Relative dates depend on "today", so entries never outlive midnight.
+    """
+
+    def __init__(self, ttl=QUERY_CACHE_TTL_SECONDS, max_entries=QUERY_CACHE_MAX_ENTRIES):
+        self._cache = TTLCache(MemoryCacheBackend(max_entries=max_entries), ttl=ttl)
+        self._lock = threading.Lock()
+        self._reference_date = date.today()
+
+    def _current_date(self):
+        today = date.today()
+        with self._lock:
+            if today != self._reference_date:
+                logger.info("Date changed to %s, invalidating query cache", today)
+                self._cache.clear()
+                self._reference_date = today
+        return today
+
+    def get(self, user_query) -> Optional[FlightQueryData]:
+        today = self._current_date()
+        cached = self._cache.get(f"{today.isoformat()}|{normalize_query(user_query)}")
+        if cached is None:
+            return None
+        return FlightQueryData(**cached)
+
+    def set(self, user_query, query_data: FlightQueryData):
+        today = self._current_date()
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        ttl = min(self._cache.ttl, (midnight - now).total_seconds())
+        self._cache.set(f"{today.isoformat()}|{normalize_query(user_query)}",
+                        query_data.model_dump(mode='json'), ttl=ttl)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+# Process-wide cache of LLM query extractions
+query_cache = QueryCache() if QUERY_CACHE_ENABLED else None
@@ -0,0 +1,124 @@
+import threading
+from concurrent.futures import Future
+
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+
+class _SharedCall:
+    """
+    One in-flight call and the callers waiting for it. Passed to the
+    function as its `cancelled` event, which is only set once every caller
+    was cancelled, and its `started` callback, which tells every caller.
+    """
+
+    def __init__(self):
+        self.future = Future()
+        self._lock = threading.Lock()
+        self._cancel_events = []
+        self._started_callbacks = []
+        self._started = False
+        self._abandoned = False
+
+    def join(self, cancelled=None, started=None):
+        """
+        Add a caller, unless every caller so far was cancelled
+
+        Returns:
+            bool: Whether the caller was added
+        """
+        with self._lock:
+            if self._abandoned:
+                return False
+            self._cancel_events.append(cancelled)
+            if started is None or not self._started:
+                if started is not None:
+                    self._started_callbacks.append(started)
+                return True
+        # Joined a call that already reached upstream, its timeout runs from now
+        started()
+        return True
+
+    def is_set(self):
+        with self._lock:
+            if not self._abandoned:
+                self._abandoned = all(event is not None and event.is_set() for event in self._cancel_events)
+            return self._abandoned
+
+    def __call__(self):
+        with self._lock:
+            self._started = True
+            callbacks, self._started_callbacks = self._started_callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, callers arriving while it is in flight wait for and receive
+    the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn, *args, cancelled=None, started=None, **kwargs):
+        """
+        Run fn(*args, cancelled=..., started=..., **kwargs) once per in-flight key.
+        fn gets the shared call's own `cancelled` event, set once every waiting
+        caller's `cancelled` is, and `started` callback, which calls every
+        waiting caller's `started`; a caller joining after it was called gets
+        its `started` called when it joins.
+
+        Args:
+            key: Hashable identity of the call
+            fn: Function to run when no identical call is in flight
+            cancelled (threading.Event): Set when this caller no longer needs the result
+            started (callable): Called when the shared call reaches its slow part
+
+        Returns:
+            Result of the shared call
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is not None and call.join(cancelled, started):
+                self.followers += 1
+                leader = False
+            else:
+                # Nothing in flight, or only a call that all its callers gave up on
+                call = _SharedCall()
+                call.join(cancelled, started)
+                self._in_flight[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            logger.debug("Joining in-flight call for key: %s", key)
+            return call.future.result()
+
+        try:
+            result = fn(*args, cancelled=call, started=call, **kwargs)
+        except BaseException as exc:
+            call.future.set_exception(exc)
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._in_flight),
+                "leaders": self.leaders,
+                "coalesced": self.followers,
+            }
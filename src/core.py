@@ -1,20 +1,44 @@
+import asyncio
+import os
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
+import uuid
 from typing import List, Dict, Any, Optional
 
-from fast_flights import create_filter, get_flights_from_filter, FlightData, Passengers
-from src.json_schema import FlightJSON, Result
+from src.fetcher import build_filter, fetch_page
+from src.flight_table import UNKNOWN_STOPS
 from src.logger import get_default_logger
-import uuid
+from src.metrics import date_duration, observe, stage_duration, upstream_duration
+from src.parse_pool import parse_page, parse_pool
+from src.pareto import ParetoFrontier
+from src.ranker import top_flights
+from src.cache import flight_cache, make_flight_cache_key
+from src.fare_index import fare_index
+from src.coalesce import SingleFlight
+from src.ratelimit import FetchCancelled, upstream_limiter
+from src.retry import fetch_latency, fetch_with_retries, start_signal
+from src.scheduler import fetch_scheduler, INTERACTIVE
 from datetime import datetime, timedelta
 import calendar
 
 # Setup logger
 logger = get_default_logger(__name__)
 
+# Coalesces concurrent upstream fetches of the same normalized filter
+date_fetches = SingleFlight()
+
+# Wall-clock budget for one search (fetches + ranking); partial results are returned past it
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "90"))
+# How often a synchronous search checks its cancel event
+CANCEL_POLL_SECONDS = 0.25
+
+
+class SearchCancelled(Exception):
+    """Raised when a search is cancelled before it finishes"""
+
+
 def get_dates_for_month(month_year: str):
     date_obj = datetime.strptime(month_year, "%B %Y")
     year = date_obj.year
@@ -26,130 +50,289 @@ def get_dates_for_month(month_year: str):
     return [f"{year}-{month:02d}-{day:02d}" for day in range(1, num_days + 1)]
 
 # Function to process a single date (to be run in parallel)
-def process_date(date_params, date):
+def process_date(date_params, date, return_date=None, started=None, cancelled=None):
     each_date = date
-    from_airport = date_params['from_airport']
-    to_airport = date_params['to_airport']
-    adults = date_params['adults']
-    children = date_params['children']
-    infants_in_seat = date_params['infants_in_seat']
-    infants_on_lap = date_params['infants_on_lap']
-    trip_type = ''.join(date_params['trip_type']),
-    seat = date_params['seat']
-    max_stops = date_params['max_stops']
-    logger.info(f"Processing date: {each_date}")
-
-    filter = None
-    logger.debug(f"Trip type: {trip_type}, Date: {each_date}")
-    if trip_type[0] == 'one-way':  
-        filter = create_filter(
-            flight_data=[
-                FlightData(
-                    date=str(each_date),
-                    from_airport=from_airport,
-                    to_airport=to_airport,
-                )
-            ],
-            trip="one-way",
-            passengers=Passengers(adults=adults, children=children, infants_in_seat=infants_in_seat, 
-                                infants_on_lap=infants_on_lap),
-            seat=seat,
-            max_stops=max_stops,
-        )
-    
-    result_data = get_flights_from_filter(filter, mode="common", currency="inr")
-    
-    flights = [
-        FlightJSON(
-            flight.is_best, flight.name, flight.departure, flight.arrival, 
-            flight.arrival_time_ahead, flight.duration, flight.stops, 
-            flight.delay, flight.price
-        )
-        for flight in result_data.flights
-    ]
-    
-    flight_json = Result(result_data.current_price, flights).to_dict()
-    
-    # Return both the date and the flight info for later processing
-    return {
+    logger.debug("Processing date: %s returning %s", each_date, return_date)
+
+    start = time.perf_counter()
+    cache_key = make_flight_cache_key(date_params, each_date, return_date)
+    if flight_cache is not None:
+        cached_result = flight_cache.get(cache_key)
+        if cached_result is not None:
+            logger.debug("Cache hit for date: %s", each_date)
+            observe(date_duration, time.perf_counter() - start, "cache")
+            return cached_result
+
+    # Identical fetches already in flight from other searches are shared; the shared
+    # fetch is only dropped once every search waiting for it was cancelled
+    result = date_fetches.do(cache_key, fetch_date, date_params, each_date, cache_key, return_date,
+                             started=started, cancelled=cancelled)
+    observe(date_duration, time.perf_counter() - start, "upstream")
+    return result
+
+# Fetch a single date (or round-trip date pair) from upstream and cache the result
+def fetch_date(date_params, each_date, cache_key, return_date=None, refresh=False, started=None, cancelled=None):
+    # `cancelled` is set when every search waiting for this fetch gave up; it is then dropped
+    # while still queued or waiting for the limiter
+    if cancelled is not None and cancelled.is_set():
+        raise FetchCancelled("Search was cancelled before the fetch started")
+    if flight_cache is not None and not refresh:
+        # A fetch that finished just before this one started was not coalesced with it
+        cached_result = flight_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+    filter = build_filter(date_params, each_date, return_date)
+    # Every upstream request goes through the process-wide rate/concurrency limiter
+    # Only the network fetch holds the upstream slot, so parse errors (e.g. a date
+    # without flights) are not counted as upstream errors by the limiter
+    with upstream_limiter.slot(cancelled):
+        # The caller's timeout runs from here, not from when the fetch was queued
+        if started is not None:
+            started()
+        start = time.monotonic()
+        page = fetch_page(filter, currency="inr")
+        latency = time.monotonic() - start
+    fetch_latency.record(latency)
+    observe(upstream_duration, latency)
+    # Parse prices, durations and stops once into a columnar table, in the process pool if enabled
+    if parse_pool is not None:
+        flights, current_price = parse_pool.parse(page)
+    else:
+        flights, current_price = parse_page(page)
+
+    # Return both the date and the flight table for later processing
+    result = {
         "date": each_date,
-        "flight_info": flight_json,
-        "price": result_data.current_price
+        "flights": flights,
+        "price": current_price
+    }
+    if return_date is not None:
+        result["return_date"] = return_date
+    else:
+        # Every one-way fetch keeps the price calendar current
+        fare_index.record(date_params, each_date, flights, current_price)
+    if flight_cache is not None:
+        flight_cache.set(cache_key, result)
+    return result
+
+# Create the search-wide state shared by select_best_flights calls
+def new_search_state(user_filters):
+    return {
+        # Content-derived keys of every flight already added
+        "all_added_flight_ids": set(),
+        # Empty set means no provider restriction
+        "specific_flight_provider": {name.lower() for name in user_filters['specific_flight_provider']},
+        # Non-dominated flights so far, for ranked partial answers
+        "frontier": ParetoFrontier(),
     }
 
-# Main function using ThreadPoolExecutor for parallel processing
-def search_flights_parallel(user_filters, max_workers=10):
-    logger.info(f"Starting parallel flight search with {max_workers} workers")
-    logger.info(f"Search parameters: {user_filters}")
+def top_flight_ids(state, k=10):
+    return [flight["id"] for flight in top_flights(state['frontier'], k)]
+
+# Select the best flights of one date result, updating the search-wide state
+def select_best_flights(user_filters, result, state):
+    date = result["date"]
+    flights = result["flights"]
+    return_date = result.get("return_date")
+    # Round-trip fares are distinct per date pair
+    key_date = date if return_date is None else f"{date}/{return_date}"
+    extra = {} if return_date is None else {"return_date": return_date}
+    logger.debug("Processing result for date: %s", key_date)
+
+    added_flights = []
+    providers = state['specific_flight_provider']
+    added_ids = state['all_added_flight_ids']
+    # Rows are only materialized as dicts for the flights that get selected
+    for index in range(len(flights)):
+        stops = flights.stops[index]
+        if (flights.is_best[index]
+            and (not providers or flights.name[index].lower() in providers)
+            and stops != UNKNOWN_STOPS
+            and stops <= user_filters['max_stops']):
+                flight_id = flights.key(index, key_date)
+                if flight_id in added_ids:
+                    logger.debug("Skipping duplicate flight: %s for date %s", flight_id, key_date)
+                    continue
+                each_flight = flights.row(index, date=date, id=flight_id, **extra)
+                added_flights.append(each_flight)
+                added_ids.add(flight_id)
+                state['frontier'].add(each_flight)
+                logger.debug("Added best flight: %s for date %s", flight_id, key_date)
+    return added_flights
+
+# Async generator yielding each date's selected flights in completion order
+async def stream_flights_async(user_filters, max_concurrency=10, request_id=None, priority=INTERACTIVE,
+                               deadline=None, cancel_event=None, date_pairs=None, semaphore=None):
+    """
+    Fetch all dates and yield one event per date as soon as it completes,
+    followed by a final 'complete' event with the aggregated result.
+    Fetches are queued on the shared fair scheduler under `request_id`
+    (one per search by default) with the given priority class.
+    With `date_pairs`, the given (outbound, return) round-trip pairs are
+    fetched instead of `date_list`, and events carry a 'return_date'.
+    Streams of one search that pass the same `semaphore` share its
+    concurrency limit instead of `max_concurrency` each.
+
+    When `deadline` (a time.monotonic() value) passes, queued fetches are
+    dropped, running ones abandoned, the missing dates are reported with
+    status 'deadline_exceeded' and the partial result is completed.
+    Cancelling the consuming task (e.g. on client disconnect) stops the
+    search the same way; synchronous callers set `cancel_event` instead.
+
+    Raises:
+        SchedulerOverloaded: When the fetch queue has no room for this search
+        SearchCancelled: When `cancel_event` is set
+
+    Yields:
+        dict: {'event': 'date', 'date', 'flights', 'status', 'attempts', 'hedged', ...} per date,
+              then {'event': 'complete', 'flight_info', 'user_inputs', 'date_status', 'deadline_exceeded'}
+    """
+    logger.info("Starting async flight search with concurrency %d", max_concurrency)
+    logger.debug("Search parameters: %s", user_filters)
     
     # Get all dates for the month
-    date_list = user_filters['date_list']
-    logger.info(f"Processing {len(date_list)} dates: {date_list}")
+    # Drop repeated dates so each one is fetched once
+    if date_pairs is None:
+        legs = [(date, None) for date in dict.fromkeys(user_filters['date_list'])]
+    else:
+        legs = list(dict.fromkeys(tuple(pair) for pair in date_pairs))
+    logger.info("Processing %d dates from %s to %s", len(legs), legs[0][0] if legs else None, legs[-1][0] if legs else None)
     
     all_date_flight_info = []
-    all_added_flight_ids = []
-    specific_flight_provider = []
-    min_price = float('inf')
-    max_price = 0
-    
-    # Create a lock for thread-safe operations
-    price_lock = threading.Lock()
-    results_lock = threading.Lock()
+    state = new_search_state(user_filters)
     
-    # Use ThreadPoolExecutor to manage threads
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        logger.info(f"Submitting {len(date_list)} tasks to thread pool")
-        # Submit all tasks and get future objects
-        future_to_date = {executor.submit(process_date, user_filters, date): date for date in date_list}
-        
+    request_id = request_id or uuid.uuid4().hex
+    fetch_scheduler.admit(len(legs), priority)
+    semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+    # Set when the search ends, so fetch threads still waiting on the limiter send nothing
+    cancelled = threading.Event()
+
+    date_status = {}
+
+    def leg_fields(leg):
+        date, return_date = leg
+        return {"date": date} if return_date is None else {"date": date, "return_date": return_date}
+
+    async def fetch_one(leg):
+        date, return_date = leg
+        async with semaphore:
+            cache_key = make_flight_cache_key(user_filters, date, return_date)
+            # The first attempt goes through process_date (cache + coalescing); retries
+            # and hedges call fetch_date so they really send a new upstream request
+            result, status = await fetch_with_retries(
+                lambda started: asyncio.wrap_future(fetch_scheduler.submit(
+                    process_date, user_filters, date, return_date, started=start_signal(started),
+                    cancelled=cancelled, request_id=request_id, priority=priority)),
+                lambda started: asyncio.wrap_future(fetch_scheduler.submit(
+                    fetch_date, user_filters, date, cache_key, return_date, started=start_signal(started),
+                    cancelled=cancelled, request_id=request_id, priority=priority)),
+                label=date if return_date is None else f"{date}/{return_date}",
+            )
+            return leg, result, status
+
+    logger.debug("Submitting %d tasks to shared fetch scheduler", len(legs))
+    tasks = {asyncio.ensure_future(fetch_one(leg)): leg for leg in legs}
+    pending = set(tasks)
+    deadline_exceeded = False
+    aggregate_seconds = 0.0
+    # Flights fetched across all dates, before selection and de-duplication
+    fetched_rows = 0
+    try:
         # Process results as they complete
-        for future in future_to_date:
-            try:
-                result = future.result()
-                date = result["date"]
-                flight_info = result["flight_info"]
-                price_status = result["price"]
-                logger.debug(f"Processing result for date: {date}")
-                
-                # Thread-safe operations for shared resources
-                with results_lock:
-                    for each_flight in flight_info['flights']:
-                        each_flight['date'] = date
-                        each_flight['id'] = str(uuid.uuid4())
-                        if len(user_filters['specific_flight_provider']) < 1:
-                            if each_flight['name'].lower() not in specific_flight_provider:
-                                specific_flight_provider.append(each_flight['name'].lower())
-                        else: 
-                            specific_flight_provider = user_filters['specific_flight_provider']
-
-                        logger.debug(f"Flight provider: {specific_flight_provider}")
-                        if (each_flight['is_best'] == True  
-                            and each_flight['name'].lower() in specific_flight_provider  #
-                            and each_flight['stops'] <= user_filters['max_stops'] 
-                            and each_flight['id'] not in all_added_flight_ids):
-                                all_date_flight_info.append(each_flight)
-                                all_added_flight_ids.append(each_flight['id'])
-                                logger.info(f"Added best flight: {each_flight['id']} for date {date}")
-                        # if each_flight['name'].lower() in user_filters['specific_flight_provider'] and each_flight['id'] not in all_added_flight_ids:
-                        #     all_date_flight_info.append(each_flight)
-                        #     all_added_flight_ids.append(each_flight['id'])
-                        #     logger.info(f"Added specific flight: {each_flight['id']}")
-                        # Add condition only if we're looking out for non-best with other filters
-
-                
-            except Exception as exc:
-                logger.error(f"Date {future_to_date[future]} generated an exception ")
+        while pending:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if cancel_event is not None:
+                timeout = CANCEL_POLL_SECONDS if timeout is None else min(timeout, CANCEL_POLL_SECONDS)
+            if timeout is not None and timeout <= 0:
+                done = set()
+            else:
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                raise SearchCancelled(f"Search cancelled with {len(pending)} dates pending")
+            if not done and deadline is not None and time.monotonic() >= deadline:
+                deadline_exceeded = True
+                logger.warning("Search deadline passed with %d dates pending", len(pending))
+                for task in sorted(pending, key=tasks.get):
+                    task.cancel()
+                    status = {"status": "deadline_exceeded", "attempts": 0, "hedged": False,
+                              "latency_seconds": None, "error": "search deadline exceeded"}
+                    date_status[tasks[task]] = status
+                    yield {"event": "date", **leg_fields(tasks[task]), "flights": [], **status}
+                break
+
+            for task in done:
+                leg, result, status = task.result()
+                date_status[leg] = status
+                if result is None:
+                    logger.error("Date %s failed after %d attempts: %s", leg, status['attempts'], status['error'])
+                    yield {"event": "date", **leg_fields(leg), "flights": [], **status}
+                    continue
+                aggregate_start = time.perf_counter()
+                fetched_rows += len(result["flights"])
+                try:
+                    added_flights = select_best_flights(user_filters, result, state)
+                except Exception as exc:
+                    logger.error("Date %s generated an exception: %r", leg, exc)
+                    status.update(status="error", error=repr(exc))
+                    yield {"event": "date", **leg_fields(leg), "flights": [], **status}
+                    continue
+                finally:
+                    aggregate_seconds += time.perf_counter() - aggregate_start
+                all_date_flight_info.extend(added_flights)
+                yield {"event": "date", **leg_fields(leg), "flights": added_flights, **status,
+                       "top_flights": top_flight_ids(state)}
+    finally:
+        cancelled.set()
+        for task in tasks:
+            task.cancel()
     
     # Sort results by date for consistency
+    aggregate_start = time.perf_counter()
     all_date_flight_info.sort(key=lambda x: x["date"])
-    logger.info(f"Total flights found: {len(all_added_flight_ids)}")
-    logger.info(f"Best flights found: {len(all_date_flight_info)}")
+    observe(stage_duration, aggregate_seconds + time.perf_counter() - aggregate_start, "aggregate")
+    logger.info("Best flights found: %d unique of %d fetched, %d on the Pareto frontier",
+                len(all_date_flight_info), fetched_rows, len(state['frontier']))
+    if flight_cache is not None:
+        logger.debug("Flight cache stats: %s", flight_cache.stats())
     
-    return {
+    yield {
+        "event": "complete",
         "flight_info": all_date_flight_info,
-        "user_inputs": user_filters
+        "user_inputs": user_filters,
+        "date_status": [dict(status, **leg_fields(leg))
+                        for leg, status in sorted(date_status.items(), key=lambda item: (item[0][0], item[0][1] or ""))],
+        "deadline_exceeded": deadline_exceeded,
+        "top_flights": top_flight_ids(state),
     }
 
+# Main async search: fetches run on the shared fetch scheduler with bounded concurrency
+async def search_flights_async(user_filters, max_concurrency=10, request_id=None, priority=INTERACTIVE,
+                               deadline=None, cancel_event=None):
+    async for event in stream_flights_async(user_filters, max_concurrency=max_concurrency,
+                                            request_id=request_id, priority=priority,
+                                            deadline=deadline, cancel_event=cancel_event):
+        if event["event"] == "complete":
+            return {
+                "flight_info": event["flight_info"],
+                "user_inputs": event["user_inputs"],
+                "date_status": event["date_status"],
+                "deadline_exceeded": event["deadline_exceeded"],
+                "top_flights": event["top_flights"],
+            }
+
+# Synchronous wrapper kept for scripts and thread-based callers
+def search_flights_parallel(user_filters, max_workers=10, deadline=None, cancel_event=None):
+    """
+    Run search_flights_async to completion from synchronous code.
+    Must not be called from a thread that already runs an event loop.
+
+    Args:
+        deadline (float): time.monotonic() value after which the partial result is returned
+        cancel_event (threading.Event): Set from another thread to abandon the search
+    """
+    return asyncio.run(search_flights_async(user_filters, max_concurrency=max_workers,
+                                            deadline=deadline, cancel_event=cancel_event))
+
 # Example usage
 if __name__ == "__main__":
     logger.info("Starting core.py main execution")
@@ -157,7 +340,7 @@ if __name__ == "__main__":
     
     month_to_search = "May 2025"
     date_list = get_dates_for_month(month_to_search)
-    logger.info(f"Found {len(date_list)} dates to process: {date_list}")
+    logger.info("Found %d dates to process: %s", len(date_list), date_list)
     
     user_filters = {
         "from_airport": "BDQ",
@@ -174,17 +357,17 @@ if __name__ == "__main__":
         "max_stops": 1,
         "price_type": 'minimum'
     }
-    logger.info(f"User filters configured: {user_filters}")
+    logger.info("User filters configured: %s", user_filters)
     
     try:
         results = search_flights_parallel(user_filters)
         logger.info("Flight search completed successfully")
         
         logger.info("Results summary:")
-        logger.info(f"Total flights found: {len(results['flight_info'])}")
+        logger.info("Total flights found: %d", len(results['flight_info']))
         
-        # Log the results
-        logger.info(f"Results: {results}")
+        # Full results only at debug level, they can be large
+        logger.debug("Results: %s", results)
         
         end_time = time.time()
         execution_time = end_time - start_time
@@ -194,9 +377,9 @@ if __name__ == "__main__":
         #     json.dump(results, fp)
         # logger.info(f"Results saved to flights.json")
         
-        logger.info(f"Total execution time: {execution_time:.2f} seconds")
+        logger.info("Total execution time: %.2f seconds", execution_time)
         logger.info("Core.py main execution completed successfully")
         
     except Exception as e:
-        logger.error(f"Error during main execution: {e}")
+        logger.error("Error during main execution: %s", e)
         raise
\ No newline at end of file
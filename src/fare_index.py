@@ -0,0 +1,89 @@
+import math
+import os
+import statistics
+import time
+
+from src.cache import MemoryCacheBackend, SQLiteCacheBackend, TTLCache, make_flight_cache_key
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Fare index configuration
+FARE_INDEX_BACKEND = os.getenv("FARE_INDEX_BACKEND", "memory").lower()
+# Fares move slower than seat availability, so they are kept longer than the flight cache
+FARE_INDEX_TTL_SECONDS = float(os.getenv("FARE_INDEX_TTL_SECONDS", "21600"))
+FARE_INDEX_MAX_ENTRIES = int(os.getenv("FARE_INDEX_MAX_ENTRIES", "50000"))
+FARE_INDEX_PATH = os.getenv("FARE_INDEX_PATH", os.path.join(".cache", "fares.sqlite3"))
+
+
+class FareIndex:
+    """
+    Cheapest and median one-way fare per (route, date, passengers, seat,
+    max_stops), updated by every upstream fetch. An entry older than the
+    TTL counts as missing, so callers refetch exactly the stale dates.
+
+    Args:
+        cache (TTLCache): Store for the entries, keyed like the flight cache
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+
+    def record(self, date_params, date, flights, price_level=None):
+        """
+        Index the fares of one fetched date
+
+        Args:
+            flights (FlightTable): Every flight on the results page
+            price_level (str): Google's 'low'/'typical'/'high' indicator
+
+        Returns:
+            dict: The stored entry
+        """
+        prices = sorted(value for value in flights.price_value if not math.isnan(value))
+        entry = {
+            "date": date,
+            "min_fare": prices[0] if prices else None,
+            "median_fare": statistics.median(prices) if prices else None,
+            "flights": len(prices),
+            "price_level": price_level,
+            "updated_at": time.time(),
+        }
+        self._cache.set(make_flight_cache_key(date_params, date), entry)
+        return entry
+
+    def get(self, date_params, date):
+        """
+        Fresh entry of a date, None when it was never fetched or is stale
+        """
+        return self._cache.get(make_flight_cache_key(date_params, date))
+
+    def stats(self):
+        return self._cache.stats()
+
+
+def create_fare_index(backend=FARE_INDEX_BACKEND, ttl=FARE_INDEX_TTL_SECONDS,
+                      max_entries=FARE_INDEX_MAX_ENTRIES, path=FARE_INDEX_PATH):
+    """
+    Create the per-date fare index
+
+    Args:
+        backend (str): 'memory' or 'sqlite' (default: FARE_INDEX_BACKEND)
+        ttl (float): Age in seconds after which a date's fares are refetched
+        max_entries (int): Maximum number of dates kept before LRU eviction
+        path (str): Database file for the sqlite backend
+
+    Returns:
+        FareIndex: Configured index
+    """
+    if backend == "sqlite":
+        store = SQLiteCacheBackend(path=path, max_entries=max_entries)
+    else:
+        store = MemoryCacheBackend(max_entries=max_entries)
+    logger.info("Fare index: backend=%s, ttl=%ss, max_entries=%d", backend, ttl, max_entries)
+    return FareIndex(TTLCache(store, ttl=ttl))
+
+
+# Process-wide fare index, fed by core.fetch_date
+fare_index = create_fare_index()
@@ -0,0 +1,109 @@
+import os
+import threading
+
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Fetch configuration
+GOOGLE_FLIGHTS_URL = "https://www.google.com/travel/flights"
+FLIGHT_FETCH_WORKERS = int(os.getenv("FLIGHT_FETCH_WORKERS", "32"))
+FLIGHT_FETCH_IMPERSONATE = os.getenv("FLIGHT_FETCH_IMPERSONATE", "chrome_126")
+
+# One HTTP client per fetch thread (see src.scheduler), so keep-alive connections are reused across searches
+_local = threading.local()
+
+# fast_flights is imported on first use (or by preload) to keep process startup fast
+
+
+class UpstreamError(Exception):
+    """Raised when Google Flights answers with an error status"""
+
+
+def preload():
+    """
+    Import fast_flights ahead of the first fetch
+    """
+    import fast_flights.core  # noqa: F401
+    import fast_flights.primp  # noqa: F401
+
+
+def _get_client():
+    client = getattr(_local, "client", None)
+    if client is None:
+        from fast_flights.primp import Client
+
+        client = Client(impersonate=FLIGHT_FETCH_IMPERSONATE, verify=False)
+        _local.client = client
+        logger.debug("Created HTTP client for thread %s", threading.current_thread().name)
+    return client
+
+
+def build_filter(date_params, date, return_date=None):
+    """
+    Build the Google Flights filter for a single travel date
+
+    Args:
+        date_params (dict): User filters (airports, passengers, seat, max_stops)
+        date (str): Travel date in 'yyyy-mm-dd' format
+        return_date (str): Return date in 'yyyy-mm-dd' format for round trips
+
+    Returns:
+        TFSData: Filter for get_flights, None for unsupported trip types
+            (a round trip without a return date)
+    """
+    from fast_flights import create_filter, FlightData, Passengers
+
+    trip_type = ''.join(date_params['trip_type'])
+    logger.debug("Trip type: %s, Date: %s, Return date: %s", trip_type, date, return_date)
+    flight_data = [
+        FlightData(
+            date=str(date),
+            from_airport=date_params['from_airport'],
+            to_airport=date_params['to_airport'],
+        )
+    ]
+    if trip_type == 'round-trip' and return_date is not None:
+        flight_data.append(
+            FlightData(
+                date=str(return_date),
+                from_airport=date_params['to_airport'],
+                to_airport=date_params['from_airport'],
+            )
+        )
+    elif trip_type != 'one-way':
+        return None
+    return create_filter(
+        flight_data=flight_data,
+        trip=trip_type,
+        passengers=Passengers(adults=date_params['adults'], children=date_params['children'],
+                              infants_in_seat=date_params['infants_in_seat'],
+                              infants_on_lap=date_params['infants_on_lap']),
+        seat=date_params['seat'],
+        max_stops=date_params['max_stops'],
+    )
+
+
+def _fetch(filter, currency):
+    params = {
+        "tfs": filter.as_b64().decode("utf-8"),
+        "hl": "en",
+        "tfu": "EgQIABABIgA",
+        "curr": currency,
+    }
+    res = _get_client().get(GOOGLE_FLIGHTS_URL, params=params)
+    if res.status_code != 200:
+        raise UpstreamError(f"{res.status_code} Result: {res.text_markdown}")
+    return res
+
+
+def fetch_page(filter, currency="inr"):
+    """
+    Fetch the raw Google Flights results page without parsing it, so parsing
+    can run elsewhere (see src.parse_pool)
+
+    Returns:
+        str: Page HTML
+    """
+    return _fetch(filter, currency).text
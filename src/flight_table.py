@@ -0,0 +1,236 @@
+import hashlib
+import json
+import math
+import re
+from array import array
+from functools import lru_cache
+
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+_PRICE_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_HOURS_RE = re.compile(r"(\d+)\s*hr")
+_MINUTES_RE = re.compile(r"(\d+)\s*min")
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})\s*([AaPp][Mm])")
+
+# Stops value stored for flights whose stops could not be parsed upstream
+UNKNOWN_STOPS = -1
+
+
+@lru_cache(maxsize=8192)
+def parse_price(price):
+    """
+    Parse a display price such as '₹3,500' into a number, NaN when unavailable
+    """
+    if isinstance(price, (int, float)):
+        return float(price) if price > 0 else float("nan")
+    match = _PRICE_RE.search(price or "")
+    if not match:
+        return float("nan")
+    value = float(match.group(0).replace(",", ""))
+    return value if value > 0 else float("nan")
+
+
+@lru_cache(maxsize=8192)
+def parse_duration(duration):
+    """
+    Parse a duration such as '2 hr 15 min' into minutes, NaN when unavailable
+    """
+    if isinstance(duration, (int, float)):
+        return float(duration)
+    hours = _HOURS_RE.search(duration or "")
+    minutes = _MINUTES_RE.search(duration or "")
+    if not hours and not minutes:
+        return float("nan")
+    return float((int(hours.group(1)) if hours else 0) * 60 + (int(minutes.group(1)) if minutes else 0))
+
+
+@lru_cache(maxsize=8192)
+def parse_departure(departure):
+    """
+    Parse a departure such as '8:30 AM on Sun, Jun 15' into minutes after midnight, NaN when unavailable
+    """
+    match = _TIME_RE.search(departure or "")
+    if not match:
+        return float("nan")
+    hour = int(match.group(1)) % 12
+    if match.group(3).upper() == "PM":
+        hour += 12
+    return float(hour * 60 + int(match.group(2)))
+
+
+def _number_or_none(value):
+    return None if math.isnan(value) else value
+
+
+def flight_key(name, date, departure, arrival, price):
+    """
+    Hash the identifying fields of a flight into a short hex key, so the same
+    flight fetched by overlapping searches or retries gets the same id
+    """
+    content = "\x1f".join(str(part).strip().lower() for part in (name, date, departure, arrival, price))
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class FlightTable:
+    """
+    Column-backed table of flights for one fetch. Display strings are kept
+    as returned upstream; price, duration, stops and departure time are
+    parsed to numbers once at ingestion and stored in typed arrays.
+    """
+
+    __slots__ = (
+        "is_best", "name", "departure", "arrival", "arrival_time_ahead",
+        "duration", "stops", "delay", "price",
+        "price_value", "duration_minutes", "departure_minutes",
+    )
+
+    STRING_COLUMNS = ("name", "departure", "arrival", "arrival_time_ahead", "duration", "delay", "price")
+    NUMERIC_COLUMNS = ("is_best", "stops", "price_value", "duration_minutes", "departure_minutes")
+
+    def __init__(self):
+        self.is_best = array("b")
+        self.stops = array("b")
+        self.price_value = array("d")
+        self.duration_minutes = array("d")
+        self.departure_minutes = array("d")
+        self.name = []
+        self.departure = []
+        self.arrival = []
+        self.arrival_time_ahead = []
+        self.duration = []
+        self.delay = []
+        self.price = []
+
+    def __len__(self):
+        return len(self.name)
+
+    def append(self, is_best, name, departure, arrival, arrival_time_ahead, duration, stops, delay, price):
+        self.is_best.append(1 if is_best else 0)
+        self.name.append(name)
+        self.departure.append(departure)
+        self.arrival.append(arrival)
+        self.arrival_time_ahead.append(arrival_time_ahead)
+        self.duration.append(duration)
+        self.stops.append(stops if isinstance(stops, int) and stops >= 0 else UNKNOWN_STOPS)
+        self.delay.append(delay)
+        self.price.append(price)
+        self.price_value.append(parse_price(price))
+        self.duration_minutes.append(parse_duration(duration))
+        self.departure_minutes.append(parse_departure(departure))
+
+    @classmethod
+    def from_flights(cls, flights):
+        """
+        Build a table from fast_flights Flight objects
+        """
+        table = cls()
+        for flight in flights:
+            table.append(
+                flight.is_best, flight.name, flight.departure, flight.arrival,
+                flight.arrival_time_ahead, flight.duration, flight.stops,
+                flight.delay, flight.price
+            )
+        return table
+
+    def row(self, index, **extra):
+        """
+        Materialize one flight as a dict of its display fields plus the parsed numbers
+        """
+        stops = self.stops[index]
+        row = {
+            "is_best": bool(self.is_best[index]),
+            "name": self.name[index],
+            "departure": self.departure[index],
+            "arrival": self.arrival[index],
+            "arrival_time_ahead": self.arrival_time_ahead[index],
+            "duration": self.duration[index],
+            "stops": stops if stops != UNKNOWN_STOPS else "Unknown",
+            "delay": self.delay[index],
+            "price": self.price[index],
+            "price_value": _number_or_none(self.price_value[index]),
+            "duration_minutes": _number_or_none(self.duration_minutes[index]),
+            "departure_minutes": _number_or_none(self.departure_minutes[index]),
+        }
+        row.update(extra)
+        return row
+
+    def key(self, index, date):
+        """
+        Stable content-derived id of a flight: airline, date, departure, arrival and price
+        """
+        return flight_key(self.name[index], date, self.departure[index], self.arrival[index], self.price[index])
+
+    def to_dicts(self, **extra):
+        return [self.row(i, **extra) for i in range(len(self))]
+
+    def to_numpy(self):
+        """
+        Zero-copy NumPy views of the numeric columns
+        """
+        import numpy as np
+
+        return {
+            "is_best": np.frombuffer(self.is_best, dtype=np.int8).astype(bool),
+            "stops": np.frombuffer(self.stops, dtype=np.int8),
+            "price_value": np.frombuffer(self.price_value, dtype=np.float64),
+            "duration_minutes": np.frombuffer(self.duration_minutes, dtype=np.float64),
+            "departure_minutes": np.frombuffer(self.departure_minutes, dtype=np.float64),
+        }
+
+    def to_pandas(self):
+        """
+        Export as a pandas DataFrame; numeric columns are built from buffer views
+        """
+        import pandas as pd
+
+        columns = {name: getattr(self, name) for name in self.STRING_COLUMNS}
+        columns.update(self.to_numpy())
+        return pd.DataFrame(columns, copy=False)
+
+    def to_columns(self):
+        """
+        Column-oriented, JSON serializable representation
+        """
+        columns = {name: getattr(self, name) for name in self.STRING_COLUMNS}
+        columns.update({name: getattr(self, name).tolist() for name in self.NUMERIC_COLUMNS})
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns):
+        table = cls()
+        for name in cls.STRING_COLUMNS:
+            setattr(table, name, list(columns[name]))
+        table.is_best = array("b", columns["is_best"])
+        table.stops = array("b", columns["stops"])
+        for name in ("price_value", "duration_minutes", "departure_minutes"):
+            setattr(table, name, array("d", columns[name]))
+        return table
+
+
+def _encode(value):
+    if isinstance(value, FlightTable):
+        return {"__flight_table__": value.to_columns()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if "__flight_table__" in obj:
+        return FlightTable.from_columns(obj["__flight_table__"])
+    return obj
+
+
+def dumps(value):
+    """
+    json.dumps that also serializes FlightTable values (used by on-disk caches)
+    """
+    return json.dumps(value, default=_encode)
+
+
+def loads(text):
+    """
+    json.loads counterpart of dumps
+    """
+    return json.loads(text, object_hook=_decode)
@@ -0,0 +1,235 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.logger import get_default_logger, log_context
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Job configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "256"))
+JOB_STORE_MAX_JOBS = int(os.getenv("JOB_STORE_MAX_JOBS", "1000"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobStoreFull(Exception):
+    """Raised when no job slot can be freed for a new search"""
+
+
+class Job:
+    __slots__ = ("search_id", "user_query", "status", "user_inputs", "dates_total", "partial_flights",
+                 "top_flights", "date_status", "result", "error", "created_at", "updated_at", "finished_at", "done", "task")
+
+    def __init__(self, search_id, user_query):
+        now = time.time()
+        self.search_id = search_id
+        self.user_query = user_query
+        self.status = QUEUED
+        self.user_inputs = None
+        # Dates (or date pairs) the search fetches, as announced by its events
+        self.dates_total = None
+        self.partial_flights = []
+        # Ids of the best flights found so far, ranked
+        self.top_flights = []
+        self.date_status = []
+        self.result = None
+        self.error = None
+        self.created_at = now
+        self.updated_at = now
+        self.finished_at = None
+        self.done = asyncio.Event()
+        self.task = None
+
+    def finish(self, status, error=None):
+        self.status = status
+        if status == COMPLETED:
+            # A round trip prunes pairs it announced as possible fetches
+            self.dates_total = len(self.date_status)
+        if error is not None:
+            self.error = error
+        self.finished_at = self.updated_at = time.time()
+        self.done.set()
+
+    def apply(self, event):
+        """
+        Fold one stream_search_flights event into the job state
+        """
+        self.updated_at = time.time()
+        if "dates_total" in event:
+            self.dates_total = event["dates_total"]
+        if event["event"] == "filters":
+            self.user_inputs = event["user_inputs"]
+        elif event["event"] == "date":
+            self.partial_flights.extend(event["flights"])
+            self.top_flights = event.get("top_flights", self.top_flights)
+            self.date_status.append({key: value for key, value in event.items()
+                                     if key not in ("event", "flights", "top_flights")})
+        elif event["event"] == "result":
+            self.result = event["result"]
+
+    def to_dict(self):
+        return {
+            "search_id": self.search_id,
+            "status": self.status,
+            "user_inputs": self.user_inputs,
+            "dates_completed": len(self.date_status),
+            "dates_total": self.dates_total,
+            "partial_flights": self.partial_flights,
+            "top_flights": self.top_flights,
+            "date_status": self.date_status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobStore:
+    """
+    Bounded in-memory job store. Finished jobs expire after `ttl` seconds and
+    the oldest finished jobs are evicted first when the store is full.
+    """
+
+    def __init__(self, max_jobs=JOB_STORE_MAX_JOBS, ttl=JOB_TTL_SECONDS):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        expired = [search_id for search_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.ttl]
+        for search_id in expired:
+            del self._jobs[search_id]
+
+    def get(self, search_id):
+        with self._lock:
+            self._expire(time.time())
+            return self._jobs.get(search_id)
+
+    def add(self, job):
+        with self._lock:
+            self._expire(time.time())
+            while len(self._jobs) >= self.max_jobs:
+                finished = next((search_id for search_id, existing in self._jobs.items()
+                                 if existing.finished_at is not None), None)
+                if finished is None:
+                    raise JobStoreFull(f"{len(self._jobs)} searches are already in progress")
+                del self._jobs[finished]
+            self._jobs[job.search_id] = job
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+class JobManager:
+    """
+    Runs searches in the background on a fixed pool of asyncio workers
+
+    Args:
+        runner: Callable taking a user query and returning an async iterator of
+            search events (e.g. FlightAgent.stream_search_flights)
+        workers (int): Number of searches run concurrently
+        queue_size (int): Maximum number of searches waiting for a worker
+    """
+
+    def __init__(self, runner, workers=JOB_WORKERS, queue_size=JOB_QUEUE_SIZE, store=None):
+        self.runner = runner
+        self.workers = workers
+        self.queue_size = queue_size
+        self.store = store or JobStore()
+        self._queue = None
+        self._tasks = []
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.ensure_future(self._worker(index)) for index in range(self.workers)]
+        logger.info("Started %d search job workers", self.workers)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, search_id, user_query):
+        """
+        Queue a search, or return the existing job for a known search_id
+
+        Raises:
+            JobStoreFull: When the store or the queue has no room
+        """
+        job = self.store.get(search_id)
+        if job is not None:
+            return job
+        job = Job(search_id, user_query)
+        self.store.add(job)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            job.finish(FAILED, "Search queue is full")
+            raise JobStoreFull(f"{self.queue_size} searches are already queued")
+        logger.info("Queued search job %s", search_id)
+        return job
+
+    def get(self, search_id):
+        return self.store.get(search_id)
+
+    def cancel(self, search_id):
+        """
+        Cancel a queued or running search; its pending fetches are dropped
+
+        Returns:
+            Job: The cancelled job, None if search_id is unknown
+        """
+        job = self.store.get(search_id)
+        if job is None or job.finished_at is not None:
+            return job
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            job.finish(CANCELLED, "Search was cancelled")
+        logger.info("Cancelled search job %s", search_id)
+        return job
+
+    async def _worker(self, index):
+        while True:
+            job = await self._queue.get()
+            try:
+                # Jobs cancelled while queued are skipped
+                if job.finished_at is None:
+                    job.task = asyncio.ensure_future(self.run(job))
+                    # asyncio.wait does not raise when only the job task is cancelled
+                    await asyncio.wait({job.task})
+            finally:
+                if job.task is not None and not job.task.done():
+                    job.task.cancel()
+                job.task = None
+                self._queue.task_done()
+
+    async def run(self, job):
+        job.status = RUNNING
+        job.updated_at = time.time()
+        logger.info("Running search job %s", job.search_id)
+        try:
+            with log_context(search_id=job.search_id):
+                async for event in self.runner(job.user_query):
+                    job.apply(event)
+            job.finish(COMPLETED)
+        except asyncio.CancelledError:
+            job.finish(CANCELLED, "Search was cancelled")
+            raise
+        except Exception as exc:
+            logger.error("Search job %s failed: %r", job.search_id, exc)
+            job.finish(FAILED, f"Flight search failed: {str(exc)}")
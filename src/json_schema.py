@@ -1,16 +1,24 @@
 import json
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 
 class FlightQueryData(BaseModel):
     from_airport: str = Field(
         ...,
-        description="Airport code for the departure city (e.g., BLR for Bangalore, AMD for Ahmedabad). Required field that represents the starting point of the journey."
+        description="Airport code for the departure city (e.g., BLR for Bangalore, AMD for Ahmedabad), or a metro code covering all of a city's airports (e.g., LON for any London airport, NYC for any New York airport). Required field that represents the starting point of the journey."
     )
     to_airport: str = Field(
         ...,
-        description="Airport code for the destination city (e.g., BLR for Bangalore, AMD for Ahmedabad, MUC for Munich). Required field that represents the endpoint of the journey."
+        description="Airport code for the destination city (e.g., BLR for Bangalore, AMD for Ahmedabad, MUC for Munich), or a metro code covering all of a city's airports (e.g., PAR for any Paris airport). Required field that represents the endpoint of the journey."
+    )
+    from_airports: List[str] = Field(
+        [],
+        description="Additional departure airport or metro codes when the user accepts several origins (e.g., 'from Mumbai or Pune' gives from_airport BOM and from_airports ['PNQ']). Empty list for a single origin."
+    )
+    to_airports: List[str] = Field(
+        [],
+        description="Additional destination airport or metro codes when the user accepts several destinations (e.g., 'to Mumbai or Pune' gives to_airport BOM and to_airports ['PNQ']). Empty list for a single destination."
     )
     adults: int = Field(
         1,
@@ -40,6 +48,18 @@ class FlightQueryData(BaseModel):
         ...,
         description="List of potential travel dates in 'yyyy-mm-dd' format. For date ranges, should include all dates within the range. Required field."
     )
+    return_date_list: List[str] = Field(
+        [],
+        description="For round trips only: list of potential return dates in 'yyyy-mm-dd' format. Empty list if the user gave no return dates; they are then derived from the stay lengths."
+    )
+    min_stay_days: int = Field(
+        1,
+        description="For round trips only: minimum number of days between the outbound and the return flight, ignored when return_date_list is given. Defaults to 1."
+    )
+    max_stay_days: int = Field(
+        7,
+        description="For round trips only: maximum number of days between the outbound and the return flight (e.g. 7 for 'a week'), ignored when return_date_list is given. Defaults to 7."
+    )
     specific_flight_provider: List[str] = Field(
         [],
         description="List of preferred airlines or flight operators (e.g., IndiGo, Air India, Akasa Air). Empty list if no specific provider requested."
@@ -113,45 +133,12 @@ class FlightSearchResult(BaseModel):
         ...,
         description = "Duration of the flight"
     )
+    return_date: Optional[str] = Field(
+        None,
+        description = "Return flight date for round trips, null for one-way flights"
+    )
 
 
 
 class FlightResponse(BaseModel):
     flight_search_results: List[FlightSearchResult]
-
-
-class FlightJSON:
-    def __init__(self, is_best, name, departure, arrival, arrival_time_ahead, duration, stops, delay, price):
-        self.is_best = is_best
-        self.name = name
-        self.departure = departure
-        self.arrival = arrival
-        self.arrival_time_ahead = arrival_time_ahead
-        self.duration = duration
-        self.stops = stops
-        self.delay = delay
-        self.price = price
-
-    def to_dict(self):
-        return {
-            "is_best": self.is_best,
-            "name": self.name,
-            "departure": self.departure,
-            "arrival": self.arrival,
-            "arrival_time_ahead": self.arrival_time_ahead,
-            "duration": self.duration,
-            "stops": self.stops,
-            "delay": self.delay,
-            "price": self.price
-        }
-
-class Result:
-    def __init__(self, current_price, flights):
-        self.current_price = current_price
-        self.flights = flights
-
-    def to_dict(self):
-        return {
-            "current_price": self.current_price,
-            "flights": [flight.to_dict() for flight in self.flights]
-        }
\ No newline at end of file
@@ -1,52 +1,185 @@
+import atexit
+import contextvars
+import json
 import logging
 import os
+import queue
+import random
+import sys
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# 'text' for the human-readable format, 'json' for one JSON object per line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Write records from a background thread so logging never blocks a request on stdout
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+# Records waiting for the writer thread; further records are dropped, not waited for
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Longer messages (e.g. whole result payloads) are cut to this many characters
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+# Fraction of DEBUG records kept
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+_context = contextvars.ContextVar("log_context", default={})
+_handler = None
+_handler_lock = threading.Lock()
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attach fields (e.g. search_id) to every record logged inside the block,
+    including from tasks and scheduler threads started within it
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def _truncate(message):
+    if LOG_MAX_MESSAGE_CHARS and len(message) > LOG_MAX_MESSAGE_CHARS:
+        return f"{message[:LOG_MAX_MESSAGE_CHARS]}... [{len(message) - LOG_MAX_MESSAGE_CHARS} chars truncated]"
+    return message
+
+
+class ContextFilter(logging.Filter):
+    """
+    Samples DEBUG records and stamps each record with the current log context
+    """
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and LOG_DEBUG_SAMPLE_RATE < 1 and random.random() >= LOG_DEBUG_SAMPLE_RATE:
+            return False
+        record.context = _context.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+    def format(self, record):
+        record.message = _truncate(record.getMessage())
+        record.asctime = self.formatTime(record, self.datefmt)
+        line = self.formatMessage(record)
+        context = getattr(record, "context", None)
+        if context:
+            line += " [" + " ".join(f"{key}={value}" for key, value in context.items()) + "]"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _truncate(record.getMessage()),
+            **getattr(record, "context", {}),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that only renders the message in the calling thread; time
+    formatting, JSON encoding and the write happen on the listener thread.
+    Records are dropped (and counted) when the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Arguments are rendered now since they may be mutated after the call returns
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _shared_handler():
+    # One output pipeline (and one writer thread) shared by every logger
+    global _handler
+    with _handler_lock:
+        if _handler is not None:
+            return _handler
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        if LOG_ASYNC:
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            handler = DroppingQueueHandler(log_queue)
+            listener = QueueListener(log_queue, stream_handler)
+            listener.start()
+            # Flush what is still queued on interpreter exit
+            atexit.register(listener.stop)
+        else:
+            handler = stream_handler
+        handler.addFilter(ContextFilter())
+        _handler = handler
+        return handler
+
 
 def setup_logger(name, log_level=logging.INFO, console_output=True):
     """
     Setup a logger with customizable configuration
-    
+
     Args:
         name (str): Name of the logger (usually __name__)
         log_level: Logging level (default: logging.INFO)
         console_output (bool): Whether to output to console (default: True)
-    
+
     Returns:
         logging.Logger: Configured logger instance
     """
     # Create logger
     logger = logging.getLogger(name)
-    
+
     # Avoid adding handlers multiple times
     if logger.handlers:
         return logger
-    
+
     logger.setLevel(log_level)
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Add console handler if requested
+
+    # Add the shared console handler if requested
     if console_output:
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(log_level)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-    
+        logger.addHandler(_shared_handler())
+
     return logger
 
 def get_logger(name, log_level=logging.INFO, console_output=True):
     """
     Get a configured logger instance
-    
+
     Args:
         name (str): Name of the logger (usually __name__)
         log_level: Logging level (default: logging.INFO)
         console_output (bool): Whether to output to console (default: True)
-    
+
     Returns:
         logging.Logger: Configured logger instance
     """
@@ -55,33 +188,37 @@ def get_logger(name, log_level=logging.INFO, console_output=True):
 # Default logger configuration
 def get_default_logger(name):
     """
-    Get a logger with default configuration (INFO level, console output only)
-    
+    Get a logger with default configuration (LOG_LEVEL, console output only)
+
     Args:
         name (str): Name of the logger (usually __name__)
-    
+
     Returns:
         logging.Logger: Configured logger instance
     """
     return get_logger(
         name=name,
-        log_level=logging.INFO,
+        log_level=LOG_LEVEL,
         console_output=True
     )
 
+def dropped_records():
+    """
+    Number of records dropped because the log queue was full
+    """
+    return getattr(_handler, "dropped", 0)
+
 # Utility function to change log level at runtime
 def set_log_level(logger_name, level):
     """
     Change the log level of an existing logger
-    
+
     Args:
         logger_name (str): Name of the logger to modify
         level: New logging level
     """
-    logger = logging.getLogger(logger_name)
-    logger.setLevel(level)
-    for handler in logger.handlers:
-        handler.setLevel(level)
+    # The console handler is shared between loggers, so only the logger's own level changes
+    logging.getLogger(logger_name).setLevel(level)
 
 # Example usage:
 if __name__ == "__main__":
@@ -1,26 +1,87 @@
-from agno.agent import Agent, RunResponse
-from agno.agent import Agent, RunResponse  # noqa
-from typing import List
-import json
-from src.agno_agent import FlightQueryData, user_query_extractor_agent, init_flight_analyzer_agent, information_checker_agent
-from src.core import process_date, search_flights_parallel
+from typing import List, TYPE_CHECKING
+import asyncio
+import threading
+import time
+from dotenv import load_dotenv
+# Load .env before the src modules read their configuration
+load_dotenv()
+from src.agno_agent import user_query_extractor_agent, init_flight_analyzer_agent, information_checker_agent
+from src.core import process_date, search_flights_parallel, stream_flights_async, SearchCancelled, SEARCH_DEADLINE_SECONDS
+from src.analyzer_payload import build_analyzer_payload
 from src.logger import get_default_logger
+from src.metrics import observe, span, stage_duration
+from src.ranker import FLIGHT_RANKER, rank_flights
+from src.query_parser import extract_query_fast_path
+from src.round_trip import is_round_trip, search_round_trip, stream_round_trip_async
+from src.multi_route import is_multi_route, search_multi_route, stream_multi_route_async
+from src.warmer import route_popularity
+from src.cache import query_cache
 import certifi
 import os
 os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
 
+if TYPE_CHECKING:
+    from agno.agent import RunResponse
+
 # Setup logger
 logger = get_default_logger(__name__)
 
 class FlightAgent:
-    def __init__(self) -> None:
-        self.query_extractor_agent = user_query_extractor_agent()
-        logger.info("Creating and running user query extractor agent")
-        self.flight_list_analyzer_agent = init_flight_analyzer_agent()
-        logger.info("Creating and running flight list analyzer agent")
+    def __init__(self, ranker=FLIGHT_RANKER) -> None:
+        self.ranker = ranker
+        # Agents are built on first use or by warm_up(); building them imports agno and the Anthropic SDK
+        self._agents_lock = threading.Lock()
+        self._query_extractor_agent = None
+        self._flight_list_analyzer_agent = None
+        if self.ranker != "llm":
+            logger.info("Using %s ranker instead of flight list analyzer agent", self.ranker)
+
+    @property
+    def query_extractor_agent(self):
+        if self._query_extractor_agent is None:
+            with self._agents_lock:
+                if self._query_extractor_agent is None:
+                    logger.info("Creating user query extractor agent")
+                    self._query_extractor_agent = user_query_extractor_agent()
+        return self._query_extractor_agent
+
+    @query_extractor_agent.setter
+    def query_extractor_agent(self, agent):
+        self._query_extractor_agent = agent
+
+    @property
+    def flight_list_analyzer_agent(self):
+        if self._flight_list_analyzer_agent is None and self.ranker == "llm":
+            with self._agents_lock:
+                if self._flight_list_analyzer_agent is None:
+                    logger.info("Creating flight list analyzer agent")
+                    self._flight_list_analyzer_agent = init_flight_analyzer_agent()
+        return self._flight_list_analyzer_agent
+
+    @flight_list_analyzer_agent.setter
+    def flight_list_analyzer_agent(self, agent):
+        self._flight_list_analyzer_agent = agent
+
+    def warm_up(self):
+        """
+        Build the agents now rather than during the first search
+        """
+        return self.query_extractor_agent, self.flight_list_analyzer_agent
     
-    def search_flights(self, user_query):
-        logger.info(f"Starting flight search for query: {user_query}")
+    def search_flights(self, user_query, deadline_seconds=SEARCH_DEADLINE_SECONDS, cancel_event=None):
+        """
+        Args:
+            user_query (str): Natural-language flight request
+            deadline_seconds (float): Budget for the whole search; past it the
+                partial result is ranked without the analyzer LLM
+            cancel_event (threading.Event): Set from another thread to abandon the search
+
+        Raises:
+            SearchCancelled: When cancel_event is set before the search finishes
+        """
+        logger.info("Starting flight search for query: %s", user_query)
+        start = time.perf_counter()
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
         
         #Note:: Added the information checker first, not needed for frontend integration
         # input_supervisor = information_checker_agent()
@@ -31,45 +92,196 @@ class FlightAgent:
         
         if True: #input_json_response['to_send_next_agent'] == True:
             
-            json_mode_response: RunResponse = self.query_extractor_agent.run(user_query)
-            user_filters = json_mode_response.content
+            with span("extract"):
+                user_filters = self._lookup_filters(user_query)
+                if user_filters is None:
+                    json_mode_response: RunResponse = self.query_extractor_agent.run(user_query)
+                    user_filters = json_mode_response.content
+                    self._remember_filters(user_query, user_filters)
 
             user_filters_json = user_filters.model_dump(mode='json')
-            logger.info(f"User filters extracted: {user_filters_json}")
+            logger.info("User filters extracted: %s", user_filters_json)
+            route_popularity.record(user_filters_json)
             
             logger.info("Starting parallel flight search")
-            all_flights_results = search_flights_parallel(user_filters_json)
+            search, _ = self._search_functions(user_filters_json)
+            with span("search"):
+                all_flights_results = search(user_filters_json, deadline=deadline, cancel_event=cancel_event)
             logger.info("Flight search completed")
-            logger.debug(f"Flight search results: {all_flights_results}")
+            logger.debug("Flight search results: %s", all_flights_results)
+            if cancel_event is not None and cancel_event.is_set():
+                raise SearchCancelled("Search cancelled before ranking")
 
-            all_flights_results_str = json.dumps(all_flights_results)
             # with open('flights.json', 'w') as fp:
             #     json.dump(all_flights_results, fp)
 
-            
-            best_flight_result: RunResponse = self.flight_list_analyzer_agent.run(all_flights_results_str)
-            best_flight_result = best_flight_result.content.model_dump()
+            with span("rank"):
+                if self.ranker == "llm" and not self._deadline_passed(deadline):
+                    all_flights_results_str = self._analyzer_payload(all_flights_results)
+                    best_flight_result: RunResponse = self.flight_list_analyzer_agent.run(all_flights_results_str)
+                    best_flight_result = best_flight_result.content.model_dump()
+                else:
+                    if self.ranker == "llm":
+                        logger.warning("Search deadline passed, ranking locally instead of with the analyzer")
+                        all_flights_results['deadline_exceeded'] = True
+                    best_flight_result = rank_flights(all_flights_results).model_dump()
+            self._add_search_status(best_flight_result, all_flights_results)
             logger.info("Flight analysis completed")
-            logger.debug(f"Best flight result: {best_flight_result}")
+            logger.debug("Best flight result: %s", best_flight_result)
             
-            #Adding a redirect URL
-            logger.info("Adding redirect URLs to flight results")
-            for each_results in best_flight_result['flight_search_results']:
-                redirect_url = f"https://www.google.com/travel/flights?q=Flights%20to%20{each_results['destination_airport']}%20from%20{each_results['origin_airport']}%20on%20{each_results['Date']}%20one%20way%20economy%20class&curr=INR"
-                each_results['redirect_url'] = redirect_url
-                logger.debug(f"Added redirect URL for flight: {each_results['origin_airport']} to {each_results['destination_airport']}")
+            self._add_redirect_urls(best_flight_result)
             
             logger.info("Flight search and analysis completed successfully")
-            logger.debug(f"Final flight result: {best_flight_result}")
+            logger.debug("Final flight result: %s", best_flight_result)
                 
         else:
             logger.warning("Input validation failed, returning user message")
             best_flight_result = input_json_response['ask_user_message']
         
+        observe(stage_duration, time.perf_counter() - start, "total")
         logger.info("Flight search function completed")
-        logger.info(f"Best flight result: {best_flight_result}")
+        self._log_result(best_flight_result)
         return best_flight_result
 
+    async def search_flights_async(self, user_query, deadline_seconds=SEARCH_DEADLINE_SECONDS):
+        """
+        Async variant of search_flights for use inside an event loop:
+        LLM calls use the agents' async API and fetches are awaited directly.
+        """
+        async for event in self.stream_search_flights(user_query, deadline_seconds=deadline_seconds):
+            if event["event"] == "result":
+                return event["result"]
+
+    async def stream_search_flights(self, user_query, deadline_seconds=SEARCH_DEADLINE_SECONDS):
+        """
+        Run the search pipeline and yield progress events: the extracted
+        filters, each date's flights in completion order, then the ranked result.
+
+        Cancelling the consuming task stops all outstanding fetches and LLM
+        calls. Once `deadline_seconds` pass, the dates fetched so far are
+        ranked (without the analyzer LLM if it cannot finish in time).
+        """
+        logger.info("Starting async flight search for query: %s", user_query)
+        start = time.perf_counter()
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+
+        with span("extract"):
+            user_filters = self._lookup_filters(user_query)
+            if user_filters is None:
+                json_mode_response: RunResponse = await asyncio.wait_for(
+                    self.query_extractor_agent.arun(user_query), self._remaining(deadline))
+                user_filters = json_mode_response.content
+                self._remember_filters(user_query, user_filters)
+        user_filters_json = user_filters.model_dump(mode='json')
+        logger.info("User filters extracted: %s", user_filters_json)
+        # Popular routes are kept warm in the flight cache
+        route_popularity.record(user_filters_json)
+        _, stream = self._search_functions(user_filters_json)
+        # Dates fetched by a plain search; multi-airport and round-trip searches announce theirs once planned
+        dates_total = len(dict.fromkeys(user_filters_json['date_list'])) if stream is stream_flights_async else None
+        yield {"event": "filters", "user_inputs": user_filters_json, "dates_total": dates_total}
+
+        logger.info("Starting async flight search")
+        all_flights_results = None
+        # Includes the time the consumer spends on the yielded events
+        with span("search"):
+            async for event in stream(user_filters_json, deadline=deadline):
+                if event["event"] == "complete":
+                    all_flights_results = {
+                        "flight_info": event["flight_info"],
+                        "user_inputs": event["user_inputs"],
+                        "date_status": event["date_status"],
+                        "deadline_exceeded": event["deadline_exceeded"]
+                    }
+                else:
+                    yield event
+        logger.info("Flight search completed")
+
+        best_flight_result = None
+        with span("rank"):
+            if self.ranker == "llm":
+                all_flights_results_str = self._analyzer_payload(all_flights_results)
+                try:
+                    best_flight_result: RunResponse = await asyncio.wait_for(
+                        self.flight_list_analyzer_agent.arun(all_flights_results_str), self._remaining(deadline))
+                    best_flight_result = best_flight_result.content.model_dump()
+                except asyncio.TimeoutError:
+                    logger.warning("Flight analyzer did not finish before the deadline, ranking locally")
+                    all_flights_results['deadline_exceeded'] = True
+            if best_flight_result is None:
+                best_flight_result = rank_flights(all_flights_results).model_dump()
+        self._add_search_status(best_flight_result, all_flights_results)
+        logger.info("Flight analysis completed")
+
+        self._add_redirect_urls(best_flight_result)
+        observe(stage_duration, time.perf_counter() - start, "total")
+        logger.info("Async flight search and analysis completed successfully")
+        self._log_result(best_flight_result)
+        yield {"event": "result", "result": best_flight_result}
+
+    @staticmethod
+    def _log_result(best_flight_result):
+        # The full payload only at DEBUG; it is large and logged once per search
+        if isinstance(best_flight_result, dict):
+            logger.info("Best flight result: %d flights", len(best_flight_result.get('flight_search_results') or []))
+        logger.debug("Best flight result: %s", best_flight_result)
+
+    @staticmethod
+    def _remaining(deadline):
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    @staticmethod
+    def _deadline_passed(deadline):
+        return deadline is not None and time.monotonic() >= deadline
+
+    @staticmethod
+    def _add_search_status(best_flight_result, all_flights_results):
+        best_flight_result['date_status'] = all_flights_results['date_status']
+        best_flight_result['deadline_exceeded'] = all_flights_results['deadline_exceeded']
+
+    @staticmethod
+    def _search_functions(user_filters_json):
+        # (search, event stream) for the kind of search; round trips use the first airports only
+        if is_round_trip(user_filters_json):
+            return search_round_trip, stream_round_trip_async
+        if is_multi_route(user_filters_json):
+            return search_multi_route, stream_multi_route_async
+        return search_flights_parallel, stream_flights_async
+
+    @staticmethod
+    def _analyzer_payload(all_flights_results):
+        # Only the flights that could make the top 10, as a table within the token budget
+        payload, _ = build_analyzer_payload(all_flights_results)
+        return payload
+
+    @staticmethod
+    def _lookup_filters(user_query):
+        # Rule-based parser first, then previously extracted filters for the same query today
+        user_filters = extract_query_fast_path(user_query)
+        if user_filters is None and query_cache is not None:
+            user_filters = query_cache.get(user_query)
+            if user_filters is not None:
+                logger.info("Query extraction served from cache")
+        return user_filters
+
+    @staticmethod
+    def _remember_filters(user_query, user_filters):
+        if query_cache is not None:
+            query_cache.set(user_query, user_filters)
+
+    @staticmethod
+    def _add_redirect_urls(best_flight_result):
+        #Adding a redirect URL
+        logger.info("Adding redirect URLs to flight results")
+        for each_results in best_flight_result['flight_search_results']:
+            if each_results.get('return_date'):
+                trip = f"%20returning%20{each_results['return_date']}%20round%20trip"
+            else:
+                trip = "%20one%20way"
+            redirect_url = f"https://www.google.com/travel/flights?q=Flights%20to%20{each_results['destination_airport']}%20from%20{each_results['origin_airport']}%20on%20{each_results['Date']}{trip}%20economy%20class&curr=INR"
+            each_results['redirect_url'] = redirect_url
+            logger.debug("Added redirect URL for flight: %s to %s", each_results['origin_airport'], each_results['destination_airport'])
+
 
 if __name__ == "__main__":
     logger.info("Starting main.py execution")
@@ -82,5 +294,5 @@ if __name__ == "__main__":
         # logger.debug(f"Final result: {best_flight_result}")
         
     except Exception as e:
-        logger.error(f"Error during main execution: {e}")
+        logger.error("Error during main execution: %s", e)
         raise
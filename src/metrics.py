@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Metrics configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Latency buckets in seconds, from cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Prometheus histogram with fixed buckets, one series per label combination
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Bucket counts (last one is +Inf), then sum
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labelvalues: list(values) for labelvalues, values in self._series.items()}
+        for labelvalues, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                labels = _labels(self.labelnames + ("le",), labelvalues + (_number(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {values[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter, one series per label combination
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labelvalues):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = dict(self._series)
+        for labelvalues, value in sorted(series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Counter or gauge read from existing stats at scrape time, so the hot path pays nothing
+
+    Args:
+        kind (str): 'counter' or 'gauge'
+        callback: Zero-argument callable returning a number, or a dict of
+            {label value: number} for a single label named `labelname`
+    """
+
+    def __init__(self, name, documentation, kind, callback, labelname=None):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.callback = callback
+        self.labelname = labelname
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as exc:
+            logger.warning("Metric %s could not be read: %r", self.name, exc)
+            return []
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if isinstance(value, dict):
+            for labelvalue, number in sorted(value.items()):
+                if number is not None:
+                    lines.append(f"{self.name}{_labels((self.labelname,), (labelvalue,))} {_number(number)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_duration = registry.register(Histogram(
+    "flight_search_stage_duration_seconds",
+    "Time spent in each stage of a flight search",
+    labelnames=("stage",),
+))
+date_duration = registry.register(Histogram(
+    "flight_date_duration_seconds",
+    "Time to produce one date's flights (process_date), by source",
+    labelnames=("source",),
+))
+upstream_duration = registry.register(Histogram(
+    "flight_upstream_request_duration_seconds",
+    "Google Flights request latency in fetch_date, excluding the rate-limiter wait and parsing",
+))
+analyzer_tokens = registry.register(Counter(
+    "flight_analyzer_prompt_tokens_total",
+    "Estimated analyzer prompt tokens sent, and saved by payload compaction",
+    labelnames=("kind",),
+))
+search_errors = registry.register(Counter(
+    "flight_search_errors_total",
+    "Searches that failed, by stage",
+    labelnames=("stage",),
+))
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a pipeline stage into flight_search_stage_duration_seconds,
+    counting it in flight_search_errors_total when it raises
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        search_errors.inc(1, stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.observe(elapsed, stage)
+        logger.debug("Stage %s took %.3fs", stage, elapsed)
+
+
+def observe(histogram, value, *labelvalues):
+    if METRICS_ENABLED:
+        histogram.observe(value, *labelvalues)
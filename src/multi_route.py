@@ -0,0 +1,212 @@
+import asyncio
+import os
+import uuid
+
+from src.airports import expand_airports
+from src import core
+from src.cache import make_flight_cache_key
+from src.logger import get_default_logger
+from src.pareto import ParetoFrontier
+from src.ranker import top_flights
+from src.scheduler import fetch_scheduler, INTERACTIVE
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Multi-airport search limits
+# Origin x destination pairs searched at most, closest to the primary airports first
+MULTI_ROUTE_MAX_ROUTES = int(os.getenv("MULTI_ROUTE_MAX_ROUTES", "12"))
+# Upstream fetches one search may make across all its routes; cached dates are free, 0 disables the budget
+MULTI_ROUTE_MAX_FETCHES = int(os.getenv("MULTI_ROUTE_MAX_FETCHES", "120"))
+
+
+def expand_routes(user_filters, max_routes=MULTI_ROUTE_MAX_ROUTES):
+    """
+    (origin, destination) pairs of a search: every airport of from_airport and
+    from_airports times every airport of to_airport and to_airports, with
+    metro codes expanded
+
+    Returns:
+        list: Routes, those of the first-listed airports first
+    """
+    origins = expand_airports([user_filters['from_airport'], *(user_filters.get('from_airports') or [])])
+    destinations = expand_airports([user_filters['to_airport'], *(user_filters.get('to_airports') or [])])
+    routes = sorted(((i, j) for i in range(len(origins)) for j in range(len(destinations))
+                     if origins[i] != destinations[j]), key=lambda pair: (max(pair), pair))
+    if len(routes) > max_routes:
+        logger.warning("Searching %d of %d routes", max_routes, len(routes))
+        routes = routes[:max_routes]
+    return [(origins[i], destinations[j]) for i, j in routes]
+
+
+def is_multi_route(user_filters):
+    routes = expand_routes(user_filters)
+    primary = (str(user_filters['from_airport']).strip().upper(), str(user_filters['to_airport']).strip().upper())
+    return bool(routes) and routes != [primary]
+
+
+def _route_filters(user_filters, route):
+    return dict(user_filters, from_airport=route[0], to_airport=route[1], from_airports=[], to_airports=[])
+
+
+def _spread(dates, count):
+    # `count` dates evenly spaced over the list, starting with the first
+    if count >= len(dates):
+        return list(dates)
+    return [dates[index * len(dates) // count] for index in range(count)]
+
+
+def plan_fetches(user_filters, routes, max_fetches=MULTI_ROUTE_MAX_FETCHES):
+    """
+    Dates to search per route within the upstream budget. Dates in the flight
+    cache are always searched as they need no upstream request. The budget is
+    split evenly across routes, routes needing less leaving the rest to the
+    others; a route that cannot get all its dates gets them evenly spread
+    over the requested range.
+
+    Returns:
+        tuple: ({route: dates}, [(route, date) left out])
+    """
+    dates = list(dict.fromkeys(user_filters['date_list']))
+    cached, uncached = {}, {}
+    for route in routes:
+        route_filters = _route_filters(user_filters, route)
+        cached[route] = {date for date in dates if core.flight_cache is not None
+                         and core.flight_cache.expires_in(make_flight_cache_key(route_filters, date)) is not None}
+        uncached[route] = [date for date in dates if date not in cached[route]]
+
+    if max_fetches <= 0:
+        quota = {route: len(uncached[route]) for route in routes}
+    else:
+        quota = {}
+        budget = max_fetches
+        pending = sorted(routes, key=lambda route: len(uncached[route]))
+        while pending:
+            route = pending.pop(0)
+            quota[route] = min(len(uncached[route]), budget // (len(pending) + 1))
+            budget -= quota[route]
+
+    plan, skipped = {}, []
+    for route in routes:
+        chosen = cached[route].union(_spread(uncached[route], quota[route]))
+        plan[route] = [date for date in dates if date in chosen]
+        skipped.extend((route, date) for date in dates if date not in chosen)
+    return plan, skipped
+
+
+def _tag(flight, route):
+    # Same flight content on another route is another flight
+    flight.update(from_airport=route[0], to_airport=route[1], id=f"{route[0]}-{route[1]}-{flight['id']}")
+
+
+async def stream_multi_route_async(user_filters, max_concurrency=10, request_id=None, priority=INTERACTIVE,
+                                   deadline=None, cancel_event=None, max_fetches=MULTI_ROUTE_MAX_FETCHES):
+    """
+    One-way search over several origin and destination airports. All routes
+    are fetched at once through the regular one-way search, as one request
+    of the fair scheduler (a wide search gets the same share as any other)
+    under one concurrency limit, and merged into one result. Upstream
+    requests are capped at `max_fetches` for the whole search; the dates
+    left out are reported with status 'budget_exceeded'.
+
+    Raises:
+        SchedulerOverloaded: When the fetch queue has no room for this search
+        SearchCancelled: When `cancel_event` is set
+
+    Yields:
+        dict: A 'routes' event with the plan, 'date' events carrying 'from_airport'
+              and 'to_airport', then a 'complete' event shaped like
+              stream_flights_async's plus 'multi_route' planning stats
+    """
+    routes = expand_routes(user_filters)
+    plan, skipped = plan_fetches(user_filters, routes, max_fetches)
+    planned = sum(len(dates) for dates in plan.values())
+    logger.info("Multi-route search: %d routes, %d route dates, %d left out by the budget",
+                len(routes), planned, len(skipped))
+    request_id = request_id or uuid.uuid4().hex
+    fetch_scheduler.admit(planned, priority)
+    yield {"event": "routes", "skipped": len(skipped), "dates_total": planned,
+           "routes": [{"from_airport": origin, "to_airport": destination, "dates": len(plan[(origin, destination)])}
+                      for origin, destination in routes]}
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    events = asyncio.Queue()
+
+    async def pump(route):
+        error = None
+        try:
+            route_filters = dict(_route_filters(user_filters, route), date_list=plan[route])
+            async for event in core.stream_flights_async(route_filters, request_id=request_id, priority=priority,
+                                                         deadline=deadline, cancel_event=cancel_event,
+                                                         semaphore=semaphore):
+                await events.put((route, event, None))
+        except Exception as exc:
+            error = exc
+        await events.put((route, None, error))
+
+    tasks = [asyncio.ensure_future(pump(route)) for route in routes if plan[route]]
+    flight_info, date_status = [], []
+    # Each route is its own search, so the frontier across routes is kept here
+    frontier = ParetoFrontier()
+    deadline_exceeded = False
+    running = len(tasks)
+    try:
+        while running:
+            route, event, error = await events.get()
+            if event is None:
+                running -= 1
+                if error is not None:
+                    raise error
+                continue
+            origin, destination = route
+            if event["event"] == "date":
+                for flight in event["flights"]:
+                    _tag(flight, route)
+                    frontier.add(flight)
+                event.update(from_airport=origin, to_airport=destination)
+                if "top_flights" in event:
+                    event["top_flights"] = [flight["id"] for flight in top_flights(frontier)]
+                yield event
+            elif event["event"] == "complete":
+                # Its flights are the ones already tagged in the date events
+                flight_info.extend(event["flight_info"])
+                date_status.extend(dict(status, from_airport=origin, to_airport=destination)
+                                   for status in event["date_status"])
+                deadline_exceeded = deadline_exceeded or event["deadline_exceeded"]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    for (origin, destination), date in skipped:
+        date_status.append({"status": "budget_exceeded", "attempts": 0, "hedged": False, "latency_seconds": None,
+                            "error": "upstream budget of the search exceeded", "date": date,
+                            "from_airport": origin, "to_airport": destination})
+    flight_info.sort(key=lambda flight: (flight["date"], flight["from_airport"], flight["to_airport"]))
+    yield {
+        "event": "complete",
+        "flight_info": flight_info,
+        "user_inputs": user_filters,
+        "date_status": sorted(date_status, key=lambda status: (status["date"], status["from_airport"],
+                                                               status["to_airport"])),
+        "deadline_exceeded": deadline_exceeded,
+        "top_flights": [flight["id"] for flight in top_flights(frontier)],
+        "multi_route": {
+            "routes": len(routes),
+            "route_dates": planned,
+            "route_dates_skipped": len(skipped),
+        },
+    }
+
+
+async def search_multi_route_async(user_filters, **kwargs):
+    async for event in stream_multi_route_async(user_filters, **kwargs):
+        if event["event"] == "complete":
+            return {key: value for key, value in event.items() if key != "event"}
+
+
+def search_multi_route(user_filters, max_workers=10, deadline=None, cancel_event=None):
+    """
+    Synchronous wrapper around search_multi_route_async, as core.search_flights_parallel
+    """
+    return asyncio.run(search_multi_route_async(user_filters, max_concurrency=max_workers,
+                                                deadline=deadline, cancel_event=cancel_event))
@@ -0,0 +1,92 @@
+import math
+from bisect import bisect_left, bisect_right
+
+from src.flight_table import parse_duration, parse_price
+
+
+def flight_objectives(flight):
+    """
+    (price, duration in minutes, stops) of a flight row, None when one is unknown.
+    Uses the numbers parsed at ingestion, falling back to the display strings.
+    """
+    price, duration, stops = flight.get('price_value'), flight.get('duration_minutes'), flight.get('stops')
+    if price is None:
+        price = parse_price(flight.get('price'))
+    if duration is None:
+        duration = parse_duration(flight.get('duration'))
+    if not isinstance(stops, int) or math.isnan(price) or math.isnan(duration):
+        return None
+    return price, duration, stops
+
+
+class ParetoFrontier:
+    """
+    Flights not dominated on (price, duration, stops), maintained as flights
+    arrive. A flight is dominated when another one is no worse on all three
+    and better on at least one; flights equal on all three are all kept.
+
+    Stops take few values, so the frontier is one staircase per stop count:
+    points sorted by price with strictly decreasing duration. Checking a
+    flight is a binary search per stop count; inserting it and removing the
+    points it dominates are list operations, linear in the staircase length.
+    src.ranker.top_flights ranks the frontier.
+    """
+
+    def __init__(self):
+        # stops -> [prices, durations, flights per point]
+        self._levels = {}
+        self.size = 0
+
+    def add(self, flight):
+        """
+        Offer a flight (a row with price, duration and stops, see flight_objectives)
+
+        Returns:
+            bool: Whether the flight is on the frontier now
+        """
+        objectives = flight_objectives(flight)
+        if objectives is None:
+            return False
+        price, duration, stops = objectives
+
+        for level_stops, (prices, durations, points) in self._levels.items():
+            if level_stops > stops:
+                continue
+            # Cheapest-or-equal point with the shortest duration among them
+            index = bisect_right(prices, price) - 1
+            if index >= 0 and durations[index] <= duration:
+                if level_stops == stops and prices[index] == price and durations[index] == duration:
+                    points[index].append(flight)
+                    self.size += 1
+                    return True
+                return False
+
+        for level_stops, (prices, durations, points) in self._levels.items():
+            if level_stops < stops:
+                continue
+            start = end = bisect_left(prices, price)
+            while end < len(prices) and durations[end] >= duration:
+                end += 1
+            if end > start:
+                self.size -= sum(len(group) for group in points[start:end])
+                del prices[start:end], durations[start:end], points[start:end]
+
+        prices, durations, points = self._levels.setdefault(stops, ([], [], []))
+        index = bisect_left(prices, price)
+        prices.insert(index, price)
+        durations.insert(index, duration)
+        points.insert(index, [flight])
+        self.size += 1
+        return True
+
+    def __len__(self):
+        return self.size
+
+    def frontier(self):
+        """
+        All frontier flights ordered by price, duration, stops, then date and id,
+        so the order does not depend on the order the flights arrived in
+        """
+        flights = [flight for _, _, points in self._levels.values() for group in points for flight in group]
+        return sorted(flights, key=lambda flight: (flight_objectives(flight), flight.get('date') or "",
+                                                   flight.get('return_date') or "", str(flight.get('id'))))
@@ -0,0 +1,204 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from src.flight_table import FlightTable
+from src.logger import get_default_logger
+from src.retry import LatencyTracker
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Parse configuration: 'thread' parses on the fetch thread, 'process' hands pages to a process pool
+FLIGHT_PARSE_MODE = os.getenv("FLIGHT_PARSE_MODE", "thread")
+FLIGHT_PARSE_WORKERS = int(os.getenv("FLIGHT_PARSE_WORKERS", str(os.cpu_count() or 1)))
+FLIGHT_PARSE_BATCH_SIZE = int(os.getenv("FLIGHT_PARSE_BATCH_SIZE", "8"))
+FLIGHT_PARSE_BATCH_WAIT_MS = float(os.getenv("FLIGHT_PARSE_BATCH_WAIT_MS", "5"))
+
+
+class _Page:
+    # Just enough of a response object for fast_flights.parse_response
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    @property
+    def text_markdown(self):
+        # Used by parse_response in its "No flights found" error
+        return self.text[:500]
+
+
+def parse_page(html):
+    """
+    Parse a Google Flights results page into a flight table
+
+    Args:
+        html (str): Page HTML returned by fetcher.fetch_page
+
+    Returns:
+        tuple: (FlightTable, current price level); an empty table and None for a date without flights
+    """
+    from fast_flights.core import parse_response
+
+    try:
+        result = parse_response(_Page(html))
+    except RuntimeError as exc:
+        # parse_response's answer for a date without flights; retrying cannot change it
+        if not str(exc).startswith("No flights found"):
+            raise
+        return FlightTable(), None
+    return FlightTable.from_flights(result.flights), result.current_price
+
+
+def _parse_batch(pages):
+    # Runs in a pool process; errors are returned per page so one bad page doesn't fail the batch
+    results = []
+    for html in pages:
+        start = time.perf_counter()
+        try:
+            value, ok = parse_page(html), True
+        except Exception as exc:
+            value, ok = exc, False
+        results.append((ok, value, time.perf_counter() - start))
+    return results
+
+
+class ParsePool:
+    """
+    Parses fetched pages in a process pool so CPU-bound parsing does not
+    hold the GIL shared with the fetch threads and the event loop. Pages
+    from concurrent fetches are handed off in batches of up to `batch_size`,
+    waiting at most `batch_wait` seconds for a batch to fill.
+
+    Args:
+        workers (int): Number of parser processes
+        batch_size (int): Maximum pages sent to a process at once
+        batch_wait (float): Seconds to wait for more pages before sending a partial batch
+    """
+
+    def __init__(self, workers=FLIGHT_PARSE_WORKERS, batch_size=FLIGHT_PARSE_BATCH_SIZE,
+                 batch_wait=FLIGHT_PARSE_BATCH_WAIT_MS / 1000):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._executor = None
+        self._dispatcher = None
+        self._pending = []
+        self._condition = threading.Condition()
+        self._shutdown = False
+        # Hand-off overhead per page: time in the pool minus time spent parsing
+        self.overhead = LatencyTracker(min_samples=1)
+        self.parse_time = LatencyTracker(min_samples=1)
+        self.items = 0
+        self.batches = 0
+
+    def _start(self):
+        # Spawned lazily: 'spawn' avoids forking a process that already runs threads
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self._dispatcher = threading.Thread(target=self._dispatch, name="flight-parse-dispatch", daemon=True)
+        self._dispatcher.start()
+        logger.info("Started parse pool: %d processes, batch size %d", self.workers, self.batch_size)
+
+    def parse(self, html):
+        """
+        Parse a page in the pool, blocking the calling thread until it is done
+
+        Returns:
+            tuple: (FlightTable, current price level), as parse_page
+        """
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Parse pool is shut down")
+            if self._executor is None:
+                self._start()
+            self._pending.append((html, future, time.monotonic()))
+            self._condition.notify_all()
+        return future.result()
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._shutdown:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # Give concurrent fetches a moment to fill the batch
+                deadline = time.monotonic() + self.batch_wait
+                while len(self._pending) < self.batch_size and not self._shutdown:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                self.batches += 1
+                self.items += len(batch)
+            try:
+                pool_future = self._executor.submit(_parse_batch, [html for html, _, _ in batch])
+            except Exception as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+            pool_future.add_done_callback(lambda done, batch=batch: self._deliver(batch, done))
+
+    def _deliver(self, batch, pool_future):
+        if pool_future.exception() is not None:
+            for _, future, _ in batch:
+                future.set_exception(pool_future.exception())
+            return
+        now = time.monotonic()
+        for (_, future, submitted), (ok, value, parse_seconds) in zip(batch, pool_future.result()):
+            self.parse_time.record(parse_seconds)
+            self.overhead.record(max(0.0, now - submitted - parse_seconds))
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def shutdown(self):
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._condition:
+            stats = {
+                "workers": self.workers,
+                "batch_size": self.batch_size,
+                "items": self.items,
+                "batches": self.batches,
+                "avg_batch_size": self.items / self.batches if self.batches else None,
+                "queued": len(self._pending),
+            }
+        stats.update({
+            "parse_p50_seconds": self.parse_time.percentile(50),
+            "overhead_p50_seconds": self.overhead.percentile(50),
+            "overhead_p95_seconds": self.overhead.percentile(95),
+        })
+        return stats
+
+
+def create_parse_pool(mode=FLIGHT_PARSE_MODE) -> Optional[ParsePool]:
+    """
+    Create the parse pool for 'process' mode
+
+    Returns:
+        ParsePool or None: None when pages are parsed on the fetch threads
+    """
+    if mode != "process":
+        return None
+    return ParsePool()
+
+
+# Process-wide pool, None in 'thread' mode
+parse_pool = create_parse_pool()
@@ -0,0 +1,102 @@
+import calendar
+import os
+from datetime import date as Date
+
+from src import core
+from src.cache import make_flight_cache_key
+from src.fare_index import fare_index
+from src.logger import get_default_logger
+from src.scheduler import INTERACTIVE
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Largest calendar served in one request
+PRICE_CALENDAR_MAX_MONTHS = int(os.getenv("PRICE_CALENDAR_MAX_MONTHS", "6"))
+
+
+def calendar_dates(months, today=None):
+    """
+    Every date of the given months, from today on
+
+    Args:
+        months (list): Months as 'yyyy-mm'
+
+    Raises:
+        ValueError: For a malformed month or more than PRICE_CALENDAR_MAX_MONTHS months
+    """
+    if len(months) > PRICE_CALENDAR_MAX_MONTHS:
+        raise ValueError(f"At most {PRICE_CALENDAR_MAX_MONTHS} months per calendar")
+    today = today or Date.today()
+    dates = []
+    for month in dict.fromkeys(months):
+        try:
+            year, number = (int(part) for part in month.split("-"))
+            days = calendar.monthrange(year, number)[1]
+        except (ValueError, calendar.IllegalMonthError):
+            raise ValueError(f"Invalid month {month!r}, expected yyyy-mm")
+        dates.extend(Date(year, number, day) for day in range(1, days + 1))
+    return [day.isoformat() for day in sorted(dates) if day >= today]
+
+
+def _indexed_fare(user_filters, day):
+    entry = fare_index.get(user_filters, day)
+    if entry is None and core.flight_cache is not None:
+        # Still in the flight cache, e.g. after the fare index evicted it
+        cached = core.flight_cache.get(make_flight_cache_key(user_filters, day))
+        if cached is not None:
+            entry = fare_index.record(user_filters, day, cached["flights"], cached["price"])
+    return entry
+
+
+async def price_calendar_async(user_filters, months, request_id=None, priority=INTERACTIVE, deadline=None):
+    """
+    Cheapest and median one-way fare per date for a route, served from the
+    fare index. Only dates missing from it (never fetched, or older than
+    FARE_INDEX_TTL_SECONDS) are fetched, through the regular one-way search.
+
+    Args:
+        user_filters (dict): FlightQueryData fields; date_list is ignored
+        months (list): Months as 'yyyy-mm'
+
+    Raises:
+        ValueError: For invalid months
+        SchedulerOverloaded: When stale dates cannot be queued
+
+    Returns:
+        dict: 'dates' (one entry per date with 'min_fare', 'median_fare', 'flights',
+              'price_level', 'updated_at' and 'source'), 'cheapest', 'refreshed'
+    """
+    user_filters = dict(user_filters, trip_type="one-way")
+    dates = calendar_dates(months)
+    fares = {}
+    stale = []
+    for day in dates:
+        entry = _indexed_fare(user_filters, day)
+        if entry is None:
+            stale.append(day)
+        else:
+            fares[day] = dict(entry, source="index")
+
+    if stale:
+        logger.info("Price calendar: %d of %d dates stale, fetching them", len(stale), len(dates))
+        async for event in core.stream_flights_async(dict(user_filters, date_list=stale),
+                                                     request_id=request_id, priority=priority, deadline=deadline):
+            if event["event"] != "date":
+                continue
+            entry = fare_index.get(user_filters, event["date"])
+            if entry is not None:
+                fares[event["date"]] = dict(entry, source="fetched")
+            else:
+                fares[event["date"]] = {"date": event["date"], "min_fare": None, "median_fare": None, "flights": 0,
+                                        "price_level": None, "updated_at": None, "source": event["status"]}
+
+    days = [fares[day] for day in dates if day in fares]
+    priced = [day for day in days if day["min_fare"] is not None]
+    return {
+        "from_airport": user_filters["from_airport"],
+        "to_airport": user_filters["to_airport"],
+        "dates": days,
+        "cheapest": min(priced, key=lambda day: (day["min_fare"], day["date"])) if priced else None,
+        "refreshed": len(stale),
+    }
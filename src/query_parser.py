@@ -0,0 +1,334 @@
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+
+from src.airports import AIRLINE_ALIASES, CITY_TO_IATA, CITY_TO_METRO, KNOWN_IATA_CODES, METRO_AIRPORTS
+from src.core import get_dates_for_month
+from src.json_schema import FlightQueryData
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Fast-path configuration
+QUERY_FAST_PATH_ENABLED = os.getenv("QUERY_FAST_PATH_ENABLED", "true").lower() == "true"
+QUERY_FAST_PATH_MIN_CONFIDENCE = float(os.getenv("QUERY_FAST_PATH_MIN_CONFIDENCE", "0.8"))
+# Longest date range the fast path expands on its own
+MAX_RANGE_DAYS = 92
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3,
+    "april": 4, "apr": 4, "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7,
+    "august": 8, "aug": 8, "september": 9, "sep": 9, "sept": 9, "october": 10, "oct": 10,
+    "november": 11, "nov": 11, "december": 12, "dec": 12,
+}
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+TIME_OF_DAY = ("morning", "afternoon", "evening", "night")
+
+_MONTH = r"(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(\d{4}))?"
+_COUNT = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[/.](\d{1,2})[/.](\d{4})\b")
+_DAY_RANGE_RE = re.compile(r"\b" + _DAY + r"\s*(?:-|to|till|until|and)\s*" + _DAY + r"(?:\s+of)?\s+" + _MONTH + _YEAR + r"\b")
+_DAY_MONTH_RE = re.compile(r"\b" + _DAY + r"(?:\s+of)?\s+" + _MONTH + _YEAR + r"\b")
+_MONTH_DAY_RE = re.compile(r"\b" + _MONTH + r"\s+" + _DAY + r"\b" + _YEAR)
+_WHOLE_MONTH_RE = re.compile(r"(?:\b(in|for|during|of|whole|entire|month)\s+)?\b" + _MONTH + r"\b" + _YEAR)
+_RANGE_CONNECTOR_RE = re.compile(r"^\s*(?:-|to|till|until|and|through)\s*$")
+_RELATIVE_DAY_RE = re.compile(r"\b(today|tomorrow|day after tomorrow)\b")
+
+_ADULTS_RE = re.compile(r"\b" + _COUNT + r"\s+(?:adults?|persons?|people|passengers?|pax|travell?ers?)\b")
+_CHILDREN_RE = re.compile(r"\b" + _COUNT + r"\s+(?:child|children|kids?)\b")
+_INFANTS_RE = re.compile(r"\b" + _COUNT + r"\s+(?:infants?|bab(?:y|ies))\b")
+_STOPS_RE = re.compile(r"\b(?:max(?:imum)?\s+)?" + _COUNT + r"\s+stops?\b")
+_NONSTOP_RE = re.compile(r"\b(?:non[- ]?stop|direct)\b")
+# Group phrasings whose passenger count the fast path cannot work out
+_GROUP_RE = re.compile(r"\b(?:family|families|couple|we|us|our|me and my|myself and|with my|with our)\b")
+
+# Phrases the fast path does not model; their presence sends the query to the LLM
+_UNSUPPORTED_RE = re.compile(
+    r"\b(?:round[- ]?trip|return(?:ing)?|back on|come back|weekends?|next week|this week|"
+    r"or|except|excluding|not on|before|after|around|flexible|multi[- ]city)\b"
+)
+
+_CITY_RE = re.compile(r"\b(" + "|".join(re.escape(city) for city in sorted(CITY_TO_IATA, key=len, reverse=True)) + r")\b")
+_IATA_RE = re.compile(r"\b([A-Za-z]{3})\b")
+# "any London airport", "all airports in Paris": the city's metro code is searched
+_CITY_ALTERNATION = "|".join(re.escape(city) for city in sorted(CITY_TO_IATA, key=len, reverse=True))
+_METRO_PHRASE_RE = re.compile(
+    r"\b(?:any|all|every)\s+(?:of\s+)?(?:the\s+)?(" + _CITY_ALTERNATION + r")\s+airports?\b"
+    r"|\b(?:any|all|every)\s+airports?\s+(?:in|of|around|near)\s+(" + _CITY_ALTERNATION + r")\b"
+)
+# Other phrasings accepting several airports, left to the LLM
+_MULTI_AIRPORT_RE = re.compile(r"\b(?:any|all|every|either|nearby)\b(?:\s+\S+){0,3}?\s+airports?\b")
+_AIRLINE_RE = re.compile(r"\b(" + "|".join(re.escape(name) for name in sorted(AIRLINE_ALIASES, key=len, reverse=True)) + r")\b")
+
+
+class FastPathStats:
+    """
+    Thread-safe counters of how often the rule-based parser answered a query
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fallbacks = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.fallbacks += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.fallbacks
+            return {
+                "fast_path_hits": self.hits,
+                "llm_fallbacks": self.fallbacks,
+                "fast_path_ratio": self.hits / total if total else 0.0,
+            }
+
+
+fast_path_stats = FastPathStats()
+
+
+def _count(token):
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _resolve_year(month, day, year, today):
+    # Without an explicit year pick the next occurrence of the date
+    if year:
+        return int(year)
+    if (month, day) < (today.month, today.day):
+        return today.year + 1
+    return today.year
+
+
+def _safe_date(year, month, day):
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _extract_airports(text, original):
+    # Collect (position, code) for every city name and known IATA code
+    mentions = []
+    taken = []
+    for match in _METRO_PHRASE_RE.finditer(text):
+        city = match.group(1) or match.group(2)
+        # Placed at the start of the phrase, so "from any London airport" still reads as the origin
+        mentions.append((match.start(), CITY_TO_METRO.get(city, CITY_TO_IATA[city])))
+        taken.append(match.span())
+    for match in _CITY_RE.finditer(text):
+        if any(start <= match.start() < end for start, end in taken):
+            continue
+        mentions.append((match.start(), CITY_TO_IATA[match.group(1)]))
+        taken.append(match.span())
+    for match in _IATA_RE.finditer(original):
+        code = match.group(1).upper()
+        inside_city = any(start <= match.start() < end for start, end in taken)
+        # Only accept codes typed in upper case to avoid matching ordinary words
+        if (code in KNOWN_IATA_CODES or code in METRO_AIRPORTS) and match.group(1).isupper() and not inside_city:
+            mentions.append((match.start(), code))
+    mentions.sort()
+
+    origin = destination = None
+    unassigned = []
+    for position, code in mentions:
+        preceding = text[:position].split()[-1:] or [""]
+        if preceding[0] == "from" and origin is None:
+            origin = code
+        elif preceding[0] == "to" and destination is None:
+            destination = code
+        else:
+            unassigned.append(code)
+    for code in unassigned:
+        if origin is None:
+            origin = code
+        elif destination is None and code != origin:
+            destination = code
+
+    distinct = {code for _, code in mentions}
+    return origin, destination, len(distinct)
+
+
+def _extract_dates(text, today):
+    # Returns the sorted list of upcoming dates mentioned in the query
+    dates = set()
+    spans = []
+
+    def overlaps(span):
+        return any(span[0] < end and start < span[1] for start, end in spans)
+
+    def add_range(start, end):
+        if start is None or end is None or end < start or (end - start).days > MAX_RANGE_DAYS:
+            return False
+        for offset in range((end - start).days + 1):
+            dates.add(start + timedelta(days=offset))
+        return True
+
+    for match in _DAY_RANGE_RE.finditer(text):
+        month = MONTHS[match.group(3)]
+        first_day, last_day = int(match.group(1)), int(match.group(2))
+        year = _resolve_year(month, first_day, match.group(4), today)
+        if add_range(_safe_date(year, month, first_day), _safe_date(year, month, last_day)):
+            spans.append(match.span())
+
+    explicit = []
+    for match in _ISO_DATE_RE.finditer(text):
+        if not overlaps(match.span()):
+            explicit.append((match.span(), _safe_date(match.group(1), match.group(2), match.group(3))))
+    for match in _NUMERIC_DATE_RE.finditer(text):
+        if not overlaps(match.span()):
+            explicit.append((match.span(), _safe_date(match.group(3), match.group(2), match.group(1))))
+    for match in _DAY_MONTH_RE.finditer(text):
+        if not overlaps(match.span()):
+            month, day = MONTHS[match.group(2)], int(match.group(1))
+            explicit.append((match.span(), _safe_date(_resolve_year(month, day, match.group(3), today), month, day)))
+    for match in _MONTH_DAY_RE.finditer(text):
+        if not overlaps(match.span()) and not any(
+                span[0] < match.end() and match.start() < span[1] for span, _ in explicit):
+            month, day = MONTHS[match.group(1)], int(match.group(2))
+            explicit.append((match.span(), _safe_date(_resolve_year(month, day, match.group(3), today), month, day)))
+    explicit.sort(key=lambda item: item[0])
+
+    if any(parsed is None for _, parsed in explicit):
+        return []
+    if len(explicit) == 2 and _RANGE_CONNECTOR_RE.match(text[explicit[0][0][1]:explicit[1][0][0]]):
+        if not add_range(explicit[0][1], explicit[1][1]):
+            return []
+    else:
+        dates.update(parsed for _, parsed in explicit)
+    spans.extend(span for span, _ in explicit)
+
+    for match in _RELATIVE_DAY_RE.finditer(text):
+        dates.add(today + timedelta(days={"today": 0, "tomorrow": 1}.get(match.group(1), 2)))
+        spans.append(match.span())
+
+    for match in _WHOLE_MONTH_RE.finditer(text):
+        if overlaps(match.span()):
+            continue
+        lead, month_name, year = match.group(1), match.group(2), match.group(3)
+        # Short or ambiguous names ('may', 'mar') only count with a lead-in word or a year
+        if not lead and not year and (len(month_name) <= 4 or month_name == "march"):
+            continue
+        month = MONTHS[month_name]
+        if not year:
+            year = today.year + 1 if month < today.month else today.year
+        month_year = datetime(int(year), month, 1).strftime("%B %Y")
+        dates.update(datetime.strptime(day, "%Y-%m-%d").date() for day in get_dates_for_month(month_year))
+        spans.append(match.span())
+
+    upcoming = sorted(day for day in dates if day >= today)
+    return [day.strftime("%Y-%m-%d") for day in upcoming]
+
+
+def parse_query(user_query, today=None):
+    """
+    Parse common flight search phrasings without an LLM call
+
+    Args:
+        user_query (str): Natural-language query, e.g. "Bangalore to Ahmedabad in June 2025 for 1 adult"
+        today (date): Reference date for relative and year-less dates (default: today)
+
+    Returns:
+        tuple: (FlightQueryData or None, confidence between 0 and 1)
+    """
+    today = today or date.today()
+    text = " ".join(user_query.lower().replace(",", " , ").split())
+
+    origin, destination, airport_count = _extract_airports(text, user_query)
+    if origin is None or destination is None or origin == destination:
+        return None, 0.0
+
+    date_list = _extract_dates(text, today)
+    if not date_list:
+        return None, 0.0
+
+    confidence = 1.0
+    # A third airport or phrases we do not model make the parse unreliable
+    if airport_count > 2:
+        confidence -= 0.5
+    if _UNSUPPORTED_RE.search(text):
+        confidence -= 0.5
+    if _MULTI_AIRPORT_RE.search(_METRO_PHRASE_RE.sub(" ", text)):
+        confidence -= 0.5
+
+    adults = _ADULTS_RE.search(text)
+    children = _CHILDREN_RE.search(text)
+    infants = _INFANTS_RE.search(text)
+    stops = _STOPS_RE.search(text)
+    # "a family of four" would otherwise be searched for a single adult
+    if adults is None and _GROUP_RE.search(text):
+        confidence -= 0.5
+
+    if "premium economy" in text:
+        seat = "premium-economy"
+    elif "business" in text:
+        seat = "business"
+    elif "first class" in text:
+        seat = "first"
+    else:
+        seat = "economy"
+
+    if _NONSTOP_RE.search(text):
+        max_stops = 0
+    elif stops:
+        max_stops = _count(stops.group(1))
+    else:
+        max_stops = 1
+
+    airlines = []
+    for match in _AIRLINE_RE.finditer(text):
+        name = AIRLINE_ALIASES[match.group(1)]
+        if name not in airlines:
+            airlines.append(name)
+
+    query_data = FlightQueryData(
+        from_airport=origin,
+        to_airport=destination,
+        adults=_count(adults.group(1)) if adults else 1,
+        children=_count(children.group(1)) if children else 0,
+        infants_on_lap=_count(infants.group(1)) if infants else 0,
+        trip_type="one-way",
+        seat=seat,
+        date_list=date_list,
+        specific_flight_provider=airlines,
+        flight_time_type=[word for word in TIME_OF_DAY if re.search(r"\b" + word + r"\b", text)],
+        max_stops=max_stops,
+    )
+    return query_data, max(confidence, 0.0)
+
+
+def extract_query_fast_path(user_query, today=None, min_confidence=QUERY_FAST_PATH_MIN_CONFIDENCE):
+    """
+    Try the rule-based parser and record whether it could answer
+
+    Returns:
+        FlightQueryData or None: Parsed filters, None when the LLM should be used
+    """
+    if not QUERY_FAST_PATH_ENABLED:
+        return None
+    try:
+        query_data, confidence = parse_query(user_query, today)
+    except Exception as exc:
+        logger.warning("Fast-path query parser failed: %r", exc)
+        query_data, confidence = None, 0.0
+
+    hit = query_data is not None and confidence >= min_confidence
+    fast_path_stats.record(hit)
+    if hit:
+        logger.info("Fast-path parsed query with confidence %.2f", confidence)
+        return query_data
+    logger.info("Fast-path confidence %.2f below %s, falling back to LLM", confidence, min_confidence)
+    return None
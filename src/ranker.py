@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+
+from src.flight_table import parse_departure
+from src.json_schema import FlightResponse, FlightSearchResult
+from src.logger import get_default_logger
+from src.pareto import ParetoFrontier, flight_objectives
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Ranker configuration: 'llm' keeps the analyzer agent, 'deterministic' uses rank_flights
+FLIGHT_RANKER = os.getenv("FLIGHT_RANKER", "llm").lower()
+
+DEFAULT_WEIGHTS = {
+    "price": float(os.getenv("FLIGHT_RANK_PRICE_WEIGHT", "0.5")),
+    "duration": float(os.getenv("FLIGHT_RANK_DURATION_WEIGHT", "0.3")),
+    "stops": float(os.getenv("FLIGHT_RANK_STOPS_WEIGHT", "0.2")),
+}
+
+def parsed_number(flight, number_key, text_key, parse):
+    """
+    A flight's number parsed at ingestion (e.g. 'price_value'), falling back to
+    parsing its display string (e.g. 'price' with flight_table.parse_price)
+    """
+    value = flight.get(number_key)
+    if value is None:
+        return parse(flight[text_key])
+    return value
+
+
+def _normalize(values):
+    # Min-max scale to [0, 1]; missing values rank last
+    finite = np.isfinite(values)
+    if not finite.any():
+        return np.ones_like(values)
+    low = values[finite].min()
+    span = values[finite].max() - low
+    scaled = (values - low) / span if span > 0 else np.zeros_like(values)
+    return np.where(finite, scaled, 1.0)
+
+
+def score_flights(price, duration, stops, weights=None):
+    """
+    Compute the weighted score for each flight (lower is better)
+
+    Args:
+        price (np.ndarray): Prices
+        duration (np.ndarray): Durations in minutes
+        stops (np.ndarray): Number of stops
+        weights (dict): Weights for 'price', 'duration' and 'stops' (default: DEFAULT_WEIGHTS)
+
+    Returns:
+        np.ndarray: Score per flight
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    return (weights["price"] * _normalize(price)
+            + weights["duration"] * _normalize(duration)
+            + weights["stops"] * _normalize(stops))
+
+
+def top_flights(frontier, k=10, weights=None):
+    """
+    The k best flights of a ParetoFrontier by weighted score, normalized over
+    the frontier. Dominated flights never make it, so fewer than k may be
+    returned. The streamed top_flights and rank_flights both rank this way,
+    so the running best and the final answer agree.
+
+    Returns:
+        list: Flights ranked best to least-best
+    """
+    flights = frontier.frontier()
+    if not flights:
+        return []
+    count = len(flights)
+    price, duration, stops = (np.array(column, dtype=float) for column in zip(*map(flight_objectives, flights)))
+    departure = np.fromiter((parsed_number(flight, 'departure_minutes', 'departure', parse_departure) for flight in flights),
+                            dtype=float, count=count)
+    score = score_flights(price, duration, stops, weights)
+    # np.lexsort uses the last key as the primary one; NaNs sort last
+    order = np.lexsort((departure, stops, duration, price, score))[:k]
+    return [flights[index] for index in order]
+
+
+def rank_flights(all_flights_results, weights=None, top_k=10):
+    """
+    Deterministic replacement for the flight analyzer agent: the top_flights
+    of the Pareto frontier of all flights
+
+    Args:
+        all_flights_results (dict): Output of search_flights_parallel ('flight_info', 'user_inputs')
+        weights (dict): Optional weights for 'price', 'duration' and 'stops'
+        top_k (int): Number of flights to return (default: 10)
+
+    Returns:
+        FlightResponse: Top flights ranked best to least-best
+    """
+    user_inputs = all_flights_results['user_inputs']
+    frontier = ParetoFrontier()
+    for flight in all_flights_results['flight_info']:
+        frontier.add(flight)
+    if not len(frontier):
+        logger.info("No flights to rank")
+        return FlightResponse(flight_search_results=[])
+
+    ranked = top_flights(frontier, top_k, weights)
+    logger.info("Ranked %d flights deterministically (%d on the Pareto frontier), returning top %d",
+                len(all_flights_results['flight_info']), len(frontier), len(ranked))
+
+    return FlightResponse(flight_search_results=[
+        FlightSearchResult(
+            flight_vendor=flight['name'],
+            departure=flight['departure'],
+            arrival=flight['arrival'],
+            origin_airport=flight.get('from_airport') or user_inputs['from_airport'],
+            destination_airport=flight.get('to_airport') or user_inputs['to_airport'],
+            Date=flight['date'],
+            stops=flight['stops'],
+            price=flight['price'],
+            arrival_time_ahead=flight['arrival_time_ahead'],
+            duration=flight['duration'],
+            return_date=flight.get('return_date'),
+        )
+        for flight in ranked
+    ])
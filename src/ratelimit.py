@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Upstream limiter configuration
+UPSTREAM_RATE_PER_SECOND = float(os.getenv("UPSTREAM_RATE_PER_SECOND", "5"))
+UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", "10"))
+UPSTREAM_CONCURRENCY_INITIAL = int(os.getenv("UPSTREAM_CONCURRENCY_INITIAL", "8"))
+UPSTREAM_CONCURRENCY_MIN = int(os.getenv("UPSTREAM_CONCURRENCY_MIN", "1"))
+UPSTREAM_CONCURRENCY_MAX = int(os.getenv("UPSTREAM_CONCURRENCY_MAX", "32"))
+UPSTREAM_LATENCY_SPIKE_RATIO = float(os.getenv("UPSTREAM_LATENCY_SPIKE_RATIO", "2.5"))
+
+
+class FetchCancelled(Exception):
+    """Raised by UpstreamLimiter.slot when the caller gave up while waiting for it"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `capacity` stored
+    """
+
+    def __init__(self, rate=UPSTREAM_RATE_PER_SECOND, capacity=UPSTREAM_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waits = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Block until `tokens` are available and take them
+        """
+        waited = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    if waited:
+                        self.waits += 1
+                    return
+                delay = (tokens - self._tokens) / self.rate
+            waited = True
+            time.sleep(delay)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit: grows by roughly one slot per `limit` successful
+    calls and halves on an error or a latency spike (latency above
+    `spike_ratio` times its moving average), at most once per cooldown.
+    """
+
+    def __init__(self, initial=UPSTREAM_CONCURRENCY_INITIAL, minimum=UPSTREAM_CONCURRENCY_MIN,
+                 maximum=UPSTREAM_CONCURRENCY_MAX, spike_ratio=UPSTREAM_LATENCY_SPIKE_RATIO,
+                 decrease_factor=0.5, cooldown=2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.spike_ratio = spike_ratio
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._in_flight = 0
+        self._latency_ewma = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self.successes = 0
+        self.errors = 0
+        self.decreases = 0
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, success, latency):
+        """
+        Args:
+            success (bool): Outcome of the call, None when no request was sent
+            latency (float): Duration of the call in seconds
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if success is None:
+                self._condition.notify_all()
+                return
+            spike = (success and self._latency_ewma is not None
+                     and latency > self._latency_ewma * self.spike_ratio)
+            if success:
+                self.successes += 1
+                self._latency_ewma = latency if self._latency_ewma is None else 0.9 * self._latency_ewma + 0.1 * latency
+            else:
+                self.errors += 1
+
+            now = time.monotonic()
+            if not success or spike:
+                if now - self._last_decrease >= self.cooldown:
+                    previous = self._limit
+                    self._limit = max(self.minimum, self._limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self.decreases += 1
+                    logger.warning("Upstream concurrency reduced %.1f -> %.1f (%s)", previous, self._limit,
+                                   "error" if not success else "latency spike")
+            else:
+                self._limit = min(self.maximum, self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "latency_ewma_seconds": self._latency_ewma,
+                "successes": self.successes,
+                "errors": self.errors,
+                "decreases": self.decreases,
+            }
+
+
+class UpstreamLimiter:
+    """
+    Process-wide gate for Google Flights requests: a token bucket caps the
+    request rate and an adaptive limiter caps concurrency.
+    """
+
+    def __init__(self, bucket=None, concurrency=None):
+        self.bucket = bucket or TokenBucket()
+        self.concurrency = concurrency or AdaptiveConcurrencyLimiter()
+
+    @contextmanager
+    def slot(self, cancelled=None):
+        """
+        Wait for a concurrency slot and a token, then time the wrapped call.
+        When `cancelled` (threading.Event) is set by then, the slot is given
+        back without counting as a call and FetchCancelled is raised.
+        """
+        self.concurrency.acquire()
+        success = None
+        start = time.monotonic()
+        try:
+            self.bucket.acquire()
+            if cancelled is not None and cancelled.is_set():
+                raise FetchCancelled("Search was cancelled while the fetch waited for the upstream limiter")
+            success = False
+            start = time.monotonic()
+            yield
+            success = True
+        finally:
+            self.concurrency.release(success, time.monotonic() - start)
+
+    def stats(self):
+        stats = self.concurrency.stats()
+        stats.update({
+            "rate_per_second": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "tokens_available": self.bucket.available(),
+            "rate_limited_waits": self.bucket.waits,
+        })
+        return stats
+
+
+# Shared by every search in the process
+upstream_limiter = UpstreamLimiter()
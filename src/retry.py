@@ -0,0 +1,210 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from src.logger import get_default_logger
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Per-date fetch policy
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "20"))
+FETCH_MAX_RETRIES = int(os.getenv("FETCH_MAX_RETRIES", "2"))
+FETCH_BACKOFF_BASE_SECONDS = float(os.getenv("FETCH_BACKOFF_BASE_SECONDS", "0.5"))
+FETCH_BACKOFF_MAX_SECONDS = float(os.getenv("FETCH_BACKOFF_MAX_SECONDS", "8"))
+FETCH_HEDGE_ENABLED = os.getenv("FETCH_HEDGE_ENABLED", "false").lower() == "true"
+FETCH_HEDGE_PERCENTILE = float(os.getenv("FETCH_HEDGE_PERCENTILE", "95"))
+FETCH_HEDGE_MIN_SAMPLES = int(os.getenv("FETCH_HEDGE_MIN_SAMPLES", "20"))
+
+# Errors caused by the request itself; retrying them cannot help
+NON_RETRYABLE_ERRORS = (AttributeError, TypeError, ValueError, KeyError)
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent upstream fetch latencies
+    """
+
+    def __init__(self, window=512, min_samples=FETCH_HEDGE_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, percentile):
+        """
+        Latency at the given percentile, None until enough samples were recorded
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class RetryStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            }
+
+
+# Upstream network latencies recorded by core.fetch_date, used to pick the hedge delay
+fetch_latency = LatencyTracker()
+retry_stats = RetryStats()
+
+
+def backoff_delay(attempt, base=FETCH_BACKOFF_BASE_SECONDS, cap=FETCH_BACKOFF_MAX_SECONDS):
+    """
+    Full-jitter exponential backoff before retry number `attempt` (0-based)
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def start_signal(event):
+    """
+    Callable for a fetch thread to report that its upstream request is starting
+
+    Args:
+        event (asyncio.Event): Set on the event loop that created it
+    """
+    loop = asyncio.get_running_loop()
+
+    def signal():
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # The search already finished and its loop is closed
+            pass
+
+    return signal
+
+
+async def _attempt(primary, hedge, timeout, hedge_delay):
+    # One attempt: start primary, add a hedge hedge_delay after primary's request
+    # started, first success wins. Time queued for a worker or for the upstream
+    # limiter does not count against the timeout.
+    loop = asyncio.get_running_loop()
+    started = asyncio.Event()
+    primary_task = asyncio.ensure_future(primary(started))
+    pending = {primary_task}
+    hedged = False
+    last_error = None
+    try:
+        start_waiter = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait({primary_task, start_waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            start_waiter.cancel()
+        deadline = loop.time() + timeout
+        if hedge is not None and hedge_delay is not None and hedge_delay < timeout and not primary_task.done():
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                pending.add(asyncio.ensure_future(hedge(asyncio.Event())))
+                hedged = True
+                retry_stats.add(hedges=1)
+
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary_task:
+                        retry_stats.add(hedge_wins=1)
+                    return task.result(), hedged
+                last_error = task.exception()
+    finally:
+        # Abandon whatever is still running; executor threads finish on their own
+        for task in pending:
+            task.cancel()
+
+    if last_error is not None and not pending:
+        raise last_error
+    raise asyncio.TimeoutError(f"no response within {timeout}s")
+
+
+async def fetch_with_retries(primary, fresh=None, label="", timeout=FETCH_TIMEOUT_SECONDS,
+                             max_retries=FETCH_MAX_RETRIES, hedging=FETCH_HEDGE_ENABLED):
+    """
+    Run a fetch with a per-attempt timeout, jittered exponential backoff
+    between attempts and optional hedging past the p95 upstream latency
+
+    Args:
+        primary: Callable returning an awaitable for the first attempt. It is passed
+            an asyncio.Event to set (see start_signal) when the upstream request
+            starts; the attempt's timeout runs from then
+        fresh: Callable like primary whose awaitable always sends a new
+            upstream request; used for hedges and for retries, so a retry never
+            waits on the call that just timed out (default: primary)
+        label (str): Name used in logs (usually the date)
+        timeout (float): Per-attempt timeout in seconds, from the start of the upstream request
+        max_retries (int): Retries after the first attempt
+        hedging (bool): Whether to launch hedge requests
+
+    Returns:
+        tuple: (result or None, status dict with 'status', 'attempts', 'hedged',
+               'latency_seconds' and 'error')
+    """
+    start = time.monotonic()
+    status = {"status": "error", "attempts": 0, "hedged": False, "latency_seconds": None, "error": None}
+    for attempt in range(max_retries + 1):
+        if attempt:
+            delay = backoff_delay(attempt - 1)
+            retry_stats.add(retries=1)
+            logger.warning("Retrying %s in %.2fs (attempt %d/%d)", label, delay, attempt + 1, max_retries + 1)
+            await asyncio.sleep(delay)
+
+        status["attempts"] = attempt + 1
+        call = primary if attempt == 0 or fresh is None else fresh
+        hedge_delay = fetch_latency.percentile(FETCH_HEDGE_PERCENTILE) if hedging else None
+        try:
+            result, hedged = await _attempt(call, fresh if hedging else None, timeout, hedge_delay)
+        except asyncio.TimeoutError as exc:
+            retry_stats.add(timeouts=1)
+            status.update(status="timeout", error=str(exc))
+            logger.warning("Fetch for %s timed out after %ss", label, timeout)
+            continue
+        except NON_RETRYABLE_ERRORS as exc:
+            status.update(status="error", error=repr(exc))
+            logger.error("Fetch for %s failed permanently: %r", label, exc)
+            break
+        except Exception as exc:
+            status.update(status="error", error=repr(exc))
+            logger.warning("Fetch for %s failed: %r", label, exc)
+            continue
+
+        status.update(status="ok", error=None)
+        status["hedged"] = status["hedged"] or hedged
+        status["latency_seconds"] = round(time.monotonic() - start, 3)
+        return result, status
+
+    status["latency_seconds"] = round(time.monotonic() - start, 3)
+    return None, status
@@ -0,0 +1,199 @@
+import asyncio
+import math
+import os
+import uuid
+from datetime import date as Date, timedelta
+
+from src.core import stream_flights_async
+from src.logger import get_default_logger
+from src.pareto import ParetoFrontier
+from src.ranker import top_flights
+from src.scheduler import INTERACTIVE
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Round-trip search budget: at most this many date pairs are fetched as round trips
+ROUND_TRIP_MAX_PAIRS = int(os.getenv("ROUND_TRIP_MAX_PAIRS", "12"))
+# Round-trip fares can undercut the sum of two one-way fares; pairs are only pruned
+# once their one-way estimate is this fraction above the best round-trip fare found
+ROUND_TRIP_PRUNE_SLACK = float(os.getenv("ROUND_TRIP_PRUNE_SLACK", "0.2"))
+
+
+def is_round_trip(user_filters):
+    trip_type = ''.join(user_filters.get('trip_type') or 'one-way')
+    return trip_type.strip().lower().replace(' ', '-').replace('_', '-') == 'round-trip'
+
+
+def _stay_bounds(user_filters):
+    # Explicit return dates are taken as asked, whatever the stay; only returns before departure are dropped
+    if user_filters.get('return_date_list'):
+        return 0, math.inf
+    min_stay = max(0, int(user_filters.get('min_stay_days') or 0))
+    max_stay = max(min_stay, int(user_filters.get('max_stay_days') or min_stay))
+    return min_stay, max_stay
+
+
+def candidate_return_dates(user_filters):
+    """
+    Return dates worth probing: the requested ones, or every date reachable
+    from an outbound date within [min_stay_days, max_stay_days]
+    """
+    outbound = sorted(Date.fromisoformat(day) for day in user_filters['date_list'])
+    if not outbound:
+        return []
+    if user_filters.get('return_date_list'):
+        return sorted(set(user_filters['return_date_list']))
+    min_stay, max_stay = _stay_bounds(user_filters)
+    first, last = outbound[0] + timedelta(days=min_stay), outbound[-1] + timedelta(days=max_stay)
+    return [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+
+
+def enumerate_pairs(user_filters, outbound_bounds, return_bounds):
+    """
+    All (outbound, return) pairs within the stay limits whose legs both have
+    flights, ordered by their one-way price estimate (cheapest first).
+    Requested return dates are paired with every earlier or same-day
+    outbound date regardless of the stay limits.
+
+    Args:
+        outbound_bounds (dict): Cheapest one-way price per outbound date
+        return_bounds (dict): Cheapest one-way price per return date
+
+    Returns:
+        list: (estimate, outbound_date, return_date) tuples
+    """
+    min_stay, max_stay = _stay_bounds(user_filters)
+    pairs = []
+    for outbound, outbound_price in outbound_bounds.items():
+        outbound_day = Date.fromisoformat(outbound)
+        for inbound, return_price in return_bounds.items():
+            stay = (Date.fromisoformat(inbound) - outbound_day).days
+            if min_stay <= stay <= max_stay:
+                pairs.append((outbound_price + return_price, outbound, inbound))
+    pairs.sort()
+    return pairs
+
+
+def _cheapest(flights):
+    prices = [flight['price_value'] for flight in flights if flight.get('price_value') is not None]
+    return min(prices) if prices else None
+
+
+async def _one_way_bounds(user_filters, **stream_kwargs):
+    # Cheapest selectable one-way fare per date, from the regular (cached, coalesced) one-way search
+    bounds, statuses = {}, []
+    async for event in stream_flights_async(user_filters, **stream_kwargs):
+        if event["event"] == "date":
+            price = _cheapest(event["flights"])
+            if price is not None:
+                bounds[event["date"]] = price
+        elif event["event"] == "complete":
+            statuses = event["date_status"]
+    return bounds, statuses
+
+
+async def stream_round_trip_async(user_filters, max_concurrency=10, request_id=None, priority=INTERACTIVE,
+                                  deadline=None, cancel_event=None, max_pairs=ROUND_TRIP_MAX_PAIRS,
+                                  prune_slack=ROUND_TRIP_PRUNE_SLACK):
+    """
+    Flexible round-trip search within a fixed upstream budget. One-way
+    fares for every outbound and return date are fetched first (these are
+    shared with, and cached for, one-way searches) and give each date pair
+    a price estimate. Pairs are then fetched as real round trips cheapest
+    estimate first, in waves, until `max_pairs` were fetched or every
+    remaining estimate is worse than the best round-trip fare found by more
+    than `prune_slack` (branch and bound).
+
+    Upstream requests are bounded by outbound dates + return dates + max_pairs.
+
+    Yields:
+        dict: A 'bounds' event with the one-way estimates, 'date' events per
+              fetched pair (with 'return_date'), then a 'complete' event shaped
+              like stream_flights_async's plus 'round_trip' planning stats
+    """
+    # Every phase runs under the search's request id, so the search gets one fair-queue share
+    request_id = request_id or uuid.uuid4().hex
+    stream_kwargs = {"max_concurrency": max_concurrency, "request_id": request_id, "priority": priority,
+                     "deadline": deadline, "cancel_event": cancel_event}
+    return_dates = candidate_return_dates(user_filters)
+    outbound_filters = dict(user_filters, trip_type="one-way")
+    return_filters = dict(user_filters, trip_type="one-way", date_list=return_dates,
+                          from_airport=user_filters['to_airport'], to_airport=user_filters['from_airport'])
+    logger.info("Round trip: probing %d outbound and %d return dates", len(user_filters['date_list']), len(return_dates))
+    (outbound_bounds, outbound_status), (return_bounds, return_status) = await asyncio.gather(
+        _one_way_bounds(outbound_filters, **stream_kwargs),
+        _one_way_bounds(return_filters, **stream_kwargs),
+    )
+    candidates = enumerate_pairs(user_filters, outbound_bounds, return_bounds)
+    # Pairs fetched at most; pruning can stop earlier
+    yield {"event": "bounds", "outbound": outbound_bounds, "return": return_bounds,
+           "dates_total": min(max_pairs, len(candidates))}
+
+    flight_info, date_status = [], []
+    # Each wave is its own search, so the frontier across waves is kept here
+    frontier = ParetoFrontier()
+    best_price = math.inf
+    fetched = 0
+    deadline_exceeded = any(status["status"] == "deadline_exceeded" for status in outbound_status + return_status)
+    position = 0
+    while position < len(candidates) and fetched < max_pairs and not deadline_exceeded:
+        wave = []
+        while position < len(candidates) and len(wave) < min(max_concurrency, max_pairs - fetched):
+            estimate, outbound, inbound = candidates[position]
+            # Candidates are sorted, so once one is out of bounds all the rest are
+            if estimate * (1 - prune_slack) > best_price:
+                break
+            wave.append((outbound, inbound))
+            position += 1
+        if not wave:
+            break
+        fetched += len(wave)
+        logger.info("Round trip: fetching %d date pairs (best fare so far %s)", len(wave), best_price)
+        async for event in stream_flights_async(user_filters, date_pairs=wave, **stream_kwargs):
+            if event["event"] == "date":
+                price = _cheapest(event["flights"])
+                if price is not None:
+                    best_price = min(best_price, price)
+                if "top_flights" in event:
+                    for flight in event["flights"]:
+                        frontier.add(flight)
+                    event["top_flights"] = [flight["id"] for flight in top_flights(frontier)]
+                yield event
+            elif event["event"] == "complete":
+                flight_info.extend(event["flight_info"])
+                date_status.extend(event["date_status"])
+                deadline_exceeded = event["deadline_exceeded"]
+    pruned = len(candidates) - position
+    logger.info("Round trip: %d candidate pairs, %d fetched, %d pruned", len(candidates), fetched, pruned)
+
+    flight_info.sort(key=lambda flight: (flight["date"], flight["return_date"]))
+    yield {
+        "event": "complete",
+        "flight_info": flight_info,
+        "user_inputs": user_filters,
+        "date_status": sorted(date_status, key=lambda status: (status["date"], status["return_date"])),
+        "deadline_exceeded": deadline_exceeded,
+        "top_flights": [flight["id"] for flight in top_flights(frontier)],
+        "round_trip": {
+            "outbound_dates": len(user_filters['date_list']),
+            "return_dates": len(return_dates),
+            "candidate_pairs": len(candidates),
+            "pairs_fetched": fetched,
+            "pairs_pruned": pruned,
+        },
+    }
+
+
+async def search_round_trip_async(user_filters, **kwargs):
+    async for event in stream_round_trip_async(user_filters, **kwargs):
+        if event["event"] == "complete":
+            return {key: value for key, value in event.items() if key != "event"}
+
+
+def search_round_trip(user_filters, max_workers=10, deadline=None, cancel_event=None):
+    """
+    Synchronous wrapper around search_round_trip_async, as core.search_flights_parallel
+    """
+    return asyncio.run(search_round_trip_async(user_filters, max_concurrency=max_workers,
+                                               deadline=deadline, cancel_event=cancel_event))
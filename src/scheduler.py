@@ -0,0 +1,184 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from src.fetcher import FLIGHT_FETCH_WORKERS
+from src.logger import get_default_logger
+from src.retry import LatencyTracker
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Priority classes, served strictly in this order
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Scheduler configuration
+SCHEDULER_MAX_QUEUE_DEPTH = int(os.getenv("SCHEDULER_MAX_QUEUE_DEPTH", "1000"))
+SCHEDULER_MAX_BATCH_QUEUE_DEPTH = int(os.getenv("SCHEDULER_MAX_BATCH_QUEUE_DEPTH", "300"))
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when admitting more work would exceed the queue-depth limit"""
+
+
+class _Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "enqueued_at")
+
+    def __init__(self, future, fn, args, kwargs):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.monotonic()
+
+
+class FairScheduler:
+    """
+    Process-wide scheduler for date-fetch tasks. Each request gets its own
+    queue; workers take tasks round-robin across requests, so a large search
+    cannot starve small ones, and interactive work always goes before batch
+    work (prefetch, cache warming).
+
+    Args:
+        workers (int): Number of worker threads running tasks
+        max_queue_depth (int): Pending tasks allowed before interactive work is rejected
+        max_batch_queue_depth (int): Pending tasks allowed before batch work is rejected
+    """
+
+    def __init__(self, workers=FLIGHT_FETCH_WORKERS, max_queue_depth=SCHEDULER_MAX_QUEUE_DEPTH,
+                 max_batch_queue_depth=SCHEDULER_MAX_BATCH_QUEUE_DEPTH):
+        self.max_queue_depth = max_queue_depth
+        self.max_batch_queue_depth = max_batch_queue_depth
+        self._queues = {INTERACTIVE: OrderedDict(), BATCH: OrderedDict()}
+        self._depth = {INTERACTIVE: 0, BATCH: 0}
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._running = 0
+        self.queue_wait = {INTERACTIVE: LatencyTracker(min_samples=1), BATCH: LatencyTracker(min_samples=1)}
+        self.completed = 0
+        self.rejected = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"flight-fetch-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def admit(self, task_count, priority=INTERACTIVE):
+        """
+        Check that `task_count` more tasks fit in the queue
+
+        Raises:
+            SchedulerOverloaded: When the queue-depth limit would be exceeded
+        """
+        with self._condition:
+            depth = self._depth[INTERACTIVE] + self._depth[BATCH]
+            limit = self.max_queue_depth if priority == INTERACTIVE else self.max_batch_queue_depth
+            if depth + task_count > limit:
+                self.rejected += 1
+                raise SchedulerOverloaded(
+                    f"Fetch queue is full ({depth} pending, limit {limit}); retry later")
+
+    def submit(self, fn, *args, request_id=None, priority=INTERACTIVE, **kwargs):
+        """
+        Queue fn(*args, **kwargs) under the given request and priority
+
+        Returns:
+            concurrent.futures.Future: Completed with the task's result
+        """
+        future = Future()
+        # Run in the submitter's context so its log fields (search_id) carry over
+        task = _Task(future, contextvars.copy_context().run, (fn, *args), kwargs)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            queues = self._queues[priority]
+            if request_id not in queues:
+                queues[request_id] = deque()
+            queues[request_id].append(task)
+            self._depth[priority] += 1
+            self._condition.notify()
+        return future
+
+    def _next_task(self):
+        # Strict priority between classes, round-robin between requests of a class
+        for priority in (INTERACTIVE, BATCH):
+            queues = self._queues[priority]
+            if not queues:
+                continue
+            request_id, pending = next(iter(queues.items()))
+            task = pending.popleft()
+            if pending:
+                queues.move_to_end(request_id)
+            else:
+                del queues[request_id]
+            self._depth[priority] -= 1
+            return priority, task
+        return None, None
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                priority, task = self._next_task()
+                while task is None:
+                    if self._shutdown:
+                        return
+                    self._condition.wait()
+                    priority, task = self._next_task()
+                self._running += 1
+
+            try:
+                # Skip tasks whose caller already gave up
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                self.queue_wait[priority].record(time.monotonic() - task.enqueued_at)
+                try:
+                    result = task.fn(*task.args, **task.kwargs)
+                except BaseException as exc:
+                    task.future.set_exception(exc)
+                else:
+                    task.future.set_result(result)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self.completed += 1
+
+    def shutdown(self):
+        """
+        Stop accepting work and cancel everything still queued
+        """
+        with self._condition:
+            self._shutdown = True
+            for queues in self._queues.values():
+                for pending in queues.values():
+                    for task in pending:
+                        task.future.cancel()
+                queues.clear()
+            self._depth = {INTERACTIVE: 0, BATCH: 0}
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            stats = {
+                "workers": len(self._threads),
+                "running": self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "max_queue_depth": self.max_queue_depth,
+            }
+            for priority, name in PRIORITY_NAMES.items():
+                stats[f"{name}_queue_depth"] = self._depth[priority]
+                stats[f"{name}_active_requests"] = len(self._queues[priority])
+        for priority, name in PRIORITY_NAMES.items():
+            stats[f"{name}_queue_wait_p50_seconds"] = self.queue_wait[priority].percentile(50)
+            stats[f"{name}_queue_wait_p95_seconds"] = self.queue_wait[priority].percentile(95)
+        return stats
+
+
+# Shared by every search in the process
+fetch_scheduler = FairScheduler()
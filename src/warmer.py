@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+from datetime import date as Date
+
+from src import core
+from src.cache import make_flight_cache_key
+from src.logger import get_default_logger, log_context
+from src.multi_route import expand_routes
+from src.price_calendar import calendar_dates
+from src.scheduler import fetch_scheduler, BATCH, SchedulerOverloaded
+
+# Setup logger
+logger = get_default_logger(__name__)
+
+# Cache warmer configuration
+WARMER_ENABLED = os.getenv("WARMER_ENABLED", "false").lower() == "true"
+# Seconds between warming passes
+WARMER_INTERVAL_SECONDS = float(os.getenv("WARMER_INTERVAL_SECONDS", "60"))
+# Most popular (route, month) pairs kept warm
+WARMER_TOP_ROUTES = int(os.getenv("WARMER_TOP_ROUTES", "20"))
+# Upstream fetches one pass may make
+WARMER_MAX_FETCHES_PER_PASS = int(os.getenv("WARMER_MAX_FETCHES_PER_PASS", "60"))
+# Cached dates are refreshed once they expire within this many seconds
+WARMER_REFRESH_AHEAD_SECONDS = float(os.getenv("WARMER_REFRESH_AHEAD_SECONDS", "120"))
+# A search counts half as much after this many seconds, so past peaks fade
+WARMER_HALF_LIFE_SECONDS = float(os.getenv("WARMER_HALF_LIFE_SECONDS", "3600"))
+# Decayed searches a pair needs to be warmed, so a route searched once is never refetched
+WARMER_MIN_SCORE = float(os.getenv("WARMER_MIN_SCORE", "1.5"))
+# Distinct (route, month) pairs remembered; the least popular are forgotten first
+WARMER_MAX_TRACKED = 1000
+# Pairs are forgotten once their decayed score falls below this (about 4 half-lives after a single search)
+WARMER_FORGET_SCORE = 0.05
+
+# Filters that identify a cached one-way fetch (see make_flight_cache_key)
+WARM_FILTER_KEYS = ["adults", "children", "infants_in_seat", "infants_on_lap", "seat", "max_stops"]
+
+
+class RoutePopularity:
+    """
+    Thread-safe, exponentially decayed count of the searches per (route,
+    month, passengers, seat, max_stops), learned from served queries
+
+    Args:
+        half_life (float): Seconds after which a search counts half
+        min_score (float): Decayed score below which a pair is not returned by top()
+        max_tracked (int): Pairs remembered before the least popular are dropped
+        forget_score (float): Decayed score below which a pair is dropped
+    """
+
+    def __init__(self, half_life=WARMER_HALF_LIFE_SECONDS, min_score=WARMER_MIN_SCORE,
+                 max_tracked=WARMER_MAX_TRACKED, forget_score=WARMER_FORGET_SCORE):
+        self.half_life = half_life
+        self.min_score = min_score
+        self.max_tracked = max_tracked
+        self.forget_score = forget_score
+        self._lock = threading.Lock()
+        # key -> [score, updated_at, one-way filters, month]
+        self._entries = {}
+
+    def _decayed(self, entry, now):
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.half_life)
+
+    def record(self, user_filters, now=None):
+        """
+        Count one search, shared between the routes it covers, for every month it covers
+
+        Args:
+            user_filters (dict): FlightQueryData fields as extracted from the query
+        """
+        now = time.time() if now is None else now
+        months = sorted({day[:7] for day in user_filters.get('date_list') or []})
+        base = {key: user_filters.get(key) for key in WARM_FILTER_KEYS}
+        routes = expand_routes(user_filters)
+        with self._lock:
+            for origin, destination in routes:
+                filters = dict(base, from_airport=origin, to_airport=destination, trip_type="one-way")
+                for month in months:
+                    key = make_flight_cache_key(filters, month)
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        self._entries[key] = [1.0 / len(routes), now, filters, month]
+                    else:
+                        entry[0], entry[1] = self._decayed(entry, now) + 1.0 / len(routes), now
+            scores = {key: self._decayed(entry, now) for key, entry in self._entries.items()}
+            ranked = sorted(scores, key=scores.get)
+            forgotten = max(len(ranked) - self.max_tracked,
+                            sum(1 for key in ranked if scores[key] < self.forget_score))
+            for key in ranked[:forgotten]:
+                del self._entries[key]
+
+    def top(self, count, now=None):
+        """
+        The `count` most popular pairs scoring at least `min_score`
+
+        Returns:
+            list: (score, one-way filters, 'yyyy-mm' month) tuples, most popular first
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            ranked = [(self._decayed(entry, now), entry[2], entry[3]) for entry in self._entries.values()]
+        ranked = [item for item in ranked if item[0] >= self.min_score]
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked[:count]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _refresh(filters, date):
+    # Coalesced like search fetches, so a search asking for the same date joins this fetch
+    cache_key = make_flight_cache_key(filters, date)
+    return core.date_fetches.do(cache_key, core.fetch_date, filters, date, cache_key, refresh=True)
+
+
+class CacheWarmer:
+    """
+    Background thread refreshing the flight cache for the most popular
+    (route, month) pairs before their dates expire. Fetches are queued on
+    the fetch scheduler at batch priority, so they only run when no
+    interactive fetch is waiting, and each pass is capped at `max_fetches`
+    upstream requests. Passes are skipped while searches are queued.
+
+    Args:
+        popularity (RoutePopularity): Source of the pairs to keep warm
+        interval (float): Seconds between passes
+        top_routes (int): Pairs kept warm
+        max_fetches (int): Upstream fetches per pass
+        refresh_ahead (float): Refresh dates expiring within this many seconds
+    """
+
+    def __init__(self, popularity, interval=WARMER_INTERVAL_SECONDS, top_routes=WARMER_TOP_ROUTES,
+                 max_fetches=WARMER_MAX_FETCHES_PER_PASS, refresh_ahead=WARMER_REFRESH_AHEAD_SECONDS):
+        self.popularity = popularity
+        self.interval = interval
+        self.top_routes = top_routes
+        self.max_fetches = max_fetches
+        self.refresh_ahead = refresh_ahead
+        self._stop = threading.Event()
+        self._thread = None
+        self.passes = 0
+        self.fetches = 0
+        self.errors = 0
+
+    def start(self):
+        if core.flight_cache is None:
+            logger.info("Flight cache disabled, not starting the cache warmer")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+        logger.info("Started cache warmer: top %d routes every %ss, %d fetches per pass",
+                    self.top_routes, self.interval, self.max_fetches)
+
+    def stop(self):
+        """
+        Stop after the current pass
+        """
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.warm_once()
+            except Exception as exc:
+                logger.error("Cache warming pass failed: %r", exc)
+
+    def due_dates(self, today=None):
+        """
+        Dates of the popular pairs that are not cached or expire soon,
+        most popular pair first, then by date
+
+        Returns:
+            list: (one-way filters, date) tuples
+        """
+        cache = core.flight_cache
+        if cache is None:
+            return []
+        today = today or Date.today()
+        due = []
+        for _, filters, month in self.popularity.top(self.top_routes):
+            try:
+                days = calendar_dates([month], today)
+            except ValueError:
+                # Malformed dates in an extracted query
+                continue
+            for day in days:
+                remaining = cache.expires_in(make_flight_cache_key(filters, day))
+                if remaining is None or remaining < self.refresh_ahead:
+                    due.append((filters, day))
+        return due
+
+    def warm_once(self):
+        """
+        Run one warming pass
+
+        Returns:
+            int: Dates refreshed
+        """
+        if fetch_scheduler.stats()["interactive_queue_depth"]:
+            logger.debug("Searches are waiting for fetches, skipping cache warming pass")
+            return 0
+        due = self.due_dates()[:self.max_fetches]
+        if not due:
+            return 0
+        try:
+            fetch_scheduler.admit(len(due), BATCH)
+        except SchedulerOverloaded as exc:
+            logger.info("Skipping cache warming pass: %s", exc)
+            return 0
+
+        with log_context(search_id="cache-warmer"):
+            futures = [fetch_scheduler.submit(_refresh, filters, day, request_id="cache-warmer", priority=BATCH)
+                       for filters, day in due]
+            refreshed = 0
+            for (filters, day), future in zip(due, futures):
+                try:
+                    future.result()
+                    refreshed += 1
+                except Exception as exc:
+                    self.errors += 1
+                    logger.warning("Cache warming of %s-%s on %s failed: %r",
+                                   filters['from_airport'], filters['to_airport'], day, exc)
+        self.passes += 1
+        self.fetches += len(due)
+        logger.info("Cache warming pass refreshed %d of %d due dates", refreshed, len(due))
+        return refreshed
+
+    def stats(self):
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "tracked_routes": len(self.popularity),
+            "passes": self.passes,
+            "fetches": self.fetches,
+            "errors": self.errors,
+        }
+
+
+# Learned from every served query (see FlightAgent), warmed by the API process
+route_popularity = RoutePopularity()
+cache_warmer = CacheWarmer(route_popularity)
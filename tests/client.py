@@ -6,5 +6,5 @@ req_body = {
   "user_query": "Look for Bangalore to Ahmedabad best flights for 1 person in June 2025"
 }
 
-response = requests.post(f"{URL}/12345", json=req_body)
+response = requests.post(f"{URL}/12345?wait=true", json=req_body)
 print(response.text)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import json
+
+from src.analyzer_payload import build_analyzer_payload, expand_analyzer_payload, select_candidates
+
+USER_INPUTS = {"from_airport": "DEL", "to_airport": "BOM", "adults": 1, "date_list": ["2026-12-05", "2026-12-06"]}
+
+
+def _flight(date, price, duration, stops, **extra):
+    return {"name": "IndiGo", "date": date, "departure": "8:30 AM", "arrival": "10:45 AM", "arrival_time_ahead": "",
+            "duration": f"{duration} min", "stops": stops, "price": f"₹{price}", "price_value": float(price),
+            "duration_minutes": float(duration), "delay": None, "is_best": True, **extra}
+
+
+def _flights():
+    return [_flight(date, 3000 + 100 * index, 120 + 10 * index, index % 2)
+            for date in USER_INPUTS["date_list"] for index in range(8)]
+
+
+def test_payload_round_trips_and_drops_empty_return_dates():
+    payload, stats = build_analyzer_payload({"flight_info": _flights(), "user_inputs": USER_INPUTS},
+                                            per_date_top_k=3)
+    data = expand_analyzer_payload(payload)
+    assert "return_date" not in json.loads(payload)["flight_info"]["columns"]
+    assert "date_list" not in data["user_inputs"]
+    assert stats["flights"] == 16 and stats["flights_sent"] == len(data["flight_info"]) == 6
+    assert data["flight_info"][0]["price"] == "₹3000"
+
+
+def test_round_trip_payload_keeps_return_dates():
+    flights = [dict(flight, return_date="2026-12-20") for flight in _flights()]
+    payload, _ = build_analyzer_payload({"flight_info": flights, "user_inputs": USER_INPUTS})
+    assert expand_analyzer_payload(payload)["flight_info"][0]["return_date"] == "2026-12-20"
+
+
+def test_tokens_saved_estimate_is_close_to_the_plain_json_size():
+    flights = _flights()
+    payload, stats = build_analyzer_payload({"flight_info": flights, "user_inputs": USER_INPUTS})
+    original = len(json.dumps({"flight_info": flights, "user_inputs": USER_INPUTS})) / 4
+    assert abs(stats["tokens"] + stats["tokens_saved"] - original) < 0.05 * original
+
+
+def test_candidates_skip_flights_dominated_by_top_n_others():
+    flights = _flights()
+    candidates = select_candidates(flights, per_date_top_k=8, top_n=3)
+    assert len(candidates) < len(flights)
+    assert all(flight["price_value"] < 3300 for flight in candidates)
@@ -0,0 +1,72 @@
+import json
+import time
+
+import pytest
+
+from src.cache import MemoryCacheBackend, QueryCache, SQLiteCacheBackend, TTLCache, make_flight_cache_key
+from src.json_schema import FlightQueryData
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_entries=10):
+        if request.param == "memory":
+            return MemoryCacheBackend(max_entries=max_entries)
+        # Plain JSON values; the flight cache stores FlightTables through flight_table.dumps
+        return SQLiteCacheBackend(path=str(tmp_path / "cache.sqlite3"), max_entries=max_entries,
+                                  dumps=json.dumps, loads=json.loads)
+    return make
+
+
+def test_expires_in_does_not_touch_lru_order(make_backend):
+    cache = TTLCache(make_backend(max_entries=2), ttl=60)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    assert 59 < cache.expires_in("a") <= 60
+    assert cache.expires_in("missing") is None
+    # "a" is still the least recently used entry
+    cache.set("c", 3)
+    assert cache.get("a") is None and cache.get("b") == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_their_ttl(make_backend):
+    cache = TTLCache(make_backend(), ttl=60)
+    cache.set("a", {"price": 1})
+    cache.set("b", {"price": 2}, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("a") == {"price": 1}
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(make_backend):
+    cache = TTLCache(make_backend(max_entries=2), ttl=60)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_flight_cache_key_normalizes_filters():
+    filters = {"from_airport": "del ", "to_airport": "BOM", "adults": 1, "children": None,
+               "trip_type": "one-way", "seat": "Economy", "max_stops": 1}
+    key = make_flight_cache_key(filters, "2026-12-05")
+    assert key == make_flight_cache_key(dict(filters, from_airport="DEL", children=0, seat="economy"), "2026-12-05")
+    assert key != make_flight_cache_key(filters, "2026-12-05", return_date="2026-12-20")
+
+
+def test_query_cache_ignores_case_and_punctuation():
+    cache = QueryCache(ttl=60)
+    query_data = FlightQueryData(from_airport="DEL", to_airport="BOM", date_list=["2026-12-05"])
+    cache.set("Delhi to Mumbai, 5th December!", query_data)
+    assert cache.get("delhi to mumbai 5th december") == query_data
+    assert cache.get("delhi to goa 5th december") is None
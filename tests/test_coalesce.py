@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from src.coalesce import SingleFlight
+
+
+def _fetch(release, calls, cancelled=None, started=None):
+    # Stands in for core.fetch_date: waits for the upstream slot, then checks the cancel flag
+    release.wait(5)
+    if cancelled.is_set():
+        raise RuntimeError("cancelled")
+    started()
+    calls.append(1)
+    return "page"
+
+
+def _run(flight, key, release, calls, results, name, **kwargs):
+    try:
+        results[name] = flight.do(key, _fetch, release, calls, **kwargs)
+    except Exception as exc:
+        results[name] = exc
+
+
+def _start(flight, release, calls, results, name, **kwargs):
+    thread = threading.Thread(target=_run, args=(flight, "key", release, calls, results, name), kwargs=kwargs)
+    thread.start()
+    time.sleep(0.05)
+    return thread
+
+
+def test_follower_survives_leader_cancel():
+    flight, release, calls, results = SingleFlight(), threading.Event(), [], {}
+    leader_cancelled = threading.Event()
+    started = []
+    threads = [_start(flight, release, calls, results, "leader", cancelled=leader_cancelled),
+               _start(flight, release, calls, results, "follower", cancelled=threading.Event(),
+                      started=lambda: started.append("follower"))]
+    leader_cancelled.set()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == {"leader": "page", "follower": "page"}
+    assert calls == [1] and started == ["follower"]
+    assert flight.stats()["coalesced"] == 1
+
+
+def test_shared_call_is_cancelled_once_every_caller_left():
+    flight, release, calls, results = SingleFlight(), threading.Event(), [], {}
+    events = [threading.Event(), threading.Event()]
+    threads = [_start(flight, release, calls, results, name, cancelled=event)
+               for name, event in zip(("leader", "follower"), events)]
+    for event in events:
+        event.set()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == []
+    assert all(isinstance(result, RuntimeError) for result in results.values())
+
+
+def test_caller_joining_a_started_call_starts_its_timeout_at_once():
+    flight, release, calls, results = SingleFlight(), threading.Event(), [], {}
+    gate = threading.Event()
+
+    def slow_fetch(cancelled=None, started=None):
+        started()
+        gate.wait(5)
+        return "page"
+
+    leader = threading.Thread(target=flight.do, args=("key", slow_fetch))
+    leader.start()
+    time.sleep(0.05)
+    started = []
+    follower = threading.Thread(target=flight.do, args=("key", slow_fetch),
+                                kwargs={"started": lambda: started.append(time.monotonic())})
+    follower.start()
+    time.sleep(0.05)
+    assert len(started) == 1
+    gate.set()
+    leader.join()
+    follower.join()
+
+
+def test_exceptions_reach_every_caller():
+    flight = SingleFlight()
+
+    def failing(cancelled=None, started=None):
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        flight.do("key", failing)
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from src.jobs import CANCELLED, COMPLETED, Job, JobManager, JobStore, JobStoreFull
+
+FILTERS = {"from_airport": "DEL", "to_airport": "BOM", "date_list": ["2026-12-05", "2026-12-06", "2026-12-05"]}
+
+
+def _date(date, **extra):
+    return {"event": "date", "date": date, "flights": [], "status": "ok", **extra}
+
+
+def _run(events, **manager_kwargs):
+    async def runner(user_query):
+        for event in events:
+            await asyncio.sleep(0)
+            yield event
+
+    async def main():
+        manager = JobManager(runner, workers=1, **manager_kwargs)
+        manager.start()
+        job = manager.submit("search-1", "query")
+        await asyncio.wait_for(job.done.wait(), 5)
+        await manager.stop()
+        return job.to_dict()
+
+    return asyncio.run(main())
+
+
+def test_plain_search_progress():
+    result = _run([{"event": "filters", "user_inputs": FILTERS, "dates_total": 2},
+                   _date("2026-12-05"), _date("2026-12-06"), {"event": "result", "result": {"ok": True}}])
+    assert result["status"] == COMPLETED
+    assert (result["dates_completed"], result["dates_total"]) == (2, 2)
+    assert result["result"] == {"ok": True}
+
+
+def test_multi_route_total_comes_from_the_plan():
+    job = Job("search-1", "query")
+    job.apply({"event": "filters", "user_inputs": FILTERS, "dates_total": None})
+    job.apply({"event": "routes", "routes": [], "skipped": 1, "dates_total": 3})
+    for route in ("DEL-BOM", "DEL-PNQ", "DEL-BOM"):
+        job.apply(_date("2026-12-05", route=route))
+    assert (job.to_dict()["dates_completed"], job.to_dict()["dates_total"]) == (3, 3)
+
+
+def test_round_trip_total_shrinks_to_the_pairs_fetched():
+    job = Job("search-1", "query")
+    job.apply({"event": "filters", "user_inputs": FILTERS, "dates_total": None})
+    assert job.to_dict()["dates_total"] is None
+    job.apply({"event": "bounds", "outbound": {}, "return": {}, "dates_total": 12})
+    job.apply(_date("2026-12-05", return_date="2026-12-10"))
+    assert job.to_dict()["dates_total"] == 12
+    job.finish(COMPLETED)
+    assert job.to_dict()["dates_total"] == 1
+
+
+def test_cancel_queued_job():
+    async def runner(user_query):
+        await asyncio.sleep(10)
+        yield {}
+
+    async def main():
+        manager = JobManager(runner, workers=1)
+        manager.start()
+        first = manager.submit("search-1", "query")
+        queued = manager.submit("search-2", "query")
+        manager.cancel("search-2")
+        manager.cancel("search-1")
+        await asyncio.wait_for(first.done.wait(), 5)
+        await manager.stop()
+        return first.status, queued.status
+
+    assert asyncio.run(main()) == (CANCELLED, CANCELLED)
+
+
+def test_store_evicts_finished_jobs_only():
+    store = JobStore(max_jobs=2, ttl=3600)
+    running, finished = Job("a", "q"), Job("b", "q")
+    finished.finish(COMPLETED)
+    store.add(running)
+    store.add(finished)
+    store.add(Job("c", "q"))
+    assert store.get("b") is None and store.get("a") is running
+    with pytest.raises(JobStoreFull):
+        store.add(Job("d", "q"))
+
+
+def test_finished_jobs_expire():
+    store = JobStore(ttl=0)
+    job = Job("a", "q")
+    store.add(job)
+    job.finish(COMPLETED)
+    job.finished_at -= 1
+    assert store.get("a") is None
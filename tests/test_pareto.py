@@ -0,0 +1,50 @@
+from src.pareto import ParetoFrontier
+from src.ranker import rank_flights, top_flights
+
+
+def _flight(id, price, duration, stops, **extra):
+    return {"id": id, "name": "IndiGo", "date": "2026-12-05", "departure": "8:30 AM on Sat, Dec 5",
+            "arrival": "10:45 AM on Sat, Dec 5", "arrival_time_ahead": "", "duration": f"{duration} min",
+            "price": f"₹{price}", "price_value": float(price), "duration_minutes": float(duration), "stops": stops,
+            **extra}
+
+
+def test_dominated_flights_are_rejected():
+    frontier = ParetoFrontier()
+    assert frontier.add(_flight("a", 5000, 120, 0))
+    assert not frontier.add(_flight("b", 6000, 150, 0))
+    assert not frontier.add(_flight("c", 5000, 130, 1))
+    assert frontier.add(_flight("d", 4000, 200, 1))
+    assert [flight["id"] for flight in frontier.frontier()] == ["d", "a"]
+
+
+def test_new_flight_evicts_the_points_it_dominates():
+    frontier = ParetoFrontier()
+    for flight in (_flight("a", 5000, 120, 1), _flight("b", 4000, 180, 1), _flight("c", 6000, 100, 2)):
+        frontier.add(flight)
+    assert frontier.add(_flight("d", 3900, 100, 1))
+    assert [flight["id"] for flight in frontier.frontier()] == ["d"]
+    assert len(frontier) == 1
+
+
+def test_ties_and_unknown_values():
+    frontier = ParetoFrontier()
+    assert frontier.add(_flight("a", 5000, 120, 0))
+    assert frontier.add(_flight("b", 5000, 120, 0))
+    assert not frontier.add(dict(_flight("c", 1000, 60, 0), price_value=None, price="Price unavailable"))
+    assert not frontier.add(_flight("d", 1000, 60, "Unknown"))
+    assert len(frontier) == 2
+
+
+def test_final_ranking_matches_streamed_top_flights():
+    flights = [_flight("a", 5000, 120, 0), _flight("b", 6000, 150, 0), _flight("c", 3000, 300, 1),
+               _flight("d", 4000, 200, 1), _flight("e", 9000, 90, 0)]
+    frontier = ParetoFrontier()
+    for flight in flights:
+        frontier.add(flight)
+    streamed = [flight["id"] for flight in top_flights(frontier)]
+    result = rank_flights({"flight_info": flights, "user_inputs": {"from_airport": "DEL", "to_airport": "BOM"}})
+    by_id = {flight["id"]: flight for flight in flights}
+    assert [(row.price, row.duration) for row in result.flight_search_results] == \
+        [(by_id[id]["price"], by_id[id]["duration"]) for id in streamed]
+    assert "b" not in streamed
@@ -0,0 +1,41 @@
+from datetime import date
+
+from src.query_parser import QUERY_FAST_PATH_MIN_CONFIDENCE, parse_query
+
+TODAY = date(2026, 10, 18)
+
+
+def test_plain_query_is_parsed_confidently():
+    query_data, confidence = parse_query("Delhi to Mumbai on 5th December for 2 adults", today=TODAY)
+    assert confidence >= QUERY_FAST_PATH_MIN_CONFIDENCE
+    assert (query_data.from_airport, query_data.to_airport, query_data.adults) == ("DEL", "BOM", 2)
+    assert query_data.date_list == ["2026-12-05"]
+
+
+def test_unmodeled_group_phrases_fall_back_to_llm():
+    for query in ("from Delhi to Mumbai in december for a family of four",
+                  "Delhi to Mumbai on 5th December, me and my wife",
+                  "we want to fly Delhi to Mumbai on 5th December",
+                  "Delhi to Mumbai on 5th December with my parents"):
+        _, confidence = parse_query(query, today=TODAY)
+        assert confidence < QUERY_FAST_PATH_MIN_CONFIDENCE, query
+
+
+def test_group_phrase_with_explicit_adults_is_kept():
+    query_data, confidence = parse_query("Delhi to Mumbai on 5th December for our 3 adults", today=TODAY)
+    assert confidence >= QUERY_FAST_PATH_MIN_CONFIDENCE
+    assert query_data.adults == 3
+
+
+def test_any_airport_of_a_city_uses_its_metro_code():
+    query_data, confidence = parse_query("any London airport to Mumbai in December", today=TODAY)
+    assert confidence >= QUERY_FAST_PATH_MIN_CONFIDENCE
+    assert (query_data.from_airport, query_data.to_airport) == ("LON", "BOM")
+    assert len(query_data.date_list) == 31
+    query_data, _ = parse_query("Mumbai to all airports in New York on 5th December", today=TODAY)
+    assert (query_data.from_airport, query_data.to_airport) == ("BOM", "NYC")
+
+
+def test_other_multi_airport_phrasings_fall_back_to_llm():
+    _, confidence = parse_query("Delhi to any nearby airport of Goa on 5th December", today=TODAY)
+    assert confidence < QUERY_FAST_PATH_MIN_CONFIDENCE
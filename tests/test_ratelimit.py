@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from src.ratelimit import AdaptiveConcurrencyLimiter, FetchCancelled, TokenBucket, UpstreamLimiter
+
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    bucket = TokenBucket(rate=20, capacity=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05 and bucket.waits == 0
+    for _ in range(2):
+        bucket.acquire()
+    # Two more tokens at 20 per second
+    assert time.monotonic() - start >= 0.09
+    assert bucket.waits == 2
+
+
+def test_limit_grows_additively_and_halves_on_error():
+    limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=8, cooldown=0)
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(True, 0.1)
+    assert limiter.limit == 4 and 4.9 < limiter._limit < 5.1
+    limiter.acquire()
+    limiter.release(False, 0.1)
+    assert limiter.limit == 2 and limiter.stats()["errors"] == 1
+
+
+def test_latency_spike_halves_the_limit_once_per_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, spike_ratio=2.0, cooldown=60)
+    for latency in (0.1, 1.0, 1.0):
+        limiter.acquire()
+        limiter.release(True, latency)
+    assert limiter.limit == 4 and limiter.decreases == 1
+
+
+def test_acquire_blocks_at_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial=1, maximum=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.05)
+    limiter.release(True, 0.1)
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_slot_counts_exceptions_as_errors():
+    limiter = UpstreamLimiter(TokenBucket(rate=1000, capacity=10), AdaptiveConcurrencyLimiter(initial=4, cooldown=0))
+    with limiter.slot():
+        pass
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError("503")
+    stats = limiter.stats()
+    assert (stats["successes"], stats["errors"], stats["in_flight"], stats["limit"]) == (1, 1, 0, 2)
+
+
+def test_cancelled_slot_is_returned_without_counting():
+    limiter = UpstreamLimiter(TokenBucket(rate=1000, capacity=10), AdaptiveConcurrencyLimiter(initial=4))
+    cancelled = threading.Event()
+    cancelled.set()
+    with pytest.raises(FetchCancelled):
+        with limiter.slot(cancelled):
+            pytest.fail("a cancelled fetch must not run")
+    stats = limiter.stats()
+    assert (stats["successes"], stats["errors"], stats["in_flight"], stats["limit"]) == (0, 0, 0, 4)
+
+
+def test_parse_failures_are_not_upstream_errors(monkeypatch):
+    from src import core
+
+    limiter = UpstreamLimiter(TokenBucket(rate=1000, capacity=10), AdaptiveConcurrencyLimiter(initial=4))
+    monkeypatch.setattr(core, "upstream_limiter", limiter)
+    monkeypatch.setattr(core, "flight_cache", None)
+    monkeypatch.setattr(core, "build_filter", lambda *args: None)
+    monkeypatch.setattr(core, "fetch_page", lambda filter, currency="inr": "<html>not a results page</html>")
+
+    def bad_parse(page):
+        raise ValueError("unexpected page layout")
+
+    monkeypatch.setattr(core, "parse_pool", None)
+    monkeypatch.setattr(core, "parse_page", bad_parse)
+    filters = {"from_airport": "DEL", "to_airport": "BOM", "trip_type": "one-way"}
+    with pytest.raises(ValueError):
+        core.fetch_date(filters, "2026-12-05", "key")
+    stats = limiter.stats()
+    assert (stats["successes"], stats["errors"]) == (1, 0)
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from src import retry
+from src.parse_pool import parse_page
+from src.retry import fetch_with_retries
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(retry, "backoff_delay", lambda attempt: 0)
+
+
+def _fetch(*outcomes, queued=0.0, latency=0.0):
+    # Fake fetch: waits `queued` before its request starts, then `latency`, then returns or raises the next outcome
+    calls = []
+
+    async def fetch(started):
+        calls.append(started)
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        await asyncio.sleep(queued)
+        started.set()
+        await asyncio.sleep(latency)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    fetch.calls = calls
+    return fetch
+
+
+def test_retries_with_the_fresh_fetch_until_success():
+    primary, fresh = _fetch(RuntimeError("503")), _fetch(RuntimeError("503"), "page")
+    result, status = asyncio.run(fetch_with_retries(primary, fresh, timeout=1, max_retries=2))
+    assert result == "page"
+    assert (status["status"], status["attempts"], len(primary.calls), len(fresh.calls)) == ("ok", 3, 1, 2)
+
+
+def test_non_retryable_errors_fail_at_once():
+    primary = _fetch(KeyError("price"))
+    result, status = asyncio.run(fetch_with_retries(primary, timeout=1, max_retries=2))
+    assert result is None
+    assert (status["status"], status["attempts"]) == ("error", 1)
+
+
+def test_timeout_runs_from_the_upstream_request_not_the_queue():
+    primary = _fetch("page", queued=0.2, latency=0.02)
+    result, status = asyncio.run(fetch_with_retries(primary, timeout=0.1, max_retries=0))
+    assert (result, status["status"]) == ("page", "ok")
+
+
+def test_slow_request_times_out_and_is_retried():
+    primary, fresh = _fetch("late", latency=1), _fetch("page")
+    result, status = asyncio.run(fetch_with_retries(primary, fresh, timeout=0.05, max_retries=1))
+    assert (result, status["status"], status["attempts"]) == ("page", "ok", 2)
+
+
+def test_hedge_wins_over_a_slow_primary(monkeypatch):
+    monkeypatch.setattr(retry.fetch_latency, "percentile", lambda percentile: 0.02)
+    before = retry.retry_stats.snapshot()
+    primary, fresh = _fetch("slow", latency=0.5), _fetch("hedge")
+    result, status = asyncio.run(fetch_with_retries(primary, fresh, timeout=1, max_retries=0, hedging=True))
+    after = retry.retry_stats.snapshot()
+    assert (result, status["hedged"]) == ("hedge", True)
+    assert after["hedges"] - before["hedges"] == 1 and after["hedge_wins"] - before["hedge_wins"] == 1
+
+
+def test_page_without_flights_is_an_empty_result():
+    flights, price = parse_page("<html><body>No results</body></html>")
+    assert len(flights) == 0 and price is None
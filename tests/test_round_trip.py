@@ -0,0 +1,37 @@
+import asyncio
+
+from src import round_trip
+from src.round_trip import candidate_return_dates, enumerate_pairs
+
+FILTERS = {"date_list": ["2026-12-01"], "min_stay_days": 1, "max_stay_days": 7}
+
+
+def test_requested_return_dates_ignore_stay_limits():
+    user_filters = dict(FILTERS, return_date_list=["2026-12-20", "2026-11-30"])
+    assert candidate_return_dates(user_filters) == ["2026-11-30", "2026-12-20"]
+    pairs = enumerate_pairs(user_filters, {"2026-12-01": 5000}, {"2026-12-20": 4000, "2026-11-30": 3000})
+    assert pairs == [(9000, "2026-12-01", "2026-12-20")]
+
+
+def test_derived_return_dates_follow_stay_limits():
+    assert candidate_return_dates(FILTERS)[0] == "2026-12-02"
+    assert candidate_return_dates(FILTERS)[-1] == "2026-12-08"
+    pairs = enumerate_pairs(FILTERS, {"2026-12-01": 5000}, {"2026-12-03": 4000, "2026-12-20": 3000})
+    assert pairs == [(9000, "2026-12-01", "2026-12-03")]
+
+
+def test_all_phases_share_the_search_request_id(monkeypatch):
+    request_ids = []
+
+    async def fake_stream(user_filters, request_id=None, date_pairs=None, **kwargs):
+        request_ids.append(request_id)
+        legs = date_pairs or [(date, None) for date in user_filters["date_list"]]
+        for date, return_date in legs:
+            flight = {"id": f"{date}/{return_date}", "price_value": 5000.0, "duration_minutes": 120.0, "stops": 0}
+            yield {"event": "date", "date": date, "return_date": return_date, "flights": [flight]}
+        yield {"event": "complete", "flight_info": [], "date_status": [], "deadline_exceeded": False}
+
+    monkeypatch.setattr(round_trip, "stream_flights_async", fake_stream)
+    user_filters = dict(FILTERS, from_airport="DEL", to_airport="BOM", max_stay_days=2)
+    asyncio.run(round_trip.search_round_trip_async(user_filters, max_pairs=2))
+    assert len(request_ids) == 3 and len(set(request_ids)) == 1 and request_ids[0]
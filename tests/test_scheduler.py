@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from src.logger import _context, log_context
+from src.scheduler import BATCH, INTERACTIVE, FairScheduler, SchedulerOverloaded
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = FairScheduler(workers=1, max_queue_depth=10, max_batch_queue_depth=4)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def _block(scheduler):
+    # Occupy the only worker so the next submissions queue up
+    gate, running = threading.Event(), threading.Event()
+    future = scheduler.submit(lambda: (running.set(), gate.wait(5)), request_id="blocker")
+    running.wait(5)
+    return gate, future
+
+
+def test_requests_are_served_round_robin(scheduler):
+    gate, blocker = _block(scheduler)
+    order = []
+    futures = [scheduler.submit(order.append, f"big-{index}", request_id="big") for index in range(3)]
+    futures += [scheduler.submit(order.append, "small", request_id="small")]
+    gate.set()
+    for future in [blocker] + futures:
+        future.result(5)
+    assert order == ["big-0", "small", "big-1", "big-2"]
+
+
+def test_interactive_work_goes_before_batch(scheduler):
+    gate, blocker = _block(scheduler)
+    order = []
+    futures = [scheduler.submit(order.append, "batch", request_id="warmer", priority=BATCH),
+               scheduler.submit(order.append, "interactive", request_id="search")]
+    gate.set()
+    for future in [blocker] + futures:
+        future.result(5)
+    assert order == ["interactive", "batch"]
+
+
+def test_admission_limits_per_priority(scheduler):
+    gate, blocker = _block(scheduler)
+    futures = [scheduler.submit(lambda: None, request_id="search") for _ in range(4)]
+    scheduler.admit(6, INTERACTIVE)
+    with pytest.raises(SchedulerOverloaded):
+        scheduler.admit(1, BATCH)
+    with pytest.raises(SchedulerOverloaded):
+        scheduler.admit(7, INTERACTIVE)
+    assert scheduler.stats()["rejected"] == 2
+    gate.set()
+    for future in [blocker] + futures:
+        future.result(5)
+
+
+def test_cancelled_tasks_are_skipped(scheduler):
+    gate, blocker = _block(scheduler)
+    ran = []
+    future = scheduler.submit(ran.append, "cancelled", request_id="search")
+    assert future.cancel()
+    gate.set()
+    blocker.result(5)
+    scheduler.submit(lambda: None, request_id="search").result(5)
+    assert ran == []
+
+
+def test_tasks_run_in_the_submitter_context(scheduler):
+    with log_context(search_id="search-1"):
+        future = scheduler.submit(lambda value: (_context.get(), value), "kwargs", request_id="search-1")
+    assert future.result(5) == ({"search_id": "search-1"}, "kwargs")
+
+
+def test_shutdown_cancels_queued_tasks():
+    scheduler = FairScheduler(workers=1, max_queue_depth=10)
+    gate, blocker = _block(scheduler)
+    queued = scheduler.submit(lambda: None, request_id="search")
+    scheduler.shutdown()
+    gate.set()
+    blocker.result(5)
+    assert queued.cancelled()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(lambda: None)
@@ -0,0 +1,26 @@
+from src.warmer import RoutePopularity
+
+FILTERS = {"from_airport": "DEL", "to_airport": "BOM", "date_list": ["2026-12-05"]}
+
+
+def test_single_search_is_not_warmed():
+    popularity = RoutePopularity(half_life=3600, min_score=1.5)
+    popularity.record(FILTERS, now=0)
+    assert popularity.top(20, now=0) == []
+
+
+def test_repeated_searches_are_warmed_until_they_fade():
+    popularity = RoutePopularity(half_life=3600, min_score=1.5)
+    for now in (0, 60, 120):
+        popularity.record(FILTERS, now=now)
+    (score, filters, month), = popularity.top(20, now=120)
+    assert score > 2.9 and month == "2026-12"
+    assert (filters["from_airport"], filters["to_airport"]) == ("DEL", "BOM")
+    assert popularity.top(20, now=120 + 3600) == []
+
+
+def test_faded_pairs_are_forgotten():
+    popularity = RoutePopularity(half_life=3600, forget_score=0.05)
+    popularity.record(FILTERS, now=0)
+    popularity.record(dict(FILTERS, to_airport="GOI"), now=5 * 3600)
+    assert len(popularity) == 1